@@ -84,23 +84,64 @@ menu = st.sidebar.selectbox("📂 Menú de opciones", [
     "Crear columna combinada",
     "Graficar histograma",
     "Graficar gráfico de barras",
-    "Estadísticas por grupo"
+    "Estadísticas por grupo",
+    "Exportar datos"
 ])
 
 # ===== 📂 IMPORT FUNCTIONS =====
-from funciones.carga import cargar_archivo
+from funciones.carga import cargar_archivo, es_columnar, leer_esquema, TAMANO_BLOQUE, LIMITE_MEMORIA_MB
 from funciones.analisis import mostrar_info, mostrar_columna, ordenar_datos, agrupar_datos, filtrar_datos, estadisticas_por_grupo
 from funciones.transformaciones import eliminar_columna, reemplazar_valor, eliminar_duplicados, buscar_texto, crear_columna_combinada, eliminar_nulos
 from funciones.graficos import graficar_histograma, graficar_barras
 from funciones.sql import cargar_desde_sql
+from funciones.exportacion import exportar_datos
+from funciones.pipeline import materializar_plan, modo_diferido, obtener_plan, panel_plan
+from funciones.versionado import Dataset
+from funciones.memoria import gestionar_memoria, panel_memoria
+from funciones.remoto import (DatasetRemoto, obtener_remoto, panel_remoto, agrupar_remoto,
+                              estadisticas_remotas, buscar_remoto, ordenar_remoto)
 
 # ===== 🧠 GLOBAL VARIABLE =====
-if "df" not in st.session_state:
-    st.session_state.df = None
+# Versioned handle of the working frame: cached results are keyed by its version
+if "dataset" not in st.session_state:
+    st.session_state.dataset = Dataset()
+dataset = st.session_state.dataset
+dataset.comprobar()  # in-place edits that were not reported get a new version
+
+# Result frames each page works on (the working dataset is always in use)
+FRAMES_POR_PAGINA = {
+    "Agrupar por columna": ["grouped_df"],
+    "Estadísticas por grupo": ["grouped_stats"],
+}
+
+# ===== 🕒 DEFERRED TRANSFORMATIONS =====
+PAGINAS_SIN_DATOS = ["Inicio", "Cargar archivo", "Cargar desde SQL"]
+PAGINAS_TRANSFORMACION = [
+    "Eliminar columna",
+    "Eliminar duplicados",
+    "Eliminar filas con valores nulos",
+    "Reemplazar valores en columna",
+    "Crear columna combinada",
+]
+st.sidebar.checkbox(
+    "🕒 Modo diferido (plan de transformaciones)", key="modo_diferido",
+    help="Las transformaciones se registran en un plan, se previsualizan sobre una muestra "
+         "y se ejecutan juntas, optimizadas, al consultar estadísticas, gráficos o exportar."
+)
+# Any page that reads the data (or leaving deferred mode) runs the pending plan once
+if menu not in PAGINAS_SIN_DATOS and not (modo_diferido() and menu in PAGINAS_TRANSFORMACION):
+    dataset.actualizar(materializar_plan(dataset.df))
+if modo_diferido():
+    panel_plan(dataset.df)
+
+# ===== 🌐 REMOTE DATASET =====
+# Pages pushed down to the database while a remote dataset is connected
+if obtener_remoto() is not None:
+    panel_remoto(obtener_remoto())
 
 # ===== ✅ AUXILIARY FUNCTION =====
 def necesita_df():
-    if st.session_state.df is None:
+    if dataset.df is None:
         st.warning("⚠️ Carga un archivo primero.")
         return False
     return True
@@ -110,58 +151,119 @@ if menu == "Inicio":
     st.info("👋 Bienvenido al Analizador Big Data AEMG. Usa el menú lateral para comenzar.")
 
 elif menu == "Cargar archivo":
-    archivo = st.file_uploader("📂 Sube aquí tu base de datos (.csv, .json, .xlsx)", type=["csv","json","xlsx"])
+    origen = st.radio("Origen del archivo", ["Subir archivo", "Ruta local del servidor"], horizontal=True, key="carga_origen")
+    if origen == "Subir archivo":
+        archivo = st.file_uploader(
+            "📂 Sube aquí tu base de datos (.csv, .json, .xlsx, .parquet, .arrow, .feather)",
+            type=["csv", "json", "xlsx", "parquet", "arrow", "ipc", "feather"]
+        )
+    else:
+        ruta = st.text_input(
+            "📁 Ruta del archivo en el servidor", key="carga_ruta",
+            help="Los archivos Parquet / Arrow / Feather locales se abren con memoria mapeada (sin copiar)."
+        )
+        archivo = ruta.strip() if ruta and Path(ruta.strip()).is_file() else None
+        if ruta and archivo is None:
+            st.warning("⚠️ No se encuentra el archivo indicado.")
+
+    with st.expander("⚙️ Opciones de carga para archivos grandes", expanded=False):
+        streaming = st.checkbox(
+            "🌊 Carga por bloques (CSV)", value=False, key="carga_streaming",
+            help="Lee el CSV por bloques, reduce los tipos de datos y respeta un límite de memoria."
+        )
+        tamano_bloque = st.number_input(
+            "Filas por bloque", min_value=10_000, max_value=5_000_000, value=TAMANO_BLOQUE,
+            step=50_000, key="carga_bloque", disabled=not streaming
+        )
+        limite_memoria_mb = st.number_input(
+            "Límite de memoria (MB)", min_value=64, max_value=65_536, value=LIMITE_MEMORIA_MB,
+            step=256, key="carga_limite_mb", disabled=not streaming
+        )
+
     if archivo:
-        df = cargar_archivo(archivo)
+        columnas = None
+        if es_columnar(archivo):
+            disponibles = leer_esquema(archivo)
+            columnas = st.multiselect(
+                "🧱 Columnas a cargar", disponibles, default=disponibles, key="carga_columnas",
+                help="Solo se leen del archivo las columnas seleccionadas."
+            )
+
+        df = cargar_archivo(archivo, streaming=streaming, tamano_bloque=int(tamano_bloque),
+                            limite_memoria_mb=limite_memoria_mb, columnas=columnas or None)
         if df is not None:
-            st.session_state.df = df
-            st.success(f"✅ Archivo **{archivo.name}** cargado: {df.shape[0]} filas x {df.shape[1]} columnas")
+            if df is not dataset.df:
+                st.session_state.pop("historial", None)  # undo history belongs to the previous dataset
+                st.session_state.pop("remoto", None)
+                obtener_plan().vaciar()
+            dataset.actualizar(df)
+            st.success(f"✅ Archivo **{getattr(archivo, 'name', archivo)}** cargado: {df.shape[0]} filas x {df.shape[1]} columnas")
         else:
             st.error("❌ Error al cargar archivo.")
 
 elif menu == "Cargar desde SQL":
     df = cargar_desde_sql()
     if df is not None:
-        st.session_state.df = df
+        st.session_state.pop("historial", None)  # undo history belongs to the previous dataset
+        obtener_plan().vaciar()
+        if isinstance(df, DatasetRemoto):
+            # Remote mode: the sample backs the pages that are not pushed down
+            st.session_state.remoto = df
+            df = df.muestra
+        else:
+            st.session_state.pop("remoto", None)
+        dataset.actualizar(df)
         st.success("✅ Datos cargados desde SQL.")
     else:
         st.warning("⚠️ No se pudieron cargar datos desde SQL.")
 
 elif menu == "Mostrar información general":
-    if necesita_df(): mostrar_info(st.session_state.df)
+    if necesita_df(): mostrar_info(dataset.df)
 
 elif menu == "Mostrar los datos de una columna":
-    if necesita_df(): mostrar_columna(st.session_state.df)
+    if necesita_df(): mostrar_columna(dataset.df)
 
 elif menu == "Ordenar datos":
-    if necesita_df(): st.session_state.df = ordenar_datos(st.session_state.df)
+    if obtener_remoto() is not None: ordenar_remoto(obtener_remoto())
+    elif necesita_df(): dataset.actualizar(ordenar_datos(dataset.df))
 
 elif menu == "Eliminar columna":
-    if necesita_df(): st.session_state.df = eliminar_columna(st.session_state.df)
+    if necesita_df(): dataset.actualizar(eliminar_columna(dataset.df))
 
 elif menu == "Eliminar duplicados":
-    if necesita_df(): st.session_state.df = eliminar_duplicados(st.session_state.df)
+    if necesita_df(): dataset.actualizar(eliminar_duplicados(dataset.df))
 
 elif menu == "Eliminar filas con valores nulos":
-    if necesita_df(): st.session_state.df = eliminar_nulos(st.session_state.df)
+    if necesita_df(): dataset.actualizar(eliminar_nulos(dataset.df))
 
 elif menu == "Agrupar por columna":
-    if necesita_df(): agrupar_datos(st.session_state.df)
+    if obtener_remoto() is not None: agrupar_remoto(obtener_remoto())
+    elif necesita_df(): agrupar_datos(dataset.df)
 
 elif menu == "Reemplazar valores en columna":
-    if necesita_df(): st.session_state.df = reemplazar_valor(st.session_state.df)
+    if necesita_df(): dataset.actualizar(reemplazar_valor(dataset.df))
 
 elif menu == "Buscar texto parcial en columna":
-    if necesita_df(): buscar_texto(st.session_state.df)
+    if obtener_remoto() is not None: buscar_remoto(obtener_remoto())
+    elif necesita_df(): buscar_texto(dataset.df)
 
 elif menu == "Crear columna combinada":
-    if necesita_df(): st.session_state.df = crear_columna_combinada(st.session_state.df)
+    if necesita_df(): dataset.actualizar(crear_columna_combinada(dataset.df))
 
 elif menu == "Graficar histograma":
-    if necesita_df(): graficar_histograma(st.session_state.df)
+    if necesita_df(): graficar_histograma(dataset.df)
 
 elif menu == "Graficar gráfico de barras":
-    if necesita_df(): graficar_barras(st.session_state.df)
+    if necesita_df(): graficar_barras(dataset.df)
 
 elif menu == "Estadísticas por grupo":
-    if necesita_df(): estadisticas_por_grupo(st.session_state.df)
+    if obtener_remoto() is not None: estadisticas_remotas(obtener_remoto())
+    elif necesita_df(): estadisticas_por_grupo(dataset.df)
+
+elif menu == "Exportar datos":
+    if necesita_df(): exportar_datos(dataset.df)
+
+# ===== 🧠 MEMORY BUDGETS =====
+# Over budget, idle frames are spilled to disk and memory-mapped back
+gestionar_memoria(activos={"dataset", *FRAMES_POR_PAGINA.get(menu, [])})
+panel_memoria()
@@ -0,0 +1,175 @@
+# funciones/agrupacion.py
+import numpy as np
+import pandas as pd
+from funciones.cuantiles import sketch_por_grupo
+from funciones.versionado import CacheVersiones, version_df
+
+# =========================================================
+# ⚙️ AVAILABLE AGGREGATIONS
+# =========================================================
+AGREGACIONES = {
+    "count": "Recuento",
+    "sum": "Suma",
+    "mean": "Media",
+    "median": "Mediana",
+    "min": "Mínimo",
+    "max": "Máximo",
+    "std": "Desviación estándar",
+    "var": "Varianza",
+    "nunique": "Valores distintos",
+}
+PERCENTILES_DESCRIBE = [0.25, 0.5, 0.75]
+
+_cache_grupos = CacheVersiones(max_entradas=16)
+_cache_codigos = CacheVersiones(max_entradas=8)
+
+
+# =========================================================
+# 🔑 GROUP CODES
+# =========================================================
+def _codigos_columna(serie: pd.Series):
+    """Integer codes (-1 for nulls) and number of distinct values of one key column."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.codes.to_numpy().astype(np.int64), len(serie.cat.categories)
+    codigos, unicos = pd.factorize(serie, sort=True)
+    return codigos.astype(np.int64), len(unicos)
+
+
+def codigos_grupo(df: pd.DataFrame, claves: list):
+    """
+    One integer group id per row for the key combination (-1 if any key is null),
+    plus a frame with the key values of each group, in sorted key order.
+    Cached per frame version and key list.
+    """
+    def calcular():
+        ids = np.zeros(len(df), dtype=np.int64)
+        nulos = np.zeros(len(df), dtype=bool)
+        cardinalidad = 1
+        for c in claves:
+            codigos, n = _codigos_columna(df[c])
+            nulos |= codigos < 0
+            if cardinalidad * max(n, 1) >= 2 ** 62:
+                # Keep the mixed-radix id bounded by re-numbering the combinations seen so far
+                ids, unicos = pd.factorize(ids, sort=True)
+                ids = ids.astype(np.int64)
+                cardinalidad = len(unicos)
+            ids = ids * max(n, 1) + np.maximum(codigos, 0)
+            cardinalidad *= max(n, 1)
+
+        ids[nulos] = -1
+        validos = ~nulos
+        ids_validos, unicos = pd.factorize(ids[validos], sort=True)
+        resultado = np.full(len(df), -1, dtype=np.intp)
+        resultado[validos] = ids_validos
+
+        # Key values of each group, taken from the first row of the group
+        _, primeras = np.unique(ids_validos, return_index=True)
+        filas = np.flatnonzero(validos)[primeras]
+        claves_df = df[claves].iloc[filas].reset_index(drop=True)
+        return resultado, claves_df
+
+    return _cache_codigos.obtener((version_df(df), tuple(claves)), calcular)
+
+
+# =========================================================
+# 📊 GROUPBY ENGINE
+# =========================================================
+def agrupar(df: pd.DataFrame, claves: list, valores: list, aggs: list) -> pd.DataFrame:
+    """
+    Group `df` by several key columns and aggregate several value columns.
+    Keys are reduced once to integer group ids, so every aggregation runs over
+    the same codes. Results are cached per (frame version, keys, values, aggs).
+    """
+    claves, valores, aggs = list(claves), list(valores), list(aggs)
+
+    def calcular():
+        ids, claves_df = codigos_grupo(df, claves)
+        validos = ids >= 0
+        datos = df[valores][validos]
+        grupos = datos.groupby(ids[validos], sort=True)
+
+        resultado = grupos.agg(aggs)
+        resultado.columns = [
+            f"{v}_{a}" if len(valores) > 1 or len(aggs) > 1 else f"{v}" for v, a in resultado.columns
+        ] if isinstance(resultado.columns, pd.MultiIndex) else resultado.columns
+        resultado = resultado.reset_index(drop=True)
+
+        salida = pd.concat([claves_df, resultado], axis=1)
+        salida.insert(len(claves), "filas", np.bincount(ids[validos], minlength=len(claves_df)))
+        return salida
+
+    return _cache_grupos.obtener((version_df(df), tuple(claves), tuple(valores), tuple(aggs)), calcular)
+
+
+def _nombre_percentil(q: float) -> str:
+    return f"{q * 100:g}%"
+
+
+def describir_por_grupo(df: pd.DataFrame, claves: list, valor,
+                        percentiles: list = PERCENTILES_DESCRIBE, aproximado: bool = False) -> pd.DataFrame:
+    """
+    Equivalent of groupby(...)[valor].describe() over the shared group codes, cached.
+    With `aproximado`, quantiles come from a streaming per-group sketch (linear time,
+    no per-group sort); the sketch is cached, so other percentiles reuse it.
+    """
+    claves, percentiles = list(claves), sorted(percentiles)
+
+    def calcular():
+        ids, claves_df = codigos_grupo(df, claves)
+        if aproximado:
+            sketch = sketch_por_grupo(df, claves, valor, ids, len(claves_df))
+            resultado = pd.DataFrame({
+                "count": sketch.n,
+                "mean": sketch.media(),
+                "std": sketch.desviacion(),
+                "min": np.where(sketch.n > 0, sketch.minimo, np.nan),
+                **{_nombre_percentil(q): sketch.cuantil(q) for q in percentiles},
+                "max": np.where(sketch.n > 0, sketch.maximo, np.nan),
+            })
+            return pd.concat([claves_df, resultado], axis=1)
+
+        validos = ids >= 0
+        grupos = df[valor][validos].groupby(ids[validos], sort=True)
+        resultado = grupos.agg(["count", "mean", "std", "min"])
+        if percentiles:
+            cuantiles = grupos.quantile(percentiles).unstack()
+            cuantiles.columns = [_nombre_percentil(q) for q in percentiles]
+            resultado = resultado.join(cuantiles)
+        resultado["max"] = grupos.max()
+        return pd.concat([claves_df, resultado.reset_index(drop=True)], axis=1)
+
+    clave = (version_df(df), tuple(claves), valor, "describe", tuple(percentiles), aproximado)
+    return _cache_grupos.obtener(clave, calcular)
+
+
+# =========================================================
+# 🏆 TOP-N CATEGORIES
+# =========================================================
+def sumas_por_categoria(df: pd.DataFrame, columna_cat, columna_num) -> pd.Series:
+    """Sum of `columna_num` per category of `columna_cat` (bincount over group ids), cached."""
+    def calcular():
+        ids, claves_df = codigos_grupo(df, [columna_cat])
+        validos = ids >= 0
+        valores = df[columna_num].to_numpy(dtype=np.float64, na_value=np.nan)[validos]
+        sumas = np.bincount(ids[validos], weights=np.nan_to_num(valores, nan=0.0), minlength=len(claves_df))
+        return pd.Series(sumas, index=claves_df[columna_cat].to_numpy(), name=columna_num)
+
+    return _cache_grupos.obtener((version_df(df), columna_cat, columna_num, "sumas"), calcular)
+
+
+def top_n(sumas: pd.Series, n: int, otros: str = None) -> pd.Series:
+    """
+    The `n` largest entries of `sumas` in descending order, selected with a partial
+    partition (O(k) instead of a full sort). With `otros`, the rest is added as one entry.
+    """
+    valores = sumas.to_numpy()
+    if n < len(valores):
+        seleccion = np.argpartition(-valores, n - 1)[:n]
+    else:
+        seleccion = np.arange(len(valores))
+    seleccion = seleccion[np.argsort(-valores[seleccion], kind="stable")]
+    resultado = sumas.iloc[seleccion]
+    if otros is not None and n < len(valores):
+        resto = valores.sum() - resultado.sum()
+        resultado = pd.concat([resultado, pd.Series([resto], index=[otros], name=sumas.name)])
+    return resultado
@@ -1,8 +1,17 @@
 # funciones/analisis.py
 import streamlit as st
+import numpy as np
 import pandas as pd
 import locale
 from st_aggrid import AgGrid, GridOptionsBuilder
+from funciones.ordenacion import permutacion_orden
+from funciones.perfilado import perfilar, UMBRAL_APROXIMADO
+from funciones.agrupacion import AGREGACIONES, agrupar, describir_por_grupo
+from funciones.busqueda import buscar_en_columna
+from funciones.cuantiles import ERROR_RELATIVO, UMBRAL_CUANTILES
+from funciones.optimizacion import columnas_categoricas
+from funciones.exportacion import boton_descarga
+from funciones.versionado import version_df
 
 # =========================================================
 # 🌍 LOCALIZATION CONFIGURATION
@@ -73,14 +82,34 @@ CUSTOM_CSS_COMMON = {
 # =========================================================
 # 🧱 AUXILIARY FUNCTIONS
 # =========================================================
-def prepare_display_df(df: pd.DataFrame, max_len: int = 60) -> pd.DataFrame:
-    """Truncate long text to avoid huge rows."""
-    df_copy = df.copy()
-    for c in df_copy.columns:
-        df_copy[c] = df_copy[c].apply(
-            lambda x: str(x)[:max_len] + "..." if isinstance(x, str) and len(str(x)) > max_len else x
-        )
-    return df_copy
+def prepare_display_df(df: pd.DataFrame, max_len: int = 60, inicio: int = 0, fin: int = None) -> pd.DataFrame:
+    """
+    Truncate long text to avoid huge rows.
+    Only the rows in [inicio, fin) are returned and only text-like columns are touched.
+    """
+    ventana = df.iloc[inicio:fin]
+    df_disp = ventana.copy(deep=False)
+
+    for i in range(ventana.shape[1]):
+        serie = ventana.iloc[:, i]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            # Truncating categories could merge them; the window is small, so use plain values
+            serie = serie.astype(object)
+        elif not (serie.dtype == "object" or isinstance(serie.dtype, pd.StringDtype)):
+            continue
+
+        # Non-string values (numbers in object columns, NaN) give NaN length and stay untouched
+        try:
+            largos = serie.str.len()
+        except AttributeError:
+            continue  # object column without any string value
+        largas = (largos > max_len).fillna(False).to_numpy(dtype=bool)
+        if largas.any():
+            serie = serie.copy()
+            serie[largas] = serie[largas].str.slice(0, max_len) + "..."
+        df_disp.isetitem(i, serie)
+
+    return df_disp
 
 
 def calc_height_for_rows(n_rows: int, row_height: int = 32, header_extra: int = 70, max_height: int = 700) -> int:
@@ -109,6 +138,121 @@ def base_grid_from_df(df: pd.DataFrame) -> GridOptionsBuilder:
     return gb
 
 
+# =========================================================
+# 📑 SERVER-SIDE PAGINATED GRID
+# =========================================================
+TAMANOS_PAGINA = [50, 100, 250, 500, 1000]
+
+CUSTOM_CSS_SCROLL = {
+    ".ag-header-cell-label": {"color": "#007ACC !important", "font-weight": "700 !important"},
+    ".ag-root-wrapper": {"width": "100% !important", "height": "100% !important"},
+    ".ag-center-cols-viewport": {"overflow-x": "auto !important", "overflow-y": "auto !important"},
+    ".ag-body-horizontal-scroll-viewport": {"overflow-x": "auto !important"},
+    ".ag-body-viewport": {"overflow-y": "auto !important"},
+}
+
+
+def mascara_texto(df: pd.DataFrame, columna, texto: str) -> np.ndarray:
+    """
+    Boolean mask of rows whose `columna` contains `texto` (literal, case-insensitive),
+    answered by the column's trigram index and cached per frame version, column and text.
+    """
+    return buscar_en_columna(df, columna, texto, "sin_mayusculas")
+
+
+def mostrar_grid_paginado(df: pd.DataFrame, key_prefix: str, max_len: int = 200,
+                          permitir_orden: bool = True, permitir_filtro: bool = True,
+                          tamano_pagina: int = 100, custom_css: dict = None, columnas: list = None):
+    """
+    Display a DataFrame page by page:
+    - The full frame stays on the server; only the current page is serialized to AgGrid
+    - Multi-key sorting and filtering run server-side over the whole frame
+      (sort permutations are cached, so paging a sorted view is an index lookup)
+    - `columnas` restricts the grid (and the filter / sort choices) to some columns;
+      caches stay keyed on `df`, so showing a subset does not recompute them
+    Returns the row positions of the sorted / filtered view, or None for the natural order.
+    """
+    mascara = None
+    permutacion = None
+    visibles = list(df.columns) if columnas is None else list(columnas)
+
+    if permitir_filtro:
+        f1, f2 = st.columns([1, 2])
+        with f1:
+            col_filtro = st.selectbox("🔎 Filtrar columna", visibles, key=f"{key_prefix}_col_filtro")
+        with f2:
+            texto = st.text_input("Contiene", key=f"{key_prefix}_txt_filtro")
+        if texto:
+            mascara = mascara_texto(df, col_filtro, texto)
+
+    if permitir_orden:
+        o1, o2 = st.columns([3, 1])
+        with o1:
+            columnas_orden = st.multiselect(
+                "↕️ Ordenar por (en orden de prioridad)", visibles, key=f"{key_prefix}_cols_orden"
+            )
+        with o2:
+            nulos_primero = st.checkbox("Nulos primero", key=f"{key_prefix}_nulos_primero")
+        if columnas_orden:
+            direcciones = st.columns(len(columnas_orden))
+            ascendentes = []
+            for i, c in enumerate(columnas_orden):
+                with direcciones[i]:
+                    sentido = st.selectbox(f"{c}", ["⬆️ Asc", "⬇️ Desc"], key=f"{key_prefix}_dir_{c}")
+                ascendentes.append(sentido == "⬆️ Asc")
+            try:
+                permutacion = permutacion_orden(df, columnas_orden, ascendentes, nulos_primero)
+            except TypeError:
+                st.warning("⚠️ Alguna columna mezcla tipos y no se puede ordenar.")
+
+    if permutacion is not None and mascara is not None:
+        posiciones = permutacion[mascara[permutacion]]
+    elif permutacion is not None:
+        posiciones = permutacion
+    elif mascara is not None:
+        posiciones = np.flatnonzero(mascara)
+    else:
+        posiciones = None
+
+    total = len(df) if posiciones is None else len(posiciones)
+    p1, p2 = st.columns([1, 1])
+    with p1:
+        indice_tam = TAMANOS_PAGINA.index(tamano_pagina) if tamano_pagina in TAMANOS_PAGINA else 1
+        tam = st.selectbox("Filas por página", TAMANOS_PAGINA, index=indice_tam, key=f"{key_prefix}_tam_pag")
+    n_paginas = max(1, -(-total // tam))
+    clave_pagina = f"{key_prefix}_pagina"
+    if st.session_state.get(clave_pagina, 1) > n_paginas:
+        st.session_state[clave_pagina] = n_paginas
+    with p2:
+        pagina = st.number_input(f"Página (de {n_paginas})", min_value=1, max_value=n_paginas, step=1, key=clave_pagina)
+
+    inicio = (int(pagina) - 1) * tam
+    fin = min(inicio + tam, total)
+    vista = df if columnas is None else df[visibles]
+    pagina_df = vista.iloc[inicio:fin] if posiciones is None else vista.take(posiciones[inicio:fin])
+    df_disp = prepare_display_df(pagina_df, max_len=max_len)
+
+    gb = base_grid_from_df(df_disp)
+    # Sorting in the browser would only reorder the current page
+    gb.configure_default_column(sortable=False)
+    for c in df_disp.columns:
+        gb.configure_column(c, headerTooltip=f"Columna: {c}")
+
+    AgGrid(
+        df_disp,
+        gridOptions=gb.build(),
+        theme="streamlit",
+        fit_columns_on_grid_load=False,
+        allow_unsafe_jscode=False,
+        custom_css=custom_css or CUSTOM_CSS_SCROLL,
+        height=calc_height_for_rows(len(df_disp), row_height=34, header_extra=80, max_height=600),
+        key=f"{key_prefix}_aggrid",
+    )
+    st.caption(f"Filas {inicio + 1 if total else 0}–{fin} de {total}")
+
+    return posiciones
+
+
 # =========================================================
 # 🧠 GENERAL DATAFRAME INFORMATION
 # =========================================================
@@ -122,19 +266,19 @@ def mostrar_info(df: pd.DataFrame):
     # STRUCTURE
     # -----------------------------
     with st.expander("🧱 Estructura del DataFrame", expanded=False):
-        info_df = pd.DataFrame({
-            "Encabezado": df.columns,
-            "Tipo de datos": df.dtypes.astype(str),
-            "Nulos": df.isna().sum(),
-            "Valores únicos": df.nunique()
-        }).reset_index(drop=True)
+        # Single-pass profile, cached per frame version
+        info_df = perfilar(df)
 
         # Tooltips
         tooltips_estructura = {
             "Encabezado": "Column name",
             "Tipo de datos": "Data type (int, float, object, datetime, etc.)",
             "Nulos": "Number of missing values (NaN)",
-            "Valores únicos": "Number of distinct values in the column"
+            "Valores únicos": "Number of distinct values in the column",
+            "Exactitud": "Distinct counts above the row threshold are HyperLogLog estimates (standard error shown)",
+            "Mínimo": "Minimum value (numeric, date and ordered columns)",
+            "Máximo": "Maximum value (numeric, date and ordered columns)",
+            "Memoria (MB)": "Deep memory used by the column",
         }
 
         gb = base_grid_from_df(info_df)
@@ -162,136 +306,102 @@ def mostrar_info(df: pd.DataFrame):
             fit_columns_on_grid_load=True,
         )
 
+        umbral = f"{UMBRAL_APROXIMADO:,}".replace(",", ".")
         st.info(
-            "ℹ️ **Estructura:** columnas, tipos, nulos y valores únicos. "
+            "ℹ️ **Estructura:** columnas, tipos, nulos, valores únicos, rango y memoria. "
+            f"Con más de {umbral} filas los valores únicos son aproximados. "
             "Pasa el ratón sobre un encabezado para ver la explicación."
         )
 
 
+    # -----------------------------
+    # MEMORY OPTIMIZATION
+    # -----------------------------
+    with st.expander("🧠 Optimización de memoria", expanded=False):
+        memoria_actual = df.memory_usage(deep=True).sum() / 1024 ** 2
+        registro = st.session_state.get("informe_memoria")
+        if registro is None or registro["version"] != version_df(df):
+            st.metric("Memoria actual", f"{memoria_actual:,.1f} MB")
+            st.caption("No hay informe de optimización para estos datos (se genera al cargarlos).")
+        else:
+            informe = registro["informe"]
+            antes = informe["Memoria antes (MB)"].sum()
+            despues = informe["Memoria después (MB)"].sum()
+            c1, c2, c3 = st.columns(3)
+            c1.metric("Memoria al cargar", f"{antes:,.1f} MB")
+            c2.metric("Memoria optimizada", f"{despues:,.1f} MB", delta=f"-{antes - despues:,.1f} MB", delta_color="inverse")
+            c3.metric("Reducción", f"{antes / despues:,.1f}x" if despues else "—")
+
+            gb = base_grid_from_df(informe)
+            AgGrid(
+                informe,
+                gridOptions=gb.build(),
+                theme="streamlit",
+                allow_unsafe_jscode=False,
+                custom_css=CUSTOM_CSS_COMMON,
+                height=calc_height_for_rows(len(informe), row_height=34, header_extra=80, max_height=500),
+                fit_columns_on_grid_load=True,
+            )
+            st.info(
+                "ℹ️ **Optimización:** los números se reducen al tipo exacto más pequeño, el texto con pocos "
+                "valores distintos pasa a categoría y el resto a un tipo de texto compacto."
+            )
+
+
 # =========================================================
 # 📄 DISPLAY COLUMN
 # =========================================================
 def mostrar_columna(df: pd.DataFrame):
-    """Display data from a single column in AgGrid."""
+    """Display data from a single column in AgGrid, page by page."""
     st.subheader("📄 Mostrar datos de una columna")
     columna = st.selectbox("Selecciona una columna", df.columns, key="show_col")
 
     if columna:
-        col_df = df[[columna]].reset_index(drop=True)
-        col_disp = prepare_display_df(col_df, max_len=10000)
-
-        gb = GridOptionsBuilder.from_dataframe(col_disp)
-        gb.configure_default_column(
-            editable=False,
-            resizable=True,
-            sortable=True,
-            wrapText=True,
-            autoHeight=False,
-            minWidth=300,
-        )
-        gb.configure_column(columna, headerClass="blue-header", headerTooltip=f"Columna: {columna}")
-        gb.configure_grid_options(
-            domLayout="normal",
-            enableBrowserTooltips=True,
-            suppressHorizontalScroll=False
-        )
-
-        # CSS definition
-        custom_css_no_gap = {
-            ".ag-root-wrapper": {"width": "100% !important"},
-            ".ag-center-cols-container": {"width": "100% !important"},
-            ".blue-header .ag-header-cell-label": {"color": "#007ACC !important", "font-weight": "700 !important"},
-        }
-
-        row_height = 32
-        header_height = 36
-        visible_rows = 20
-        height = header_height + row_height * visible_rows
-
-        AgGrid(
-            col_disp,
-            gridOptions=gb.build(),
-            theme="streamlit",
-            allow_unsafe_jscode=False,
-            custom_css=custom_css_no_gap,
-            height=height,
-            fit_columns_on_grid_load=False,
-        )
+        # Same row window as the main grid: only the visible page is prepared and sent
+        mostrar_grid_paginado(df, key_prefix="show_col", max_len=10000, columnas=[columna])
 
 
 # =========================================================
 # ↕️ SORT DATA
 # =========================================================
 def ordenar_datos(df: pd.DataFrame) -> pd.DataFrame:
-    """Show full DataFrame, allow sorting by clicking headers, and enable CSV export."""
+    """Sort the DataFrame server-side by several keys, browse it by pages, and enable CSV export."""
     st.subheader("↕️ Ordenar datos")
 
-    # Working copy
-    df_disp = prepare_display_df(df, max_len=120)
-
-    # Configure AgGrid with blue headers and tooltips
-    gb = base_grid_from_df(df_disp)
-    for col in df_disp.columns:
-        gb.configure_column(col, headerTooltip=f"Columna: {col}")
-
-    # Set height for scrollable view (max 700 px)
-    height_grid = calc_height_for_rows(len(df_disp), row_height=34, header_extra=80, max_height=700)
+    # Sorting runs on the full frame (cached permutation); only the visible page goes to AgGrid
+    posiciones = mostrar_grid_paginado(df, key_prefix="ordenar", max_len=120, permitir_filtro=False)
 
-    # CSS — force scroll visible, blue headers, no ghost column
-    custom_css_scroll = {
-        ".ag-center-cols-viewport": {
-            "overflow-x": "auto !important",
-            "overflow-y": "auto !important",
-        },
-        ".ag-body-horizontal-scroll": {"display": "block !important"},
-        ".ag-root-wrapper": {"width": "100% !important"},
-        ".ag-center-cols-container": {"width": "100% !important"},
-        ".ag-header-cell-label": {
-            "color": "#007ACC !important",
-            "font-weight": "700 !important",
-        },
-        ".blue-header .ag-header-cell-label": {
-            "color": "#007ACC !important",
-            "font-weight": "700 !important",
-        },
-    }
-
-    # Display interactive AgGrid
-    grid_response = AgGrid(
-        df_disp,
-        gridOptions=gb.build(),
-        theme="streamlit",
-        fit_columns_on_grid_load=False,
-        allow_unsafe_jscode=False,
-        custom_css=custom_css_scroll,
-        height=height_grid,
+    st.info(
+        "ℹ️ **Ordenar Datos:** Elige una o varias columnas y el sentido de cada una; "
+        "el orden se calcula sobre todas las filas, no solo sobre la página visible."
     )
 
-    # Retrieve sorted DataFrame from AgGrid
-    sorted_df = pd.DataFrame(grid_response["data"])
-
-    st.info("ℹ️ **Ordenar Datos:** Haz clic en cualquier encabezado para ordenar la columna de forma ascendente o descendente.")
-
     # ========================
     # 📤 Export sorted CSV
     # ========================
-    csv = sorted_df.to_csv(index=False).encode("utf-8")
-    st.download_button(
-        label="💾 Exportar CSV ordenado",
-        data=csv,
-        file_name="datos_ordenados.csv",
-        mime="text/csv",
+    # The sorted frame is only built when the file is requested (cached per version and order)
+    boton_descarga(
+        df,
+        etiqueta="💾 Exportar CSV ordenado",
+        nombre_archivo="datos_ordenados.csv",
+        key="ordenar_descarga",
         help="Descarga el archivo con el orden actual mostrado en la tabla.",
+        posiciones=posiciones,
     )
 
-    return sorted_df
+    if posiciones is not None and st.button("✅ Aplicar este orden a los datos", key="btn_aplicar_orden"):
+        st.success("✅ Orden aplicado al conjunto de datos.")
+        # Original dtypes are preserved: the frame is reordered, never rebuilt from grid data
+        return df.take(posiciones).reset_index(drop=True)
+
+    return df
 
 
 # =========================================================
 # 📊 GROUP DATA
 # =========================================================
 def agrupar_datos(df: pd.DataFrame):
-    """Group DataFrame by a categorical column and display stats for a numerical column."""
+    """Group DataFrame by one or more categorical columns and aggregate several numerical columns."""
     st.subheader("📊 Agrupar datos por columna")
 
     if df is None or df.empty:
@@ -299,7 +409,7 @@ def agrupar_datos(df: pd.DataFrame):
         return
 
     # Identify categorical and numerical columns
-    cat_cols = [c for c in df.columns if df[c].dtype == 'object' or df[c].dtype.name == 'category']
+    cat_cols = columnas_categoricas(df)
     num_cols = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
 
     if not cat_cols or not num_cols:
@@ -308,17 +418,27 @@ def agrupar_datos(df: pd.DataFrame):
 
     col1, col2 = st.columns(2)
     with col1:
-        group_col = st.selectbox("Selecciona columna para agrupar", cat_cols, key="group_col")
+        group_cols = st.multiselect("Selecciona columnas para agrupar", cat_cols, default=cat_cols[:1], key="group_col")
     with col2:
-        val_col = st.selectbox("Selecciona columna numérica", num_cols, key="num_col")
+        val_cols = st.multiselect("Selecciona columnas numéricas", num_cols, default=num_cols[:1], key="num_col")
+    aggs = st.multiselect(
+        "Agregaciones",
+        list(AGREGACIONES),
+        default=["count", "mean", "sum"],
+        format_func=lambda a: AGREGACIONES[a],
+        key="group_aggs",
+    )
 
     # Save result in session for persistence
     if "grouped_df" not in st.session_state:
         st.session_state.grouped_df = None
 
     if st.button("🔹 Calcular estadísticas", key="group_btn"):
-        grouped_df = df.groupby(group_col)[val_col].describe().reset_index()
-        st.session_state.grouped_df = grouped_df  # save result
+        if not group_cols or not val_cols or not aggs:
+            st.warning("⚠️ Selecciona al menos una columna de agrupación, una numérica y una agregación.")
+        else:
+            # Cached per (frame version, keys, values, aggs): repeating a grouping is free
+            st.session_state.grouped_df = agrupar(df, group_cols, val_cols, aggs)
 
     # Display table if result exists
     if st.session_state.grouped_df is not None:
@@ -368,15 +488,14 @@ def agrupar_datos(df: pd.DataFrame):
         )
 
         # Export CSV
-        csv = st.session_state.grouped_df.to_csv(index=False).encode("utf-8")
-        st.download_button(
-            label="💾 Exportar CSV",
-            data=csv,
-            file_name=f"agrupacion_{group_col}_por_{val_col}.csv",
-            mime="text/csv",
+        boton_descarga(
+            st.session_state.grouped_df,
+            etiqueta="💾 Exportar CSV",
+            nombre_archivo="agrupacion.csv",
+            key="agrupar_descarga",
         )
 
-        st.info("ℹ️ **Agrupar Datos:** Agrupa una columna categórica y calcula estadísticas sobre una numérica. Puedes ordenar haciendo clic en los encabezados sin que se cierre la tabla.")
+        st.info("ℹ️ **Agrupar Datos:** Agrupa por una o varias columnas categóricas y calcula varias agregaciones sobre columnas numéricas. Puedes ordenar haciendo clic en los encabezados sin que se cierre la tabla.")
 
 
 # =========================================================
@@ -409,41 +528,19 @@ def filtrar_datos(df: pd.DataFrame):
 
     # Display filtered table
     if 'filas_filtradas' in st.session_state and not st.session_state['filas_filtradas'].empty:
-        df_disp = prepare_display_df(st.session_state['filas_filtradas'], max_len=200)
-        gb = base_grid_from_df(df_disp)
-        for c in df_disp.columns:
-            gb.configure_column(c, headerTooltip=f"Columna: {c}")
-
-        custom_css_scroll = {
-            ".ag-header-cell-label": {"color": "#007ACC !important", "font-weight": "700 !important"},
-            ".ag-root-wrapper": {"width": "100% !important", "height": "100% !important"},
-            ".ag-center-cols-viewport": {"overflow-x": "auto !important", "overflow-y": "auto !important", "min-height": "400px !important"},
-            ".ag-body-horizontal-scroll-viewport": {"overflow-x": "auto !important"},
-            ".ag-body-viewport": {"overflow-y": "auto !important"},
-        }
-
-        height_grid = calc_height_for_rows(len(df_disp), row_height=34, header_extra=80, max_height=600)
-
-        AgGrid(
-            df_disp,
-            gridOptions=gb.build(),
-            theme="streamlit",
-            fit_columns_on_grid_load=False,
-            allow_unsafe_jscode=False,
-            custom_css=custom_css_scroll,
-            height=height_grid,
+        mostrar_grid_paginado(
+            st.session_state['filas_filtradas'], key_prefix="filtrar", max_len=200, permitir_filtro=False
         )
 
         # Export filtered CSV
-        csv = st.session_state['filas_filtradas'].to_csv(index=False).encode("utf-8")
-        st.download_button(
-            label=f"💾 Exportar CSV filas filtradas ({col})",
-            data=csv,
-            file_name=f"filas_filtradas_{col}.csv",
-            mime="text/csv",
+        boton_descarga(
+            st.session_state['filas_filtradas'],
+            etiqueta=f"💾 Exportar CSV filas filtradas ({col})",
+            nombre_archivo=f"filas_filtradas_{col}.csv",
+            key="filtrar_descarga",
         )
 
-        st.info("ℹ️ **Filtrar filas:** Puedes ordenar columnas haciendo clic en los encabezados sin que se cierre la tabla.")
+        st.info("ℹ️ **Filtrar filas:** Puedes ordenar las filas filtradas y navegar por páginas sin que se cierre la tabla.")
 
 
 # =========================================================
@@ -487,12 +584,11 @@ def eliminar_columna(df: pd.DataFrame) -> pd.DataFrame:
     )
 
     # Export CSV
-    csv = df_resultante.to_csv(index=False).encode("utf-8")
-    st.download_button(
-        label=f"💾 Exportar CSV sin columna ({col_elim})",
-        data=csv,
-        file_name=f"df_sin_{col_elim}.csv",
-        mime="text/csv",
+    boton_descarga(
+        df_resultante,
+        etiqueta=f"💾 Exportar CSV sin columna ({col_elim})",
+        nombre_archivo=f"df_sin_{col_elim}.csv",
+        key="elim_col_descarga",
     )
 
     st.info("ℹ️ **Eliminar columna:** Haz clic en cualquier encabezado para ordenar columnas.")
@@ -517,7 +613,7 @@ def estadisticas_por_grupo(df: pd.DataFrame):
         return
 
     # Detect categorical and numerical columns
-    cat_cols = [c for c in df.columns if df[c].dtype == "object" or df[c].dtype.name == "category"]
+    cat_cols = columnas_categoricas(df)
     num_cols = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
 
     if not cat_cols:
@@ -528,16 +624,40 @@ def estadisticas_por_grupo(df: pd.DataFrame):
         return
 
     # User selects grouping and numerical columns
-    group_col = st.selectbox("Columna de agrupación (categórica)", cat_cols, key="group_stats_col")
+    group_cols = st.multiselect(
+        "Columnas de agrupación (categóricas)", cat_cols, default=cat_cols[:1], key="group_stats_col"
+    )
     stat_col = st.selectbox("Columna numérica (estadística)", num_cols, key="group_stats_num")
 
+    col1, col2 = st.columns(2)
+    with col1:
+        # Exact quantiles sort every group; sketches scale linearly on large frames
+        modo = st.radio(
+            "Cálculo de cuantiles",
+            ["Exacto", "Aproximado (sketch)"],
+            index=int(len(df) > UMBRAL_CUANTILES),
+            key="group_stats_modo",
+            help=f"El modo aproximado garantiza un error relativo ≤ {ERROR_RELATIVO:.0%} en cada percentil.",
+        )
+    with col2:
+        percentiles = st.multiselect(
+            "Percentiles", [1, 5, 10, 25, 50, 75, 90, 95, 99], default=[25, 50, 75], key="group_stats_percentiles"
+        )
+
     # Session persistence
     if "grouped_stats" not in st.session_state:
         st.session_state.grouped_stats = None
 
-    # Compute grouped statistics
+    # Compute grouped statistics (cached per frame version and selection)
     if st.button("🔹 Calcular estadísticas por grupo", key="btn_group_stats"):
-        st.session_state.grouped_stats = df.groupby(group_col)[stat_col].describe().reset_index()
+        if not group_cols:
+            st.warning("⚠️ Selecciona al menos una columna de agrupación.")
+        else:
+            st.session_state.grouped_stats = describir_por_grupo(
+                df, group_cols, stat_col,
+                percentiles=[p / 100 for p in percentiles],
+                aproximado=modo.startswith("Aproximado"),
+            )
 
     # Display grouped table if available
     if st.session_state.grouped_stats is not None:
@@ -545,11 +665,12 @@ def estadisticas_por_grupo(df: pd.DataFrame):
 
         # Tooltips for headers
         tooltips = {
-            group_col: f"Categoría agrupada ({group_col})",
+            **{c: f"Categoría agrupada ({c})" for c in group_cols},
             "count": "Number of non-null observations",
             "mean": "Average of numeric values",
             "std": "Standard deviation (measure of spread)",
             "min": "Minimum value observed",
+            **{f"{p}%": f"{p}th percentile" for p in percentiles},
             "25%": "First quartile (25th percentile)",
             "50%": "Median (50th percentile)",
             "75%": "Third quartile (75th percentile)",
@@ -590,12 +711,11 @@ def estadisticas_por_grupo(df: pd.DataFrame):
         )
 
         # Export full CSV
-        csv = grouped.to_csv(index=False).encode("utf-8")
-        st.download_button(
-            label="💾 Exportar CSV completo (estadísticas por grupo)",
-            data=csv,
-            file_name=f"estadisticas_por_grupo_{group_col}_por_{stat_col}.csv",
-            mime="text/csv",
+        boton_descarga(
+            st.session_state.grouped_stats,
+            etiqueta="💾 Exportar CSV completo (estadísticas por grupo)",
+            nombre_archivo=f"estadisticas_por_grupo_{stat_col}.csv",
+            key="stats_descarga",
             help="Descarga la tabla completa con todas las estadísticas calculadas.",
         )
 
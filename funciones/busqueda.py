@@ -0,0 +1,232 @@
+# funciones/busqueda.py
+import re
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from funciones.versionado import CacheVersiones, version_df
+
+# =========================================================
+# ⚙️ SEARCH CONFIGURATION
+# =========================================================
+MODOS_BUSQUEDA = {
+    "literal": "Texto literal",
+    "sin_mayusculas": "Ignorar mayúsculas",
+    "regex": "Expresión regular",
+}
+CELDAS_POR_BLOQUE = 20_000_000   # characters decoded at once while building the index
+BITS_TRIGRAMA = 24               # trigrams are hashed to 2^24 buckets (collisions only add candidates)
+BITS_ID = 40                     # room for distinct-value ids in each index entry
+METACARACTERES = set(".^$*+?{}[]()|\\")
+_FLAGS_EN_LINEA = re.compile(r"\(\?[aiLmsux-]*[aiLmsux][aiLmsux-]*[:)]")   # (?i), (?x), (?i:...) change what a literal matches
+_CUANTIFICADOR = re.compile(r"\{\d*(,\d*)?\}")
+
+_cache_indices = CacheVersiones(max_entradas=4)
+_cache_mascaras = CacheVersiones(max_entradas=16)
+
+
+# =========================================================
+# 🔤 TRIGRAMS
+# =========================================================
+def _codigos_trigramas(matriz: np.ndarray) -> np.ndarray:
+    """Trigram codes (3 × 21-bit code points) of each row of a code-point matrix; 0 = padding."""
+    m = matriz.astype(np.int64)
+    codigos = (m[:, :-2] << 42) | (m[:, 1:-1] << 21) | m[:, 2:]
+    codigos[m[:, 2:] == 0] = 0
+    return codigos
+
+
+def _hash_trigramas(codigos: np.ndarray) -> np.ndarray:
+    """Multiplicative hash of trigram codes to BITS_TRIGRAMA bits (uint64, ready to shift)."""
+    mezclados = codigos.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    return mezclados >> np.uint64(64 - BITS_TRIGRAMA)
+
+
+def trigramas_texto(texto: str) -> np.ndarray:
+    """Distinct hashed trigrams of one (already lower-cased) string."""
+    if len(texto) < 3:
+        return np.empty(0, dtype=np.uint64)
+    matriz = np.array([texto]).view(np.uint32).reshape(1, -1)
+    return np.unique(_hash_trigramas(_codigos_trigramas(matriz)))
+
+
+def _fin_clase(patron: str, inicio: int) -> int:
+    """Position just after the character class opened at `inicio` ("[]a]" and "[^]a]" included)."""
+    i = inicio + 1
+    if i < len(patron) and patron[i] == "^":
+        i += 1
+    if i < len(patron) and patron[i] == "]":
+        i += 1   # a leading "]" is a literal member of the class
+    while i < len(patron) and patron[i] != "]":
+        i += 2 if patron[i] == "\\" else 1
+    return i + 1
+
+
+def literales_obligatorios(patron: str):
+    """
+    Literal fragments every match of the regex `patron` must contain, or None when
+    the pattern cannot be prefiltered safely. Conservative: alternations and inline
+    flags ((?i), (?x)...) disable the prefilter, groups / classes / escapes /
+    {m,n} quantifiers break fragments, and characters made optional by a
+    quantifier are dropped.
+    """
+    if "|" in patron or _FLAGS_EN_LINEA.search(patron):
+        return None
+    fragmentos, actual, profundidad, i = [], [], 0, 0
+
+    def cortar():
+        fragmentos.append("".join(actual))
+        actual.clear()
+
+    while i < len(patron):
+        c = patron[i]
+        if c == "\\":
+            cortar()
+            i += 2
+            continue
+        if c == "[":
+            cortar()
+            i = _fin_clase(patron, i)
+            continue
+        cuantificador = _CUANTIFICADOR.match(patron, i) if c == "{" else None
+        if cuantificador:
+            cortar()
+            i = cuantificador.end()
+            continue
+        if c == "(":
+            profundidad += 1
+        elif c == ")":
+            profundidad = max(profundidad - 1, 0)
+        elif profundidad == 0 and c not in METACARACTERES:
+            siguiente = patron[i + 1] if i + 1 < len(patron) else ""
+            if siguiente in ("?", "*", "{"):
+                cortar()
+            else:
+                actual.append(c)
+            i += 1
+            continue
+        cortar()
+        i += 1
+    cortar()
+    return [f for f in fragmentos if len(f) >= 3]
+
+
+# =========================================================
+# 🗂️ INVERTED TRIGRAM INDEX
+# =========================================================
+class IndiceTrigramas:
+    """
+    Inverted trigram index over the distinct values of one column.
+    Rows map to distinct values through factorize codes, so every search works on
+    the distinct values only; hashed trigrams (lower-cased) narrow the candidates,
+    which are then verified against the real values with the requested semantics.
+    """
+
+    def __init__(self, serie: pd.Series):
+        codigos, unicos = pd.factorize(serie, use_na_sentinel=True)
+        self.codigos = codigos
+        # Arrow-backed strings: candidate verification runs in compiled code
+        self.valores = pd.Series(np.asarray(unicos, dtype=object).astype(str)).astype("string[pyarrow]")
+        self.minusculas = self.valores.str.lower()
+        self.entradas = self._construir(self.minusculas.to_numpy(dtype=object))
+
+    @staticmethod
+    def _construir(textos: np.ndarray) -> np.ndarray:
+        """
+        Sorted, distinct `hashed trigram << BITS_ID | value id` entries (one uint64 sort).
+        BITS_TRIGRAMA + BITS_ID is 64: signed entries would wrap for the top buckets.
+        """
+        longitudes = np.fromiter((len(t) for t in textos), dtype=np.int64, count=len(textos))
+        orden = np.argsort(longitudes, kind="stable")
+        ordenadas = longitudes[orden]
+        entradas = []
+        inicio = 0
+        # Blocks of similar length keep the padded code-point matrices small
+        while inicio < len(orden):
+            filas = max(1, CELDAS_POR_BLOQUE // max(ordenadas[inicio], 1))
+            fin = min(inicio + filas, len(orden))
+            filas = max(1, CELDAS_POR_BLOQUE // max(ordenadas[fin - 1], 1))
+            fin = min(inicio + filas, fin)
+            ids = orden[inicio:fin]
+            ancho = ordenadas[fin - 1]
+            if ancho >= 3:
+                matriz = np.array(textos[ids].tolist(), dtype=f"<U{ancho}").view(np.uint32).reshape(len(ids), ancho)
+                codigos = _codigos_trigramas(matriz)
+                filas, _ = np.nonzero(codigos)
+                claves = _hash_trigramas(codigos[codigos != 0]) << np.uint64(BITS_ID)
+                entradas.append(claves | ids[filas].astype(np.uint64))
+            inicio = fin
+
+        if not entradas:
+            return np.empty(0, dtype=np.uint64)
+        entradas = np.concatenate(entradas)
+        entradas.sort()
+        distintas = np.ones(len(entradas), dtype=bool)
+        distintas[1:] = entradas[1:] != entradas[:-1]
+        return entradas[distintas]
+
+    @property
+    def memoria_bytes(self) -> int:
+        return int(self.entradas.nbytes + self.codigos.nbytes
+                   + self.valores.memory_usage(deep=True) + self.minusculas.memory_usage(deep=True))
+
+    def candidatos(self, fragmentos: list) -> np.ndarray:
+        """Distinct-value ids containing every trigram of every fragment (sorted); all ids for None."""
+        resultado = None
+        mascara_id = np.uint64((1 << BITS_ID) - 1)
+        for fragmento in fragmentos or []:
+            for t in trigramas_texto(fragmento.lower()):
+                # Bounds of the bucket without computing (t + 1) << BITS_ID, which overflows for the last one
+                inicio = np.searchsorted(self.entradas, t << np.uint64(BITS_ID), side="left")
+                fin = np.searchsorted(self.entradas, (t << np.uint64(BITS_ID)) | mascara_id, side="right")
+                lista = (self.entradas[inicio:fin] & mascara_id).astype(np.int64)
+                resultado = lista if resultado is None else np.intersect1d(resultado, lista, assume_unique=True)
+                if not len(resultado):
+                    return resultado
+        return np.arange(len(self.valores)) if resultado is None else resultado
+
+    def buscar(self, texto: str, modo: str = "literal") -> np.ndarray:
+        """Boolean row mask of the values matching `texto` in the given mode."""
+        if modo == "regex":
+            re.compile(texto)   # invalid patterns raise re.error, as with str.contains
+            candidatos = self.candidatos(literales_obligatorios(texto))
+            try:
+                coinciden = self.valores.iloc[candidatos].str.contains(texto, regex=True)
+            except (pa.ArrowInvalid, NotImplementedError):
+                # Python-only syntax (lookarounds, backreferences...): verify with the re module
+                coinciden = self.valores.iloc[candidatos].astype(object).str.contains(texto, regex=True)
+        elif modo == "sin_mayusculas":
+            candidatos = self.candidatos([texto])
+            coinciden = self.minusculas.iloc[candidatos].str.contains(texto.lower(), regex=False)
+        else:
+            candidatos = self.candidatos([texto])
+            coinciden = self.valores.iloc[candidatos].str.contains(texto, regex=False)
+        coinciden = coinciden.to_numpy(dtype=bool, na_value=False)
+
+        seleccion = np.zeros(len(self.valores) + 1, dtype=bool)   # last slot: nulls (code -1)
+        seleccion[candidatos[coinciden]] = True
+        return seleccion[self.codigos]
+
+
+def indice_columna(df: pd.DataFrame, columna) -> IndiceTrigramas:
+    """Trigram index of `columna`, built on first use and cached per frame version."""
+    return _cache_indices.obtener((version_df(df), columna), lambda: IndiceTrigramas(df[columna]))
+
+
+def buscar_en_columna(df: pd.DataFrame, columna, texto: str, modo: str = "literal",
+                      usar_indice: bool = True) -> np.ndarray:
+    """
+    Boolean row mask of `columna` values containing `texto` (literal, case-insensitive
+    or regex), cached per (frame version, column, text, mode): paging or sorting a
+    filtered view reuses it instead of scanning the column again. Read-only.
+    """
+    def calcular():
+        if usar_indice:
+            mascara = indice_columna(df, columna).buscar(texto, modo)
+        else:
+            mascara = df[columna].astype(str).str.contains(
+                texto, case=modo != "sin_mayusculas", regex=modo == "regex", na=False
+            ).to_numpy()
+        mascara.setflags(write=False)
+        return mascara
+
+    return _cache_mascaras.obtener((version_df(df), columna, texto, modo, usar_indice), calcular)
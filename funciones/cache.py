@@ -0,0 +1,168 @@
+# funciones/cache.py
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+# =========================================================
+# ⚙️ CACHE CONFIGURATION
+# =========================================================
+# Directory, size budget and maximum age can be overridden with environment variables
+DIRECTORIO_CACHE = Path(os.environ.get("AEMG_CACHE_DIR", Path(tempfile.gettempdir()) / "aemg_cache"))
+LIMITE_CACHE_MB = float(os.environ.get("AEMG_CACHE_MB", 4096))
+EDAD_MAXIMA_HORAS = float(os.environ.get("AEMG_CACHE_HORAS", 72))
+
+EXTENSION = ".feather"
+_CLAVE_METADATOS = b"aemg"   # schema metadata holding the load details (e.g. whether it was complete)
+_BLOQUE_HASH = 8 * 1024 ** 2
+_cerrojo = threading.Lock()
+
+
+# =========================================================
+# 🔑 CACHE KEYS
+# =========================================================
+def clave_bytes(datos, *opciones) -> str:
+    """Key for an uploaded file: hash of its bytes plus the load options."""
+    h = hashlib.blake2b(digest_size=20)
+    vista = memoryview(datos)
+    for i in range(0, len(vista), _BLOQUE_HASH):
+        h.update(vista[i:i + _BLOQUE_HASH])
+    h.update(repr(opciones).encode("utf-8"))
+    return h.hexdigest()
+
+
+def clave_ruta(ruta, *opciones) -> str:
+    """
+    Key for a file on local disk: path, size and modification time plus the load options.
+    Avoids reading a multi-GB file just to find out it is already cached.
+    """
+    info = os.stat(ruta)
+    firma = (os.path.abspath(ruta), info.st_size, info.st_mtime_ns)
+    return clave_texto(repr(firma), *opciones)
+
+
+def clave_texto(texto: str, *opciones) -> str:
+    """Key for a text identifier (e.g. SQL URL + query) plus options."""
+    h = hashlib.blake2b(digest_size=20)
+    h.update(texto.encode("utf-8"))
+    h.update(repr(opciones).encode("utf-8"))
+    return h.hexdigest()
+
+
+# =========================================================
+# 💾 READ / WRITE
+# =========================================================
+def _ruta_entrada(clave: str) -> Path:
+    return DIRECTORIO_CACHE / f"{clave}{EXTENSION}"
+
+
+def leer_cache(clave: str, con_metadatos: bool = False):
+    """
+    Return the cached DataFrame for `clave`, or None on a miss.
+    With `con_metadatos`, return (df, metadatos) instead, where `metadatos` is the
+    dict stored by guardar_cache ((None, {}) on a miss).
+    """
+    fallo = (None, {}) if con_metadatos else None
+    ruta = _ruta_entrada(clave)
+    if not ruta.exists():
+        return fallo
+    if time.time() - ruta.stat().st_mtime > EDAD_MAXIMA_HORAS * 3600:
+        _borrar(ruta)
+        return fallo
+
+    try:
+        tabla = feather.read_table(ruta, memory_map=True)
+        metadatos = json.loads((tabla.schema.metadata or {}).get(_CLAVE_METADATOS, b"{}"))
+        df = tabla.to_pandas(split_blocks=True)
+    except (pa.ArrowException, OSError, ValueError):
+        _borrar(ruta)
+        return fallo
+
+    # Refresh the timestamp so eviction follows least-recent use
+    try:
+        os.utime(ruta, None)
+    except OSError:
+        pass
+    return (df, metadatos) if con_metadatos else df
+
+
+def guardar_cache(clave: str, df: pd.DataFrame, metadatos: dict = None) -> bool:
+    """
+    Store `df` under `clave` (best effort: frames that Arrow cannot
+    serialise are simply not cached). Returns True when stored.
+    `metadatos` (JSON-serialisable) is stored alongside and returned by
+    leer_cache(clave, con_metadatos=True).
+    """
+    if df is None or LIMITE_CACHE_MB <= 0:
+        return False
+
+    try:
+        DIRECTORIO_CACHE.mkdir(parents=True, exist_ok=True)
+        ruta = _ruta_entrada(clave)
+        # Write to a temporary name and rename, so readers never see a partial file
+        temporal = ruta.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tabla = pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False)
+        if metadatos:
+            tabla = tabla.replace_schema_metadata({
+                **(tabla.schema.metadata or {}), _CLAVE_METADATOS: json.dumps(metadatos).encode("utf-8")
+            })
+        feather.write_feather(tabla, temporal, compression="uncompressed")
+        os.replace(temporal, ruta)
+    except (pa.ArrowException, OSError, TypeError, ValueError):
+        return False
+
+    purgar_cache()
+    return True
+
+
+# =========================================================
+# 🧹 EVICTION
+# =========================================================
+def _borrar(ruta: Path):
+    try:
+        ruta.unlink()
+    except OSError:
+        pass
+
+
+def purgar_cache(limite_mb: float = None, edad_maxima_horas: float = None):
+    """
+    Remove expired entries, then the least recently used ones
+    until the cache directory fits in `limite_mb`.
+    """
+    limite_mb = LIMITE_CACHE_MB if limite_mb is None else limite_mb
+    edad_maxima_horas = EDAD_MAXIMA_HORAS if edad_maxima_horas is None else edad_maxima_horas
+    if not DIRECTORIO_CACHE.exists():
+        return
+
+    with _cerrojo:
+        ahora = time.time()
+        entradas = []
+        for ruta in DIRECTORIO_CACHE.glob(f"*{EXTENSION}"):
+            try:
+                info = ruta.stat()
+            except OSError:
+                continue
+            if ahora - info.st_mtime > edad_maxima_horas * 3600:
+                _borrar(ruta)
+            else:
+                entradas.append((info.st_mtime, info.st_size, ruta))
+
+        total = sum(tam for _, tam, _ in entradas)
+        limite = limite_mb * 1024 ** 2
+        for _, tam, ruta in sorted(entradas):
+            if total <= limite:
+                break
+            _borrar(ruta)
+            total -= tam
+
+
+def vaciar_cache():
+    """Delete every cached dataset."""
+    purgar_cache(limite_mb=0)
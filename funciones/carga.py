@@ -1,27 +1,245 @@
+import os
+from pathlib import Path
 import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
 import streamlit as st
+from funciones.cache import clave_bytes, clave_ruta, guardar_cache, leer_cache
+from funciones.optimizacion import optimizar_memoria, plan_tipos_texto, reducir_tipos, unir_bloques
+from funciones.versionado import version_df
 
-def cargar_archivo(archivo):
+# =========================================================
+# ⚙️ STREAMING LOAD PARAMETERS
+# =========================================================
+TAMANO_BLOQUE = 200_000      # rows per CSV chunk
+LIMITE_MEMORIA_MB = 2048     # memory budget for the loaded frame
+
+# Columnar formats read through pyarrow
+FORMATOS_COLUMNARES = (".parquet", ".arrow", ".ipc", ".feather")
+
+
+# =========================================================
+# 🌊 CHUNKED CSV READER
+# =========================================================
+def leer_csv_por_bloques(archivo, tamano_bloque: int = TAMANO_BLOQUE,
+                         limite_memoria_mb: float = LIMITE_MEMORIA_MB, progreso=None):
+    """
+    Read a CSV in chunks, downcasting dtypes block by block.
+    - Text column types (dates / categories) are decided on the first chunk
+    - Stops once the accumulated frame exceeds `limite_memoria_mb`
+    - `progreso(filas, fraccion)` is called after every chunk, if given
+    Returns (df, completo) where `completo` is False when the budget cut the load.
+    """
+    if isinstance(archivo, (str, Path)):
+        with open(archivo, "rb") as f:
+            f.size = os.path.getsize(archivo)
+            return leer_csv_por_bloques(f, tamano_bloque, limite_memoria_mb, progreso)
+
+    total_bytes = getattr(archivo, "size", None)
+    limite_bytes = limite_memoria_mb * 1024 ** 2
+
+    bloques = []
+    plan_texto = None
+    filas = 0
+    memoria = 0
+    completo = True
+
+    with pd.read_csv(archivo, chunksize=tamano_bloque) as lector:
+        for bloque in lector:
+            if plan_texto is None:
+                plan_texto = plan_tipos_texto(bloque)
+            bloque = reducir_tipos(bloque, plan_texto)
+
+            bloques.append(bloque)
+            filas += len(bloque)
+            memoria += bloque.memory_usage(deep=True).sum()
+
+            if progreso is not None:
+                fraccion = None
+                if total_bytes:
+                    fraccion = min(archivo.tell() / total_bytes, 1.0)
+                progreso(filas, fraccion)
+
+            if memoria >= limite_bytes:
+                completo = False
+                break
+
+    return unir_bloques(bloques), completo
+
+
+# =========================================================
+# 🧱 COLUMNAR FORMATS (PARQUET / ARROW IPC / FEATHER)
+# =========================================================
+def nombre_archivo(archivo) -> str:
+    """Lower-case name of an uploaded file or a local path."""
+    if isinstance(archivo, (str, Path)):
+        return str(archivo).lower()
+    return archivo.name.lower()
+
+
+def es_columnar(archivo) -> bool:
+    return nombre_archivo(archivo).endswith(FORMATOS_COLUMNARES)
+
+
+def _fuente_arrow(archivo, memoria_mapeada: bool = True):
+    """
+    Arrow input for a local path or an uploaded file.
+    Local files are memory-mapped, so pages are loaded lazily by the OS;
+    uploads are wrapped without copying their bytes (getbuffer() is a view,
+    getvalue() would copy the whole upload).
+    """
+    if isinstance(archivo, (str, Path)):
+        return pa.memory_map(str(archivo), "r") if memoria_mapeada else pa.OSFile(str(archivo), "r")
+    return pa.BufferReader(pa.py_buffer(archivo.getbuffer()))
+
+
+def _abrir_ipc(fuente):
+    """Open an Arrow IPC source, accepting both the file and the stream layouts."""
     try:
-        nombre = archivo.name.lower()
+        return ipc.open_file(fuente)
+    except pa.ArrowInvalid:
+        fuente.seek(0)
+        return ipc.open_stream(fuente)
+
+
+def leer_esquema(archivo) -> list:
+    """Column names of a columnar file, read from its metadata only ([] if unreadable)."""
+    nombre = nombre_archivo(archivo)
+    try:
+        with _fuente_arrow(archivo) as fuente:
+            if nombre.endswith(".parquet"):
+                return pq.read_schema(fuente).names
+            # Feather v2 is the Arrow IPC file layout
+            return _abrir_ipc(fuente).schema.names
+    except (pa.ArrowException, OSError):
+        return []
+
 
-        if nombre.endswith(".csv"):
-            df = pd.read_csv(archivo)
+def leer_columnar(archivo, columnas: list = None, memoria_mapeada: bool = True) -> pd.DataFrame:
+    """
+    Read a Parquet / Arrow IPC / Feather file, keeping only `columnas`.
+    Column projection happens in pyarrow, so unselected columns are never decoded.
+    """
+    nombre = nombre_archivo(archivo)
+    with _fuente_arrow(archivo, memoria_mapeada) as fuente:
+        if nombre.endswith(".parquet"):
+            tabla = pq.read_table(fuente, columns=columnas, memory_map=memoria_mapeada)
+        elif nombre.endswith(".feather"):
+            tabla = feather.read_table(fuente, columns=columnas, memory_map=memoria_mapeada)
+        else:
+            tabla = _abrir_ipc(fuente).read_all()
+            if columnas:
+                tabla = tabla.select(columnas)
+
+        # split_blocks lets numeric columns without nulls reuse the Arrow buffers
+        return tabla.to_pandas(split_blocks=True)
+
+
+# =========================================================
+# 📂 FILE LOADER
+# =========================================================
+def _clave_archivo(archivo, *opciones):
+    """Cache key for an upload (content hash) or a local path (path + size + mtime)."""
+    if isinstance(archivo, (str, Path)):
+        # Local columnar files are already memory-mapped: caching them gains nothing
+        if es_columnar(archivo):
+            return None
+        return clave_ruta(archivo, *opciones)
+    return clave_bytes(archivo.getbuffer(), nombre_archivo(archivo), *opciones)
+
+
+# =========================================================
+# 🧠 MEMORY OPTIMIZATION OF LOADED FRAMES
+# =========================================================
+def registrar_informe_memoria(df: pd.DataFrame, informe: pd.DataFrame, clave: str = None):
+    """Keep the optimizer report of `df` (shown in the general information page)."""
+    st.session_state.informe_memoria = {"version": version_df(df), "informe": informe}
+    if clave is not None:
+        st.session_state.setdefault("informes_memoria", {})[clave] = informe
+
+
+def optimizar_cargado(df: pd.DataFrame, clave: str = None) -> pd.DataFrame:
+    """Run the memory optimizer over a freshly loaded frame and record its report."""
+    with st.spinner("🧠 Optimizando tipos de datos..."):
+        df, informe = optimizar_memoria(df)
+    registrar_informe_memoria(df, informe, clave)
+    return df
+
+
+def _avisar_carga_parcial(limite_memoria_mb: float, filas: int):
+    st.warning(
+        f"⚠️ Se alcanzó el límite de memoria ({limite_memoria_mb} MB). "
+        f"Se cargaron solo las primeras {filas} filas."
+    )
+
+
+def cargar_archivo(archivo, streaming: bool = False, tamano_bloque: int = TAMANO_BLOQUE,
+                   limite_memoria_mb: float = LIMITE_MEMORIA_MB, columnas: list = None,
+                   usar_cache: bool = True):
+    """
+    Load an uploaded file or a local path into a DataFrame.
+    `columnas` restricts the columns read from Parquet / Arrow / Feather files.
+    With `usar_cache`, parsed frames are reused from the on-disk cache.
+    """
+    try:
+        nombre = nombre_archivo(archivo)
+
+        clave = None
+        if usar_cache:
+            opciones = (streaming, tamano_bloque, limite_memoria_mb, tuple(columnas or ()))
+            clave = _clave_archivo(archivo, *opciones)
+            if clave is not None:
+                df, metadatos = leer_cache(clave, con_metadatos=True)
+                if df is not None:
+                    st.caption("♻️ Datos recuperados de la caché local (archivo ya procesado).")
+                    if not metadatos.get("completo", True):
+                        _avisar_carga_parcial(limite_memoria_mb, len(df))
+                    informe = st.session_state.get("informes_memoria", {}).get(clave)
+                    if informe is not None:
+                        registrar_informe_memoria(df, informe)
+                    return df
+
+        completo = True
+        if nombre.endswith(FORMATOS_COLUMNARES):
+            df = leer_columnar(archivo, columnas=columnas)
+        elif nombre.endswith(".csv"):
+            if streaming:
+                barra = st.progress(0.0, text="Leyendo CSV por bloques...")
+
+                def progreso(filas, fraccion):
+                    texto = f"📥 {filas:,} filas leídas".replace(",", ".")
+                    barra.progress(fraccion if fraccion is not None else 0.0, text=texto)
+
+                df, completo = leer_csv_por_bloques(archivo, tamano_bloque, limite_memoria_mb, progreso)
+                barra.empty()
+                if not completo:
+                    _avisar_carga_parcial(limite_memoria_mb, len(df))
+            else:
+                df = pd.read_csv(archivo)
         elif nombre.endswith(".json"):
             df = pd.read_json(archivo)
         elif nombre.endswith(".xlsx"):
             df = pd.read_excel(archivo)
         else:
-            st.error("❌ Formato no soportado. Usa CSV, JSON o XLSX.")
+            st.error("❌ Formato no soportado. Usa CSV, JSON, XLSX, Parquet, Arrow o Feather.")
             return None
 
         if df.empty:
             st.warning("⚠️ El archivo está vacío.")
             return None
 
+        # Local columnar files stay memory-mapped: converting them would copy every column
+        if not (isinstance(archivo, (str, Path)) and es_columnar(archivo)):
+            df = optimizar_cargado(df, clave)
+
+        if clave is not None:
+            # The flag travels with the entry, so a cache hit still warns about a truncated load
+            guardar_cache(clave, df, {"completo": completo})
+
         return df
 
     except Exception as e:
         st.error(f"❌ Error al cargar el archivo: {e}")
         return None
-
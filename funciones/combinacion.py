@@ -0,0 +1,60 @@
+# funciones/combinacion.py
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from funciones.optimizacion import UMBRAL_CATEGORIA, es_texto
+
+# =========================================================
+# ⚙️ NULL HANDLING
+# =========================================================
+# Arrow `null_handling` modes of binary_join_element_wise
+MODOS_NULOS = {
+    "skip": "Omitir nulos",
+    "replace": "Sustituir por un marcador",
+    "emit_null": "Resultado nulo",
+}
+
+
+# =========================================================
+# ➕ VECTORIZED CONCATENATION
+# =========================================================
+def _formato_pandas(tipo: pa.DataType) -> bool:
+    """Floats and booleans: Arrow would write 1.0 as "1" and True as "true", unlike astype(str)."""
+    if pa.types.is_dictionary(tipo):
+        tipo = tipo.value_type
+    return pa.types.is_floating(tipo) or pa.types.is_boolean(tipo)
+
+
+def _como_texto_arrow(serie: pd.Series) -> pa.Array:
+    """Column as an Arrow string array, nulls kept as nulls."""
+    if es_texto(serie) or isinstance(serie.dtype, pd.CategoricalDtype) \
+            or pd.api.types.is_numeric_dtype(serie.dtype) or pd.api.types.is_bool_dtype(serie.dtype):
+        try:
+            arrow = pa.array(serie, from_pandas=True)
+            if not _formato_pandas(arrow.type):
+                return pc.cast(arrow, pa.string())
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            pass   # mixed Python objects: fall back to pandas formatting
+    # Dates, floats, booleans and anything else keep pandas' text formatting
+    return pa.array(serie.astype(str).where(serie.notna()).astype(object), from_pandas=True, type=pa.string())
+
+
+def combinar_columnas(df: pd.DataFrame, columnas: list, separador: str = " ",
+                      nulos: str = "skip", marcador: str = "", categorica="auto",
+                      umbral_categoria: float = UMBRAL_CATEGORIA) -> pd.Series:
+    """
+    Concatenate `columnas` row-wise with `separador` using Arrow's
+    binary_join_element_wise kernel (no per-row Python loop).
+    - `nulos`: "skip" leaves nulls out, "replace" writes `marcador`, "emit_null" yields null
+    - `categorica`: True / False, or "auto" to return a category when the result
+      has few distinct values relative to the rows
+    """
+    arrays = [_como_texto_arrow(df[c]) for c in columnas]
+    opciones = pc.JoinOptions(null_handling=nulos, null_replacement=marcador)
+    unido = pc.binary_join_element_wise(*arrays, pa.scalar(separador), options=opciones)
+
+    if categorica == "auto":
+        categorica = len(unido) > 0 and pc.count_distinct(unido).as_py() / len(unido) <= umbral_categoria
+    if categorica:
+        return pd.Series(pc.dictionary_encode(unido).to_pandas(), index=df.index).astype("category")
+    return pd.Series(pd.arrays.ArrowStringArray(unido), index=df.index)
@@ -0,0 +1,177 @@
+# funciones/cuantiles.py
+import numpy as np
+import pandas as pd
+from funciones.versionado import CacheVersiones, version_df
+
+# =========================================================
+# ⚙️ QUANTILE SKETCH CONFIGURATION
+# =========================================================
+ERROR_RELATIVO = 0.01           # guaranteed relative error of every quantile estimate
+UMBRAL_CUANTILES = 1_000_000    # above this many rows, group statistics default to sketches
+TAMANO_BLOQUE = 1_000_000       # rows added to the sketch per chunk
+MINIMO_INDEXABLE = 1e-300       # smaller magnitudes fall in the zero bucket
+
+_DESPLAZAMIENTO = 1 << 20       # keeps bucket indices of both signs apart from the zero bucket
+_ANCHO = 1 << 22                # room per group in the combined (group, bucket) key
+
+_cache_sketches = CacheVersiones(max_entradas=8)
+
+
+# =========================================================
+# ➗ MERGEABLE MOMENTS
+# =========================================================
+def momentos_bloque(grupos: np.ndarray, valores: np.ndarray, n_grupos: int) -> tuple:
+    """
+    Count, mean and M2 (sum of squared deviations from the mean) of one chunk per group.
+    Deviations are taken from the chunk mean, so large offsets do not cancel out.
+    """
+    n = np.bincount(grupos, minlength=n_grupos)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = np.bincount(grupos, weights=valores, minlength=n_grupos) / n
+    desvio = valores - media[grupos]
+    m2 = np.bincount(grupos, weights=desvio * desvio, minlength=n_grupos)
+    return n, np.nan_to_num(media), m2
+
+
+def fusionar_momentos(n_a, media_a, m2_a, n_b, media_b, m2_b) -> tuple:
+    """Chan et al. (1979) parallel merge of two (count, mean, M2) summaries."""
+    n = n_a + n_b
+    with np.errstate(invalid="ignore", divide="ignore"):
+        delta = media_b - media_a
+        peso_b = np.where(n > 0, n_b / np.maximum(n, 1), 0.0)
+        media = media_a + delta * peso_b
+        m2 = m2_a + m2_b + delta * delta * n_a * peso_b
+    return n, media, m2
+
+
+# =========================================================
+# 📐 MERGEABLE PER-GROUP QUANTILE SKETCH
+# =========================================================
+class SketchCuantiles:
+    """
+    Log-bucket quantile sketch (DDSketch, Masson et al., 2019) for many groups at once.
+    Each value falls in the bucket ceil(log_gamma(|x|)); any quantile is returned
+    with relative error <= `error_relativo`. Only non-empty (group, bucket) counts
+    are stored, so memory depends on the spread of the data, not on the row count.
+    Sketches with the same error are mergeable, and every percentile is read from
+    the same buckets without rescanning the data.
+    """
+
+    def __init__(self, n_grupos: int, error_relativo: float = ERROR_RELATIVO):
+        self.n_grupos = n_grupos
+        self.error_relativo = error_relativo
+        self.gamma = (1 + error_relativo) / (1 - error_relativo)
+        self.log_gamma = np.log(self.gamma)
+        self.claves = np.empty(0, dtype=np.int64)    # sorted group * _ANCHO + ordered bucket
+        self.cuentas = np.empty(0, dtype=np.int64)
+        self.n = np.zeros(n_grupos, dtype=np.int64)
+        self.medias = np.zeros(n_grupos)
+        self.m2 = np.zeros(n_grupos)         # sum of squared deviations from the group mean
+        self.minimo = np.full(n_grupos, np.inf)
+        self.maximo = np.full(n_grupos, -np.inf)
+
+    # -----------------------------
+    # Building
+    # -----------------------------
+    def _cubetas(self, valores: np.ndarray) -> np.ndarray:
+        """Bucket index of each value, ordered like the values themselves."""
+        magnitud = np.abs(valores)
+        no_cero = magnitud > MINIMO_INDEXABLE
+        indices = np.zeros(len(valores), dtype=np.int64)
+        indices[no_cero] = np.ceil(np.log(magnitud[no_cero]) / self.log_gamma).astype(np.int64) + _DESPLAZAMIENTO
+        return np.where(valores < 0, -indices, indices)
+
+    def _fusionar_cuentas(self, claves: np.ndarray, cuentas: np.ndarray):
+        claves = np.concatenate([self.claves, claves])
+        cuentas = np.concatenate([self.cuentas, cuentas])
+        self.claves, inversa = np.unique(claves, return_inverse=True)
+        self.cuentas = np.bincount(inversa, weights=cuentas, minlength=len(self.claves)).astype(np.int64)
+
+    def agregar(self, grupos: np.ndarray, valores: np.ndarray):
+        """Add `valores` belonging to the groups `grupos` (NaN values are ignored)."""
+        valores = np.asarray(valores, dtype=np.float64)
+        grupos = np.asarray(grupos, dtype=np.int64)
+        validos = ~np.isnan(valores) & (grupos >= 0)
+        valores, grupos = valores[validos], grupos[validos]
+        if not len(valores):
+            return
+
+        self.n, self.medias, self.m2 = fusionar_momentos(
+            self.n, self.medias, self.m2, *momentos_bloque(grupos, valores, self.n_grupos)
+        )
+        extremos = pd.Series(valores).groupby(grupos).agg(["min", "max"])
+        posiciones = extremos.index.to_numpy()
+        self.minimo[posiciones] = np.minimum(self.minimo[posiciones], extremos["min"].to_numpy())
+        self.maximo[posiciones] = np.maximum(self.maximo[posiciones], extremos["max"].to_numpy())
+
+        claves, cuentas = np.unique(grupos * _ANCHO + self._cubetas(valores) + (_ANCHO >> 1), return_counts=True)
+        self._fusionar_cuentas(claves, cuentas)
+
+    def fusionar(self, otro: "SketchCuantiles"):
+        """Merge a sketch built over other rows of the same groups."""
+        if otro.n_grupos != self.n_grupos or otro.error_relativo != self.error_relativo:
+            raise ValueError("Solo se pueden fusionar sketches con los mismos grupos y el mismo error.")
+        self.n, self.medias, self.m2 = fusionar_momentos(self.n, self.medias, self.m2, otro.n, otro.medias, otro.m2)
+        np.minimum(self.minimo, otro.minimo, out=self.minimo)
+        np.maximum(self.maximo, otro.maximo, out=self.maximo)
+        self._fusionar_cuentas(otro.claves, otro.cuentas)
+
+    @property
+    def memoria_bytes(self) -> int:
+        return int(self.claves.nbytes + self.cuentas.nbytes + self.n.nbytes + self.medias.nbytes
+                   + self.m2.nbytes + self.minimo.nbytes + self.maximo.nbytes)
+
+    # -----------------------------
+    # Queries
+    # -----------------------------
+    def _valor_cubeta(self, ordenadas: np.ndarray) -> np.ndarray:
+        """Representative value of each ordered bucket index."""
+        signo = np.sign(ordenadas)
+        exponente = np.abs(ordenadas) - _DESPLAZAMIENTO
+        valor = 2 * np.power(self.gamma, exponente.astype(np.float64)) / (self.gamma + 1)
+        return np.where(signo == 0, 0.0, signo * valor)
+
+    def cuantil(self, q: float) -> np.ndarray:
+        """Estimated q-quantile (0 <= q <= 1) of every group; NaN for empty groups."""
+        resultado = np.full(self.n_grupos, np.nan)
+        if not len(self.claves):
+            return resultado
+        acumulado = np.cumsum(self.cuentas)
+        base = np.concatenate([[0], np.cumsum(self.n)[:-1]])
+        con_datos = self.n > 0
+        rango = np.floor(q * (self.n[con_datos] - 1))
+        posiciones = np.searchsorted(acumulado, base[con_datos] + rango, side="right")
+        ordenadas = self.claves[posiciones] % _ANCHO - (_ANCHO >> 1)
+        # The exact min / max are known: clamp the bucket estimate to them
+        resultado[con_datos] = np.clip(
+            self._valor_cubeta(ordenadas), self.minimo[con_datos], self.maximo[con_datos]
+        )
+        return resultado
+
+    def media(self) -> np.ndarray:
+        return np.where(self.n > 0, self.medias, np.nan)
+
+    def desviacion(self) -> np.ndarray:
+        """Sample standard deviation (ddof=1), like pandas."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            varianza = np.where(self.n > 1, self.m2 / (self.n - 1), np.nan)
+        return np.sqrt(np.maximum(varianza, 0))
+
+
+def construir_sketch(serie: pd.Series, grupos: np.ndarray, n_grupos: int,
+                     error_relativo: float = ERROR_RELATIVO, tamano_bloque: int = TAMANO_BLOQUE) -> SketchCuantiles:
+    """One streaming pass over `serie`, chunk by chunk, into a per-group sketch."""
+    sketch = SketchCuantiles(n_grupos, error_relativo)
+    for inicio in range(0, len(serie), tamano_bloque):
+        bloque = serie.iloc[inicio:inicio + tamano_bloque].to_numpy(dtype=np.float64, na_value=np.nan)
+        sketch.agregar(grupos[inicio:inicio + tamano_bloque], bloque)
+    return sketch
+
+
+def sketch_por_grupo(df: pd.DataFrame, claves: list, valor, grupos: np.ndarray, n_grupos: int,
+                     error_relativo: float = ERROR_RELATIVO) -> SketchCuantiles:
+    """Per-group sketch of `valor`, cached per frame version so new percentiles need no rescan."""
+    return _cache_sketches.obtener(
+        (version_df(df), tuple(claves), valor, error_relativo),
+        lambda: construir_sketch(df[valor], grupos, n_grupos, error_relativo),
+    )
@@ -0,0 +1,114 @@
+# funciones/duplicados.py
+import numpy as np
+import pandas as pd
+from funciones.versionado import CacheVersiones, version_df
+
+# =========================================================
+# ⚙️ DUPLICATE ENGINE CONFIGURATION
+# =========================================================
+TAMANO_BLOQUE = 500_000   # rows hashed per chunk
+MAX_GRUPOS_INFORME = 20   # largest duplicate groups listed in the report
+CONSERVAR = {
+    "first": "Primera aparición",
+    "last": "Última aparición",
+    "none": "Ninguna (eliminar todas las copias)",
+}
+
+_cache_hashes = CacheVersiones(max_entradas=8)
+_cache_informes = CacheVersiones(max_entradas=8)
+
+
+# =========================================================
+# #️⃣ ROW HASHES
+# =========================================================
+def hash_filas(df: pd.DataFrame, columnas: list = None, tamano_bloque: int = TAMANO_BLOQUE) -> np.ndarray:
+    """
+    One uint64 hash per row over `columnas` (all columns when None), computed chunk
+    by chunk and cached per frame version and column subset. Equal rows get equal
+    hashes; with 64 bits, a false match among 100M distinct rows has probability ~3e-4.
+    """
+    columnas = list(df.columns) if not columnas else list(columnas)
+
+    def calcular():
+        hashes = np.empty(len(df), dtype=np.uint64)
+        datos = df[columnas]
+        for inicio in range(0, len(df), tamano_bloque):
+            bloque = datos.iloc[inicio:inicio + tamano_bloque]
+            hashes[inicio:inicio + len(bloque)] = pd.util.hash_pandas_object(bloque, index=False).to_numpy()
+        return hashes
+
+    return _cache_hashes.obtener((version_df(df), tuple(columnas)), calcular)
+
+
+def grupos_filas(df: pd.DataFrame, columnas: list = None) -> np.ndarray:
+    """
+    Exact duplicate-group id of every row over `columnas`, numbered by first appearance.
+    Hashes only pick the candidates (rows sharing a hash with another row); their real
+    key values are then compared, so hash collisions (random ones, or mixed object
+    values such as 1 and "1" that hash alike) never merge rows. Cached per frame version.
+    """
+    columnas = list(df.columns) if not columnas else list(columnas)
+
+    def calcular():
+        ids, unicos = pd.factorize(hash_filas(df, columnas))
+        candidatas = np.flatnonzero(np.bincount(ids, minlength=len(unicos))[ids] > 1)
+        if not len(candidatas):
+            return ids.astype(np.int64)
+        datos = df[columnas].iloc[candidatas]
+        exactos = datos.groupby([datos.iloc[:, i] for i in range(datos.shape[1])],
+                                dropna=False, sort=False, observed=True).ngroup().to_numpy()
+        ids = ids.astype(np.int64)
+        ids[candidatas] = len(unicos) + exactos
+        return pd.factorize(ids)[0].astype(np.int64)
+
+    return _cache_hashes.obtener((version_df(df), tuple(columnas), "grupos"), calcular)
+
+
+# =========================================================
+# 🔎 DUPLICATE REPORT
+# =========================================================
+def informe_duplicados(df: pd.DataFrame, columnas: list = None) -> dict:
+    """
+    Duplicate groups of `df` over `columnas`, from the exact group ids:
+    - grupos: number of groups with more than one row
+    - filas_duplicadas: rows beyond the first of each group
+    - filas_en_grupos: rows that belong to some duplicate group
+    - mayores: the largest groups (key values of the first row + size)
+    """
+    columnas = list(df.columns) if not columnas else list(columnas)
+
+    def calcular():
+        ids = grupos_filas(df, columnas)
+        tamanos = np.bincount(ids)
+        repetidos = np.flatnonzero(tamanos > 1)
+
+        mayores = pd.DataFrame(columns=columnas + ["Repeticiones"])
+        if len(repetidos):
+            k = min(MAX_GRUPOS_INFORME, len(repetidos))
+            seleccion = repetidos[np.argpartition(-tamanos[repetidos], k - 1)[:k]]
+            seleccion = seleccion[np.argsort(-tamanos[seleccion], kind="stable")]
+            # Groups are numbered by first appearance: a row opens a new
+            # group exactly when its id exceeds every previous id
+            nuevas = np.ones(len(ids), dtype=bool)
+            nuevas[1:] = ids[1:] > np.maximum.accumulate(ids)[:-1]
+            primeras = np.flatnonzero(nuevas)
+            mayores = df[columnas].iloc[primeras[seleccion]].reset_index(drop=True)
+            mayores["Repeticiones"] = tamanos[seleccion]
+
+        return {
+            "grupos": int(len(repetidos)),
+            "filas_duplicadas": int(tamanos[repetidos].sum() - len(repetidos)),
+            "filas_en_grupos": int(tamanos[repetidos].sum()),
+            "mayores": mayores,
+        }
+
+    return _cache_informes.obtener((version_df(df), tuple(columnas)), calcular)
+
+
+# =========================================================
+# 🧹 ROWS TO KEEP
+# =========================================================
+def mascara_conservar(df: pd.DataFrame, columnas: list = None, conservar: str = "first") -> np.ndarray:
+    """Boolean mask of rows kept when dropping duplicates over `columnas` ("first", "last" or "none")."""
+    ids = pd.Series(grupos_filas(df, columnas))
+    return ~ids.duplicated(keep=False if conservar == "none" else conservar).to_numpy()
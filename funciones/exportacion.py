@@ -1,22 +1,250 @@
+# funciones/exportacion.py
+import hashlib
+import io
+import os
+import tempfile
+import time
 from datetime import datetime
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+from openpyxl import Workbook
+from funciones.versionado import CacheVersiones, version_df
 
-def exportar_datos(df):
-    """
-    Exporta el DataFrame a CSV o XLSX con nombre y timestamp.
-    """
-    formato = input("¿En qué formato deseas exportar? (csv/xlsx): ").lower()
-    salida = input("Introduce el nombre base del archivo de salida (sin extensión): ")
-    
-    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    nombre_final = f"{salida}_{timestamp}"
-    
-    pdf = df.toPandas()
-    
-    if formato == "csv":
-        pdf.to_csv(f"{nombre_final}.csv", index=False)
-        print(f"✅ Datos exportados a {nombre_final}.csv")
-    elif formato == "xlsx":
-        pdf.to_excel(f"{nombre_final}.xlsx", index=False)
-        print(f"✅ Datos exportados a {nombre_final}.xlsx")
-    else:
-        print("⚠️ Formato no soportado. Usa 'csv' o 'xlsx'.")
+# =========================================================
+# ⚙️ EXPORT CONFIGURATION
+# =========================================================
+DIRECTORIO_EXPORTACION = Path(os.environ.get("AEMG_EXPORT_DIR", Path(tempfile.gettempdir()) / "aemg_exportaciones"))
+EDAD_MAXIMA_EXPORTACION_HORAS = 6   # leftover export files older than this are removed
+FILAS_POR_BLOQUE = 100_000          # rows serialized at once
+MAX_FILAS_XLSX = 1_048_575          # Excel sheet limit, header row excluded
+
+FORMATOS_EXPORTACION = {
+    "csv": "CSV",
+    "csv.gz": "CSV comprimido (gzip)",
+    "csv.zst": "CSV comprimido (zstd)",
+    "parquet": "Parquet",
+    "xlsx": "Excel (xlsx)",
+}
+MIME_EXPORTACION = {
+    "csv": "text/csv",
+    "csv.gz": "application/gzip",
+    "csv.zst": "application/zstd",
+    "parquet": "application/vnd.apache.parquet",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# Download payloads written on demand, one file per frame version and format
+_cache_descargas = CacheVersiones(max_entradas=8, al_descartar=lambda ruta: ruta.unlink(missing_ok=True))
+
+
+# =========================================================
+# ✍️ CHUNKED WRITERS
+# =========================================================
+def _bloques(df: pd.DataFrame, filas_por_bloque: int):
+    for inicio in range(0, len(df), filas_por_bloque):
+        yield df.iloc[inicio:inicio + filas_por_bloque]
+
+
+def _escribir_csv(df: pd.DataFrame, ruta: Path, compresion: str, filas_por_bloque: int, progreso):
+    # Arrow streams compress on the fly: the CSV text never exists whole in memory
+    salida = pa.CompressedOutputStream(str(ruta), compresion) if compresion else pa.OSFile(str(ruta), "wb")
+    with salida, io.TextIOWrapper(salida, encoding="utf-8", newline="") as texto:
+        if not len(df):
+            df.to_csv(texto, index=False)
+        for i, bloque in enumerate(_bloques(df, filas_por_bloque)):
+            bloque.to_csv(texto, index=False, header=i == 0)
+            progreso(i * filas_por_bloque + len(bloque))
+
+
+def _escribir_parquet(df: pd.DataFrame, ruta: Path, filas_por_bloque: int, progreso):
+    # One schema for the whole frame, so every row group is written with the same types
+    esquema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(str(ruta), esquema) as escritor:
+        for i, bloque in enumerate(_bloques(df, filas_por_bloque)):
+            escritor.write_table(pa.Table.from_pandas(bloque, schema=esquema, preserve_index=False))
+            progreso(i * filas_por_bloque + len(bloque))
+        if not len(df):
+            escritor.write_table(esquema.empty_table())
+
+
+def _escribir_xlsx(df: pd.DataFrame, ruta: Path, filas_por_bloque: int, progreso):
+    # write_only workbooks stream rows to disk instead of keeping every cell object
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet("datos")
+    hoja.append([str(c) for c in df.columns])
+    for i, bloque in enumerate(_bloques(df, filas_por_bloque)):
+        bloque = bloque.copy()
+        for c in bloque.columns:
+            if isinstance(bloque[c].dtype, pd.DatetimeTZDtype):
+                bloque[c] = bloque[c].dt.tz_localize(None)   # Excel has no time zones
+        valores = bloque.astype(object).where(bloque.notna(), None)
+        for fila in valores.itertuples(index=False, name=None):
+            hoja.append(fila)
+        progreso(i * filas_por_bloque + len(bloque))
+    libro.save(ruta)
+
+
+def limpiar_exportaciones(edad_maxima_horas: float = EDAD_MAXIMA_EXPORTACION_HORAS):
+    """Remove export files left behind by old sessions."""
+    if not DIRECTORIO_EXPORTACION.exists():
+        return
+    limite = time.time() - edad_maxima_horas * 3600
+    for ruta in DIRECTORIO_EXPORTACION.iterdir():
+        try:
+            if ruta.stat().st_mtime < limite:
+                ruta.unlink()
+        except OSError:
+            pass
+
+
+def escribir_exportacion(df: pd.DataFrame, formato: str, columnas: list = None, max_filas: int = None,
+                         filas_por_bloque: int = FILAS_POR_BLOQUE, progreso=None) -> Path:
+    """
+    Write `df` (optionally a subset of columns and the first `max_filas` rows) to a
+    temporary file in `formato`, chunk by chunk:
+    - csv / csv.gz / csv.zst: pandas CSV text, compressed as it is written
+    - parquet: one row group per chunk through a ParquetWriter
+    - xlsx: openpyxl write-only workbook (capped at MAX_FILAS_XLSX rows)
+    `progreso(filas_escritas, filas_totales)` is called after every chunk, if given.
+    Returns the path of the written file.
+    """
+    if formato not in FORMATOS_EXPORTACION:
+        raise ValueError(f"Formato no soportado: {formato}")
+    datos = df[list(columnas)] if columnas else df
+    if formato == "xlsx":
+        max_filas = min(max_filas or MAX_FILAS_XLSX, MAX_FILAS_XLSX)
+    if max_filas:
+        datos = datos.iloc[:max_filas]
+
+    DIRECTORIO_EXPORTACION.mkdir(parents=True, exist_ok=True)
+    limpiar_exportaciones()
+    descriptor, nombre = tempfile.mkstemp(suffix=f".{formato}", dir=DIRECTORIO_EXPORTACION)
+    os.close(descriptor)
+    ruta = Path(nombre)
+
+    def avance(filas):
+        if progreso is not None:
+            progreso(filas, len(datos))
+
+    try:
+        if formato.startswith("csv"):
+            compresion = {"csv.gz": "gzip", "csv.zst": "zstd"}.get(formato)
+            _escribir_csv(datos, ruta, compresion, filas_por_bloque, avance)
+        elif formato == "parquet":
+            _escribir_parquet(datos, ruta, filas_por_bloque, avance)
+        else:
+            _escribir_xlsx(datos, ruta, filas_por_bloque, avance)
+    except Exception:
+        ruta.unlink(missing_ok=True)
+        raise
+    return ruta
+
+
+# =========================================================
+# ⬇️ ON-DEMAND DOWNLOADS
+# =========================================================
+def archivo_descarga(df: pd.DataFrame, formato: str = "csv", posiciones: np.ndarray = None) -> Path:
+    """
+    Export file of `df` in `formato`, written on first request and cached per frame
+    version. With `posiciones`, the rows taken in that order are exported; the
+    reordered frame is built only when the file has to be written.
+    """
+    huella = None if posiciones is None else \
+        hashlib.blake2b(np.ascontiguousarray(posiciones), digest_size=16).hexdigest()
+    clave = (version_df(df), formato, huella)
+
+    def escribir():
+        datos = df if posiciones is None else df.take(posiciones).reset_index(drop=True)
+        return escribir_exportacion(datos, formato)
+
+    ruta = _cache_descargas.obtener(clave, escribir)
+    if not ruta.exists():
+        # Removed by limpiar_exportaciones: write it again
+        _cache_descargas.descartar(clave)
+        ruta = _cache_descargas.obtener(clave, escribir)
+    return ruta
+
+
+def boton_descarga(df: pd.DataFrame, etiqueta: str, nombre_archivo: str, formato: str = "csv",
+                   key: str = None, help: str = None, posiciones: np.ndarray = None):
+    """
+    Download button whose payload is produced only when it is clicked
+    (Streamlit calls `data` lazily), so reruns never serialize the frame.
+    `posiciones` exports a reordered / filtered view of `df` without building it on reruns.
+    """
+    st.download_button(
+        label=etiqueta,
+        data=lambda: archivo_descarga(df, formato, posiciones).read_bytes(),
+        file_name=nombre_archivo,
+        mime=MIME_EXPORTACION[formato],
+        key=key,
+        help=help,
+    )
+
+
+# =========================================================
+# 🖥️ EXPORT PAGE
+# =========================================================
+def _descartar_exportacion():
+    anterior = st.session_state.pop("exportacion", None)
+    if anterior is not None:
+        Path(anterior["ruta"]).unlink(missing_ok=True)
+
+
+def exportar_datos(df: pd.DataFrame):
+    """
+    Streamlit page to export the current data as CSV (plain, gzip or zstd), Parquet or XLSX.
+    The file is written in chunks to a temporary file, read from disk only when the
+    download is clicked, and kept (and reused) while the data and options do not change.
+    """
+    st.subheader("📤 Exportar datos")
+
+    formato = st.selectbox("Formato", list(FORMATOS_EXPORTACION), format_func=FORMATOS_EXPORTACION.get,
+                           key="export_formato")
+    columnas = st.multiselect("Columnas a exportar (vacío = todas)", list(df.columns), key="export_columnas")
+    max_filas = st.number_input("Máximo de filas (0 = todas)", min_value=0, value=0, step=100_000,
+                                key="export_max_filas")
+    if formato == "xlsx" and (not max_filas or max_filas > MAX_FILAS_XLSX) and len(df) > MAX_FILAS_XLSX:
+        st.warning(f"⚠️ Excel admite como máximo {MAX_FILAS_XLSX:,} filas por hoja: "
+                   f"se exportarán solo las primeras.".replace(",", "."))
+    nombre_base = st.text_input("Nombre del archivo (sin extensión)", value="datos_exportados", key="export_nombre")
+
+    clave = (version_df(df), formato, tuple(columnas), int(max_filas))
+    exportacion = st.session_state.get("exportacion")
+    if exportacion is not None and (exportacion["clave"] != clave or not Path(exportacion["ruta"]).exists()):
+        _descartar_exportacion()
+        exportacion = None
+
+    if exportacion is None and st.button("📦 Generar archivo", key="export_generar"):
+        barra = st.progress(0.0)
+
+        def progreso(escritas, total):
+            barra.progress(escritas / total if total else 1.0,
+                           text=f"✍️ {escritas:,} / {total:,} filas".replace(",", "."))
+
+        try:
+            ruta = escribir_exportacion(df, formato, columnas or None, int(max_filas) or None, progreso=progreso)
+        except Exception as e:
+            st.error(f"❌ Error al exportar: {e}")
+            return
+        finally:
+            barra.empty()
+        exportacion = {"clave": clave, "ruta": str(ruta)}
+        st.session_state.exportacion = exportacion
+
+    if exportacion is not None:
+        ruta = Path(exportacion["ruta"])
+        st.success(f"✅ Archivo generado: {ruta.stat().st_size / 1024 ** 2:.1f} MB")
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        # The file is read only when the button is clicked, not on every rerun
+        st.download_button(
+            label=f"💾 Descargar {FORMATOS_EXPORTACION[formato]}",
+            data=ruta.read_bytes,
+            file_name=f"{nombre_base or 'datos_exportados'}_{timestamp}.{formato}",
+            mime=MIME_EXPORTACION[formato],
+            key="export_descargar",
+        )
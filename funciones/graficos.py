@@ -1,10 +1,14 @@
 # funciones/graficos.py
 import streamlit as st
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
 from funciones.analisis import prepare_display_df
+from funciones.agrupacion import sumas_por_categoria, top_n
+from funciones.histogramas import histograma
+from funciones.optimizacion import columnas_categoricas
 
 # =========================
 # 📊 HISTOGRAM
@@ -31,10 +35,17 @@ def graficar_histograma(df: pd.DataFrame):
         help="Número de intervalos en los que se divide el rango de valores."
     )
 
-    # Plot histogram on button click
+    # Plot histogram on button click (bins and KDE are cached per frame version)
     if st.button("Graficar histograma", key="btn_hist"):
+        datos = histograma(df, col, bins)
+        if datos is None:
+            st.info("⚠️ La columna no tiene valores finitos para graficar.")
+            return
+        bordes = datos["bordes"]
         fig, ax = plt.subplots(figsize=(8, 4))
-        sns.histplot(df[col], bins=bins, kde=True, ax=ax, color="#007ACC")
+        ax.bar(bordes[:-1], datos["conteos"], width=np.diff(bordes), align="edge",
+               color="#007ACC", alpha=0.6, edgecolor="white")
+        ax.plot(datos["kde_x"], datos["kde_y"], color="#007ACC")
         ax.set_title(f"Histograma de {col}")
         ax.set_xlabel(col)
         ax.set_ylabel("Frecuencia")
@@ -54,7 +65,7 @@ def graficar_barras(df: pd.DataFrame):
         return
 
     # Select categorical and numeric columns
-    cat_cols = [c for c in df.columns if df[c].dtype == "object" or df[c].dtype.name == "category"]
+    cat_cols = columnas_categoricas(df)
     num_cols = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
 
     if not cat_cols or not num_cols:
@@ -64,18 +75,24 @@ def graficar_barras(df: pd.DataFrame):
     col_cat = st.selectbox("Columna categórica", cat_cols, key="bar_cat")
     col_num = st.selectbox("Columna numérica", num_cols, key="bar_num")
 
-    top_n = st.slider(
+    top = st.slider(
         "Número máximo de categorías a mostrar", 5, 50, 15,
         help="Limita el número de barras visibles para evitar amontonamiento."
     )
+    agrupar_otros = st.checkbox(
+        "Agrupar el resto en «Otros»", value=True, key="bar_otros",
+        help="Suma las categorías que no entran en el top en una sola barra."
+    )
 
-    # Plot bar chart on button click
+    # Plot bar chart on button click (sums per category are cached per column pair)
     if st.button("Graficar barras", key="btn_bar"):
-        grouped = df.groupby(col_cat)[col_num].sum().reset_index().sort_values(col_num, ascending=False)
-        grouped = grouped.head(top_n)
-        
+        grouped = top_n(sumas_por_categoria(df, col_cat, col_num), top, otros="Otros" if agrupar_otros else None)
+        etiquetas = grouped.index.astype(str)
+
         fig, ax = plt.subplots(figsize=(8, 4))
-        sns.barplot(x=col_cat, y=col_num, data=grouped, ax=ax, palette="Blues_d")
+        sns.barplot(x=etiquetas, y=grouped.to_numpy(), ax=ax, palette="Blues_d")
         ax.set_title(f"{col_num} por {col_cat}")
+        ax.set_xlabel(col_cat)
+        ax.set_ylabel(col_num)
         plt.xticks(rotation=45, ha="right")
         st.pyplot(fig)
@@ -0,0 +1,241 @@
+# funciones/historial.py
+import numpy as np
+import pandas as pd
+from funciones.versionado import version_df
+
+# =========================================================
+# ⚙️ HISTORY CONFIGURATION
+# =========================================================
+LIMITE_HISTORIAL_MB = 512   # per-session memory budget for undo data
+MAX_PASOS = 50              # maximum number of undo steps kept
+
+
+def _memoria(obj) -> int:
+    """Deep memory (bytes) of a Series / DataFrame / ndarray, 0 for anything else."""
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True, index=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(deep=True, index=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    return 0
+
+
+def celdas_distintas(anterior: pd.Series, nueva: pd.Series) -> np.ndarray:
+    """Boolean mask of positions whose value changed (two nulls count as equal)."""
+    a, b = anterior.reset_index(drop=True), nueva.reset_index(drop=True)
+    if a.dtype != b.dtype:
+        a, b = a.astype(object), b.astype(object)
+    # Comparisons with pd.NA (nullable and Arrow dtypes) give NA, not False
+    iguales = a.eq(b).fillna(False).astype(bool) | (a.isna() & b.isna())
+    return ~iguales.to_numpy()
+
+
+# =========================================================
+# 🧩 COMPACT DELTAS
+# =========================================================
+class Cambio:
+    """
+    One reversible change. Each delta stores only what is missing from the
+    frame it applies to (dropped columns, removed rows, overwritten cells).
+    """
+    descripcion = "cambio"
+
+    def __init__(self):
+        self.version = None   # version of the frame this change can be undone / redone on
+        self.tamano = 0       # bytes held by the delta
+
+    def deshacer(self, df: pd.DataFrame) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def rehacer(self, df: pd.DataFrame) -> pd.DataFrame:
+        raise NotImplementedError
+
+
+class ColumnasEliminadas(Cambio):
+    """Dropped columns, kept with their original positions."""
+
+    def __init__(self, df: pd.DataFrame, columnas: list):
+        super().__init__()
+        posiciones = {c: df.columns.get_loc(c) for c in columnas}
+        self.columnas = sorted(((posiciones[c], c, df[c]) for c in columnas), key=lambda t: t[0])
+        self.tamano = sum(_memoria(s) for _, _, s in self.columnas)
+        self.descripcion = f"eliminar columna(s) {', '.join(map(str, columnas))}"
+
+    def deshacer(self, df):
+        df = df.copy(deep=False)
+        for pos, nombre, serie in self.columnas:
+            df.insert(pos, nombre, serie)
+        return df
+
+    def rehacer(self, df):
+        return df.drop(columns=[c for _, c, _ in self.columnas])
+
+
+class FilasEliminadas(Cambio):
+    """Removed rows plus a bit-packed mask of the rows that were kept."""
+
+    def __init__(self, df: pd.DataFrame, conservadas: np.ndarray, descripcion: str = "eliminar filas"):
+        super().__init__()
+        conservadas = np.asarray(conservadas, dtype=bool)
+        self.n = len(conservadas)
+        self.mascara = np.packbits(conservadas)
+        self.filas = df[~conservadas]
+        self.tamano = _memoria(self.filas) + self.mascara.nbytes
+        self.descripcion = descripcion
+
+    def _conservadas(self) -> np.ndarray:
+        return np.unpackbits(self.mascara, count=self.n).astype(bool)
+
+    def deshacer(self, df):
+        conservadas = self._conservadas()
+        unidas = pd.concat([df, self.filas])
+        # Positions in the original frame of the kept rows followed by the removed ones
+        origen = np.concatenate([np.flatnonzero(conservadas), np.flatnonzero(~conservadas)])
+        return unidas.iloc[np.argsort(origen, kind="stable")]
+
+    def rehacer(self, df):
+        return df[self._conservadas()]
+
+
+class ValoresReemplazados(Cambio):
+    """Overwritten cells of one column: positions with their old and new values."""
+
+    def __init__(self, columna, anterior: pd.Series, nueva: pd.Series):
+        super().__init__()
+        self.columna = columna
+        self.descripcion = f"reemplazar valores en '{columna}'"
+        distintas = celdas_distintas(anterior, nueva)
+        self.celdas = int(distintas.sum())
+        if anterior.dtype != nueva.dtype:
+            # The dtype changed: a positional delta could not restore it, keep whole columns
+            self.posiciones = None
+            self.anteriores, self.nuevos = anterior, nueva
+        else:
+            self.posiciones = np.flatnonzero(distintas)
+            self.anteriores = anterior.iloc[self.posiciones]
+            self.nuevos = nueva.iloc[self.posiciones]
+        self.tamano = _memoria(self.anteriores) + _memoria(self.nuevos) + _memoria(self.posiciones)
+
+    def _aplicar(self, df, valores):
+        df = df.copy(deep=False)
+        if self.posiciones is None:
+            df[self.columna] = valores.to_numpy() if not valores.index.equals(df.index) else valores
+        else:
+            serie = df[self.columna].copy()
+            serie.iloc[self.posiciones] = valores.to_numpy()
+            df[self.columna] = serie
+        return df
+
+    def deshacer(self, df):
+        return self._aplicar(df, self.anteriores)
+
+    def rehacer(self, df):
+        return self._aplicar(df, self.nuevos)
+
+
+class ColumnaAgregada(Cambio):
+    """A new (or overwritten) column; its data is kept only while undone."""
+
+    def __init__(self, df_anterior: pd.DataFrame, nombre):
+        super().__init__()
+        self.nombre = nombre
+        self.anterior = df_anterior[nombre] if nombre in df_anterior.columns else None
+        self.serie = None
+        self.tamano = _memoria(self.anterior)
+        self.descripcion = f"crear columna '{nombre}'"
+
+    def deshacer(self, df):
+        self.serie = df[self.nombre]
+        self.tamano = _memoria(self.anterior) + _memoria(self.serie)
+        if self.anterior is None:
+            return df.drop(columns=[self.nombre])
+        df = df.copy(deep=False)
+        df[self.nombre] = self.anterior
+        return df
+
+    def rehacer(self, df):
+        df = df.copy(deep=False)
+        df[self.nombre] = self.serie
+        self.serie = None
+        self.tamano = _memoria(self.anterior)
+        return df
+
+
+# =========================================================
+# ↩️ UNDO / REDO HISTORY
+# =========================================================
+class HistorialCambios:
+    """
+    Multi-step undo / redo over compact deltas, bounded by a memory budget.
+    Each entry remembers the version of the frame it applies to; if the frame
+    was replaced by something else (new upload, sort...), the history is dropped.
+    """
+
+    def __init__(self, limite_mb: float = LIMITE_HISTORIAL_MB, max_pasos: int = MAX_PASOS):
+        self.limite_bytes = limite_mb * 1024 ** 2
+        self.max_pasos = max_pasos
+        self.deshacer_pila = []
+        self.rehacer_pila = []
+
+    # -----------------------------
+    # State
+    # -----------------------------
+    @property
+    def memoria_bytes(self) -> int:
+        return sum(c.tamano for c in self.deshacer_pila) + sum(c.tamano for c in self.rehacer_pila)
+
+    def vaciar(self):
+        self.deshacer_pila.clear()
+        self.rehacer_pila.clear()
+
+    def sincronizar(self, df: pd.DataFrame) -> bool:
+        """Drop the history if `df` is not the frame it was recorded on. Returns False if dropped."""
+        pila = self.deshacer_pila or self.rehacer_pila
+        if pila and pila[-1].version != version_df(df):
+            self.vaciar()
+            return False
+        return True
+
+    def puede_deshacer(self) -> bool:
+        return bool(self.deshacer_pila)
+
+    def puede_rehacer(self) -> bool:
+        return bool(self.rehacer_pila)
+
+    # -----------------------------
+    # Operations
+    # -----------------------------
+    def registrar(self, cambio: Cambio, df_resultante: pd.DataFrame):
+        """Record `cambio`, which produced `df_resultante`."""
+        cambio.version = version_df(df_resultante)
+        self.deshacer_pila.append(cambio)
+        self.rehacer_pila.clear()
+        self._ajustar_presupuesto()
+
+    def deshacer(self, df: pd.DataFrame) -> pd.DataFrame:
+        cambio = self.deshacer_pila.pop()
+        nuevo = cambio.deshacer(df)
+        self._mover(cambio, nuevo, self.rehacer_pila, self.deshacer_pila)
+        return nuevo
+
+    def rehacer(self, df: pd.DataFrame) -> pd.DataFrame:
+        cambio = self.rehacer_pila.pop()
+        nuevo = cambio.rehacer(df)
+        self._mover(cambio, nuevo, self.deshacer_pila, self.rehacer_pila)
+        return nuevo
+
+    def _mover(self, cambio: Cambio, nuevo: pd.DataFrame, destino: list, origen: list):
+        # Every pending entry now applies to the frame just produced
+        version = version_df(nuevo)
+        cambio.version = version
+        destino.append(cambio)
+        if origen:
+            origen[-1].version = version
+
+    def _ajustar_presupuesto(self):
+        """Forget the oldest undo steps until the history fits the budget."""
+        while self.deshacer_pila and (
+            len(self.deshacer_pila) > self.max_pasos or self.memoria_bytes > self.limite_bytes
+        ):
+            self.deshacer_pila.pop(0)
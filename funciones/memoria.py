@@ -0,0 +1,280 @@
+# funciones/memoria.py
+import os
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.ipc as ipc
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from funciones.versionado import (
+    descartar_de_caches, memoria_caches, recortar_caches, transferir_version, version_df,
+)
+
+# =========================================================
+# ⚙️ MEMORY BUDGETS
+# =========================================================
+# Budgets and spill directory can be overridden with environment variables
+LIMITE_SESION_MB = float(os.environ.get("AEMG_MEMORIA_SESION_MB", 2048))
+LIMITE_GLOBAL_MB = float(os.environ.get("AEMG_MEMORIA_GLOBAL_MB", 8192))
+DIRECTORIO_VOLCADOS = Path(os.environ.get("AEMG_SPILL_DIR", Path(tempfile.gettempdir()) / "aemg_volcados"))
+EDAD_MAXIMA_SESION_HORAS = 2   # sessions not seen for this long are forgotten (and their files removed)
+
+# Session-state entries that may hold a DataFrame, besides the working dataset
+CLAVES_FRAMES = ("grouped_df", "grouped_stats", "filas_filtradas")
+
+_sesiones = {}   # session id -> {"visto": timestamp, "frames": {name: _Entrada}, "otros": bytes, "caches": bytes}
+_cerrojo = threading.Lock()
+
+
+class _Entrada:
+    """Accounting of one frame held by a session."""
+
+    def __init__(self, version: int, residentes: int, ruta: Path = None):
+        self.version = version
+        self.residentes = residentes   # bytes in process memory (memory-mapped pages excluded)
+        self.ruta = ruta               # spill file, None while the frame lives in memory
+        self.ultimo_uso = time.time()
+
+
+# =========================================================
+# 📏 MEASURING
+# =========================================================
+def memoria_frame(df: pd.DataFrame) -> int:
+    """Deep memory of a frame in bytes."""
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+def _punteros(serie: pd.Series) -> list:
+    """Addresses of the data buffers behind a column."""
+    valores = serie.array
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return [valores.codes.__array_interface__["data"][0]]
+    if hasattr(valores, "__arrow_array__"):
+        arrow = valores.__arrow_array__()
+        trozos = arrow.chunks if isinstance(arrow, pa.ChunkedArray) else [arrow]
+        return [b.address for t in trozos for b in t.buffers() if b is not None]
+    return [np.asarray(valores).__array_interface__["data"][0]]
+
+
+def _bytes_fuera_del_mapa(df: pd.DataFrame, inicio: int, fin: int) -> int:
+    """Memory of the columns that were copied out of the map [inicio, fin) when converting."""
+    total = 0
+    for c in df.columns:
+        serie = df[c]
+        try:
+            mapeada = all(inicio <= p < fin for p in _punteros(serie))
+        except (TypeError, ValueError, pa.ArrowException):
+            mapeada = False
+        if not mapeada:
+            total += int(serie.memory_usage(deep=True, index=False))
+    return total
+
+
+# =========================================================
+# 💽 SPILL TO DISK
+# =========================================================
+def volcar(df: pd.DataFrame):
+    """
+    Write `df` to an uncompressed Arrow file and return (memory-mapped frame, path,
+    resident bytes). Columns without nulls are read straight from the mapping, so
+    their pages belong to the OS page cache and are loaded back only when touched.
+    The new frame keeps the version of `df`: cached results remain valid.
+    """
+    DIRECTORIO_VOLCADOS.mkdir(parents=True, exist_ok=True)
+    ruta = DIRECTORIO_VOLCADOS / f"{uuid.uuid4().hex}.arrow"
+    try:
+        tabla = pa.Table.from_pandas(df, preserve_index=True)
+        # A single record batch lets every column convert back without concatenating chunks
+        feather.write_feather(tabla, ruta, compression="uncompressed", chunksize=max(len(df), 1))
+        del tabla
+
+        mapa = pa.memory_map(str(ruta), "r")
+        tamano = mapa.size()
+        inicio = mapa.read_buffer(tamano).address
+        mapa.seek(0)
+        mapeado = ipc.open_file(mapa).read_all().to_pandas(split_blocks=True)
+    except Exception:
+        ruta.unlink(missing_ok=True)
+        raise
+
+    transferir_version(df, mapeado)
+    return mapeado, ruta, _bytes_fuera_del_mapa(mapeado, inicio, inicio + tamano)
+
+
+def _borrar_volcado(entrada: _Entrada):
+    if entrada.ruta is not None:
+        try:
+            # Still-mapped frames keep working: the data lives until the mapping is closed
+            entrada.ruta.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+
+# =========================================================
+# 🧮 SESSION ACCOUNTING
+# =========================================================
+def id_sesion() -> str:
+    contexto = get_script_run_ctx()
+    return contexto.session_id if contexto is not None else "local"
+
+
+def frames_sesion() -> dict:
+    """DataFrames held in this session's state, by name ("dataset" is the working frame)."""
+    frames = {}
+    dataset = st.session_state.get("dataset")
+    if dataset is not None and dataset.df is not None:
+        frames["dataset"] = dataset.df
+    for clave in CLAVES_FRAMES:
+        valor = st.session_state.get(clave)
+        if isinstance(valor, pd.DataFrame):
+            frames[clave] = valor
+    return frames
+
+
+def _reemplazar(nombre: str, df: pd.DataFrame):
+    if nombre == "dataset":
+        st.session_state.dataset.actualizar(df)
+    else:
+        st.session_state[nombre] = df
+
+
+def _purgar_sesiones(ahora: float):
+    """Forget sessions not seen for EDAD_MAXIMA_SESION_HORAS (caller holds the lock)."""
+    for sesion, datos in list(_sesiones.items()):
+        if ahora - datos["visto"] > EDAD_MAXIMA_SESION_HORAS * 3600:
+            for entrada in datos["frames"].values():
+                _borrar_volcado(entrada)
+            del _sesiones[sesion]
+
+
+def _total(datos: dict) -> int:
+    """Frames + undo history + cached results derived from the session's frames."""
+    return sum(e.residentes for e in datos["frames"].values()) + datos["otros"] + datos.get("caches", 0)
+
+
+def _total_global() -> int:
+    """
+    Every session's frames and history, plus all result caches once (they are
+    process-wide: a cache entry shared by two sessions is not counted twice).
+    """
+    return sum(_total(d) - d.get("caches", 0) for d in _sesiones.values()) + memoria_caches()
+
+
+def uso_memoria() -> dict:
+    """Accounted bytes of this session and of all sessions, with both budgets."""
+    with _cerrojo:
+        datos = _sesiones.get(id_sesion())
+        return {
+            "sesion": _total(datos) if datos else 0,
+            "global": _total_global(),
+            "caches": datos.get("caches", 0) if datos else 0,
+            "limite_sesion": int(LIMITE_SESION_MB * 1024 ** 2),
+            "limite_global": int(LIMITE_GLOBAL_MB * 1024 ** 2),
+            "volcados": sorted(n for n, e in datos["frames"].items() if e.ruta is not None) if datos else [],
+        }
+
+
+def gestionar_memoria(activos=()) -> list:
+    """
+    Account every frame held by this session and enforce the budgets.
+    Result caches count too: entries derived from this session's frames towards
+    the session, all of them towards the global budget.
+    While the session is over LIMITE_SESION_MB, or all sessions together are over
+    LIMITE_GLOBAL_MB, this session's frames are spilled to disk and memory-mapped
+    back: idle ones (not in `activos`) first, least recently used first, then the
+    active ones. If that is not enough, the least recently used cached results
+    are evicted. Other sessions enforce the global budget on their own next rerun.
+    Returns the names of the frames spilled in this call.
+    """
+    ahora = time.time()
+    sesion = id_sesion()
+    frames = frames_sesion()
+    historial = st.session_state.get("historial")
+
+    with _cerrojo:
+        _purgar_sesiones(ahora)
+        datos = _sesiones.setdefault(sesion, {"visto": ahora, "frames": {}, "otros": 0})
+        datos["visto"] = ahora
+        # Undo deltas have their own budget: they are counted but never spilled
+        datos["otros"] = historial.memoria_bytes if historial is not None else 0
+        datos["caches"] = memoria_caches({version_df(df) for df in frames.values()})
+
+        for nombre in list(datos["frames"]):
+            if nombre not in frames:
+                _borrar_volcado(datos["frames"].pop(nombre))
+        for nombre, df in frames.items():
+            entrada = datos["frames"].get(nombre)
+            if entrada is None or entrada.version != version_df(df):
+                if entrada is not None:
+                    _borrar_volcado(entrada)
+                entrada = datos["frames"][nombre] = _Entrada(version_df(df), memoria_frame(df))
+            if nombre in activos:
+                entrada.ultimo_uso = ahora
+
+        limite_sesion = LIMITE_SESION_MB * 1024 ** 2
+        limite_global = LIMITE_GLOBAL_MB * 1024 ** 2
+        total_sesion = _total(datos)
+        total_global = _total_global()
+        candidatos = sorted(
+            (n for n, e in datos["frames"].items() if e.ruta is None),
+            key=lambda n: (n in activos, datos["frames"][n].ultimo_uso),
+        )
+
+    volcados = []
+    for nombre in candidatos:
+        if total_sesion <= limite_sesion and total_global <= limite_global:
+            break
+        df = frames[nombre]
+        try:
+            mapeado, ruta, residentes = volcar(df)
+        except Exception:
+            continue   # frames Arrow cannot serialise stay in memory
+        _reemplazar(nombre, mapeado)
+        # Result caches may hold the same frame (grouped results): drop it there too,
+        # otherwise spilling frees nothing while the accounting says it did
+        descartar_de_caches(df)
+        with _cerrojo:
+            entrada = datos["frames"][nombre]
+            liberados = entrada.residentes - residentes
+            entrada.residentes, entrada.ruta = residentes, ruta
+        total_sesion -= liberados
+        total_global -= liberados
+        volcados.append(nombre)
+
+    # Still over budget: evict cached results, this session's own ones for its budget
+    versiones = {version_df(df) for df in frames_sesion().values()}
+    if total_sesion > limite_sesion:
+        liberados = recortar_caches(total_sesion - limite_sesion, versiones)
+        total_global -= liberados
+    if total_global > limite_global:
+        recortar_caches(total_global - limite_global)
+    with _cerrojo:
+        datos["caches"] = memoria_caches(versiones)
+    return volcados
+
+
+# =========================================================
+# 🖥️ MEMORY PANEL
+# =========================================================
+def panel_memoria():
+    """Sidebar summary of this session's memory against both budgets."""
+    uso = uso_memoria()
+
+    def mb(n):
+        return f"{n / 1024 ** 2:,.0f}".replace(",", ".")
+
+    with st.sidebar.expander("🧠 Memoria", expanded=False):
+        st.progress(min(uso["sesion"] / uso["limite_sesion"], 1.0),
+                    text=f"Sesión: {mb(uso['sesion'])} / {mb(uso['limite_sesion'])} MB")
+        st.progress(min(uso["global"] / uso["limite_global"], 1.0),
+                    text=f"Servidor: {mb(uso['global'])} / {mb(uso['limite_global'])} MB")
+        if uso["caches"]:
+            st.caption(f"🗃️ Resultados en caché: {mb(uso['caches'])} MB")
+        if uso["volcados"]:
+            st.caption("💽 En disco (memoria mapeada): " + ", ".join(uso["volcados"]))
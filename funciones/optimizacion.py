@@ -0,0 +1,194 @@
+# funciones/optimizacion.py
+import numpy as np
+import pandas as pd
+
+# =========================================================
+# ⚙️ DEFAULT PARAMETERS
+# =========================================================
+# Maximum ratio of distinct values / rows for a text column to become "category"
+UMBRAL_CATEGORIA = 0.5
+# Minimum share of values that must parse as dates to convert a text column
+UMBRAL_FECHAS = 0.95
+
+
+# =========================================================
+# 🔢 NUMERIC DOWNCAST
+# =========================================================
+def reducir_numerica(serie: pd.Series) -> pd.Series:
+    """Downcast a numeric column to the smallest lossless int/float width."""
+    if pd.api.types.is_bool_dtype(serie.dtype):
+        return serie
+
+    if pd.api.types.is_integer_dtype(serie.dtype):
+        signo = "unsigned" if len(serie) and serie.min() >= 0 else "integer"
+        return pd.to_numeric(serie, downcast=signo)
+
+    if pd.api.types.is_float_dtype(serie.dtype):
+        valores = serie.to_numpy()
+        # Float columns holding only whole numbers (ints with NaN) stay float,
+        # but may still shrink to float32 when the conversion is exact
+        reducida = valores.astype(np.float32)
+        with np.errstate(invalid="ignore"):
+            exacta = (reducida.astype(valores.dtype) == valores) | np.isnan(valores)
+        if exacta.all():
+            return pd.Series(reducida, index=serie.index, name=serie.name)
+
+    return serie
+
+
+# =========================================================
+# 🔤 TEXT COLUMNS
+# =========================================================
+def es_texto(serie: pd.Series) -> bool:
+    """True for text columns, whether stored as object or as a pandas string dtype."""
+    return serie.dtype == "object" or isinstance(serie.dtype, pd.StringDtype)
+
+
+def columnas_categoricas(df: pd.DataFrame) -> list:
+    """Columns usable as group / category keys: text (object or string dtype) and categorical."""
+    return [
+        c for c in df.columns
+        if es_texto(df[c]) or isinstance(df[c].dtype, pd.CategoricalDtype)
+    ]
+
+
+def tipo_texto_compacto():
+    """Most compact string dtype available: Arrow-backed when pyarrow is installed."""
+    try:
+        import pyarrow  # noqa: F401
+        return pd.StringDtype("pyarrow")
+    except ImportError:
+        return pd.StringDtype()
+
+
+def es_columna_fecha(serie: pd.Series, muestra: int = 500) -> bool:
+    """Guess whether a text column holds dates by parsing a small sample."""
+    valores = serie.dropna()
+    if valores.empty:
+        return False
+    valores = valores.head(muestra)
+    if not valores.map(lambda x: isinstance(x, str)).all():
+        return False
+    # Pure numbers ("2024", "15") are not treated as dates
+    if pd.to_numeric(valores, errors="coerce").notna().any():
+        return False
+    fechas = pd.to_datetime(valores, errors="coerce", format="mixed")
+    return fechas.notna().mean() >= UMBRAL_FECHAS
+
+
+def plan_tipos_texto(df: pd.DataFrame, umbral_categoria: float = UMBRAL_CATEGORIA) -> dict:
+    """
+    Decide, from a representative block, how each text column should be stored.
+    Returns {column: "fecha" | "categoria"}; columns not listed stay as they are.
+    """
+    plan = {}
+    for c in df.columns:
+        if not es_texto(df[c]):
+            continue
+        if es_columna_fecha(df[c]):
+            plan[c] = "fecha"
+        elif len(df) and df[c].nunique(dropna=True) / len(df) <= umbral_categoria:
+            plan[c] = "categoria"
+    return plan
+
+
+# =========================================================
+# 🧮 BLOCK OPTIMIZATION
+# =========================================================
+def reducir_tipos(df: pd.DataFrame, plan_texto: dict = None) -> pd.DataFrame:
+    """
+    Return a copy of `df` with compact dtypes:
+    - numeric columns downcast to the smallest exact width
+    - text columns converted following `plan_texto` (computed when not given)
+    """
+    if plan_texto is None:
+        plan_texto = plan_tipos_texto(df)
+
+    resultado = {}
+    for c in df.columns:
+        serie = df[c]
+        accion = plan_texto.get(c)
+        if accion == "fecha":
+            serie = pd.to_datetime(serie, errors="coerce", format="mixed")
+        elif accion == "categoria":
+            serie = serie.astype("category")
+        elif pd.api.types.is_numeric_dtype(serie.dtype):
+            serie = reducir_numerica(serie)
+        resultado[c] = serie
+
+    return pd.DataFrame(resultado, index=df.index)
+
+
+def unir_bloques(bloques: list) -> pd.DataFrame:
+    """
+    Concatenate optimized blocks keeping categorical columns categorical
+    (each block has its own categories, so they are unified first).
+    """
+    if not bloques:
+        return pd.DataFrame()
+    if len(bloques) == 1:
+        return bloques[0].reset_index(drop=True)
+
+    columnas_cat = [
+        c for c in bloques[0].columns
+        if all(isinstance(b[c].dtype, pd.CategoricalDtype) for b in bloques)
+    ]
+    for c in columnas_cat:
+        categorias = bloques[0][c].cat.categories.append(
+            [b[c].cat.categories for b in bloques[1:]]
+        ).unique()
+        for b in bloques:
+            b[c] = b[c].cat.set_categories(categorias)
+
+    return pd.concat(bloques, ignore_index=True)
+
+
+# =========================================================
+# 🧠 MEMORY OPTIMIZER
+# =========================================================
+def _memoria_columna(serie: pd.Series) -> int:
+    return int(serie.memory_usage(deep=True, index=False))
+
+
+def optimizar_memoria(df: pd.DataFrame, umbral_categoria: float = UMBRAL_CATEGORIA):
+    """
+    Shrink every column of `df` measuring its deep memory before and after:
+    - numeric columns downcast to the smallest exact width
+    - low-cardinality text to category, date-like text to datetime
+    - remaining text to the compact string dtype
+    A conversion is kept only if it actually saves memory (dates are always kept).
+    Returns (optimized frame, per-column report).
+    """
+    plan_texto = plan_tipos_texto(df, umbral_categoria)
+    compacto = tipo_texto_compacto()
+
+    resultado, filas = {}, []
+    for c in df.columns:
+        serie = df[c]
+        antes = _memoria_columna(serie)
+        accion = plan_texto.get(c)
+        if accion == "fecha":
+            nueva = pd.to_datetime(serie, errors="coerce", format="mixed")
+        elif accion == "categoria":
+            nueva = serie.astype("category")
+        elif es_texto(serie) and serie.dtype != compacto:
+            nueva = serie.astype(compacto)
+        elif pd.api.types.is_numeric_dtype(serie.dtype):
+            nueva = reducir_numerica(serie)
+        else:
+            nueva = serie
+
+        despues = _memoria_columna(nueva)
+        if despues >= antes and accion != "fecha":
+            nueva, despues = serie, antes
+        resultado[c] = nueva
+        filas.append({
+            "Columna": c,
+            "Tipo antes": str(serie.dtype),
+            "Tipo después": str(nueva.dtype),
+            "Memoria antes (MB)": round(antes / 1024 ** 2, 3),
+            "Memoria después (MB)": round(despues / 1024 ** 2, 3),
+            "Reducción": f"{(1 - despues / antes) * 100:.0f} %" if antes else "0 %",
+        })
+
+    return pd.DataFrame(resultado, index=df.index), pd.DataFrame(filas)
@@ -0,0 +1,45 @@
+# funciones/ordenacion.py
+import numpy as np
+import pandas as pd
+from funciones.versionado import CacheVersiones, version_df
+
+# =========================================================
+# ↕️ SERVER-SIDE SORT ENGINE
+# =========================================================
+# Sort permutations are cached per (frame version, keys, directions, nulls),
+# so re-sorting or paging through a sorted view is just an index lookup.
+_cache_permutaciones = CacheVersiones(max_entradas=16)
+
+
+def permutacion_orden(df: pd.DataFrame, columnas: list, ascendentes=True,
+                      nulos_primero: bool = False) -> np.ndarray:
+    """
+    Row positions of `df` in sorted order (stable multi-key sort).
+    `ascendentes` is a bool or a list of bools, one per column.
+    """
+    columnas = list(columnas)
+    if isinstance(ascendentes, bool):
+        ascendentes = [ascendentes] * len(columnas)
+    ascendentes = [bool(a) for a in ascendentes]
+
+    clave = (version_df(df), tuple(columnas), tuple(ascendentes), nulos_primero)
+
+    def calcular():
+        claves = df[columnas].reset_index(drop=True)
+        ordenado = claves.sort_values(
+            columnas,
+            ascending=ascendentes,
+            kind="stable",
+            na_position="first" if nulos_primero else "last",
+        )
+        posiciones = ordenado.index.to_numpy(dtype=np.intp)
+        posiciones.setflags(write=False)
+        return posiciones
+
+    return _cache_permutaciones.obtener(clave, calcular)
+
+
+def ordenar(df: pd.DataFrame, columnas: list, ascendentes=True, nulos_primero: bool = False) -> pd.DataFrame:
+    """Sorted copy of `df` with a fresh RangeIndex."""
+    posiciones = permutacion_orden(df, columnas, ascendentes, nulos_primero)
+    return df.take(posiciones).reset_index(drop=True)
@@ -0,0 +1,146 @@
+# funciones/perfilado.py
+import numpy as np
+import pandas as pd
+from funciones.versionado import CacheVersiones, version_df
+
+# =========================================================
+# ⚙️ PROFILER CONFIGURATION
+# =========================================================
+UMBRAL_APROXIMADO = 1_000_000   # above this many rows, distinct counts use HyperLogLog
+TAMANO_BLOQUE = 1_000_000       # rows processed per chunk
+PRECISION_HLL = 14              # 2^14 registers -> standard error 1.04 / sqrt(16384) ≈ 0.81 %
+
+_cache_perfiles = CacheVersiones(max_entradas=8)
+
+
+# =========================================================
+# 🔢 HYPERLOGLOG DISTINCT COUNTER
+# =========================================================
+class HyperLogLog:
+    """
+    Approximate distinct counter over 64-bit hashes (Flajolet et al., 2007).
+    Uses 2^p one-byte registers; relative standard error is 1.04 / sqrt(2^p).
+    Sketches with the same precision can be merged.
+    """
+
+    def __init__(self, precision: int = PRECISION_HLL):
+        self.p = precision
+        self.m = 1 << precision
+        self.registros = np.zeros(self.m, dtype=np.uint8)
+
+    @property
+    def error_relativo(self) -> float:
+        return 1.04 / np.sqrt(self.m)
+
+    def agregar_hashes(self, hashes: np.ndarray):
+        """Add uint64 hashes (vectorized)."""
+        if len(hashes) == 0:
+            return
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        bits_resto = 64 - self.p
+        indices = (hashes >> np.uint64(bits_resto)).astype(np.intp)
+        resto = hashes & np.uint64((1 << bits_resto) - 1)
+        # resto < 2^50 is exact in float64, so frexp gives its bit length
+        # (0 for resto == 0); rank = position of the leftmost 1-bit
+        longitud = np.frexp(resto.astype(np.float64))[1]
+        rangos = (bits_resto + 1 - longitud).astype(np.uint8)
+        np.maximum.at(self.registros, indices, rangos)
+
+    def fusionar(self, otro: "HyperLogLog"):
+        np.maximum(self.registros, otro.registros, out=self.registros)
+
+    def estimar(self) -> int:
+        alfa = 0.7213 / (1 + 1.079 / self.m)
+        estimacion = alfa * self.m * self.m / np.sum(np.exp2(-self.registros.astype(np.float64)))
+        vacios = int(np.count_nonzero(self.registros == 0))
+        if estimacion <= 2.5 * self.m and vacios:
+            # Small-range correction (linear counting)
+            estimacion = self.m * np.log(self.m / vacios)
+        return int(round(estimacion))
+
+
+def hash_valores(serie: pd.Series) -> np.ndarray:
+    """Stable uint64 hash of each value (index ignored)."""
+    return pd.util.hash_pandas_object(serie, index=False).to_numpy()
+
+
+# =========================================================
+# 🧠 SINGLE-PASS COLUMN PROFILE
+# =========================================================
+def _admite_rango(serie: pd.Series) -> bool:
+    tipo = serie.dtype
+    if isinstance(tipo, pd.CategoricalDtype):
+        return tipo.ordered
+    return (
+        pd.api.types.is_numeric_dtype(tipo)
+        or pd.api.types.is_datetime64_any_dtype(tipo)
+        or pd.api.types.is_timedelta64_dtype(tipo)
+    )
+
+
+def perfilar_columna(serie: pd.Series, umbral_aproximado: int = UMBRAL_APROXIMADO,
+                     tamano_bloque: int = TAMANO_BLOQUE) -> dict:
+    """
+    Null count, distinct count, min / max and memory of one column,
+    computed chunk by chunk in a single pass over the data.
+    """
+    n = len(serie)
+    con_rango = _admite_rango(serie)
+    categorica = isinstance(serie.dtype, pd.CategoricalDtype)
+    aproximado = n > umbral_aproximado and not categorica and not pd.api.types.is_bool_dtype(serie.dtype)
+
+    nulos = 0
+    minimo = maximo = None
+    hll = HyperLogLog() if aproximado else None
+
+    for inicio in range(0, n, tamano_bloque):
+        bloque = serie.iloc[inicio:inicio + tamano_bloque]
+        faltan = bloque.isna()
+        nulos += int(faltan.sum())
+        if con_rango:
+            b_min, b_max = bloque.min(), bloque.max()
+            if not pd.isna(b_min):
+                minimo = b_min if minimo is None else min(minimo, b_min)
+                maximo = b_max if maximo is None else max(maximo, b_max)
+        if aproximado:
+            hll.agregar_hashes(hash_valores(bloque[~faltan.to_numpy()]))
+
+    if categorica:
+        # Distinct values are the categories actually used: exact and cheap on the codes
+        codigos = serie.cat.codes.to_numpy()
+        unicos = int(np.count_nonzero(np.bincount(codigos[codigos >= 0], minlength=1)))
+    elif aproximado:
+        unicos = hll.estimar()
+    else:
+        unicos = int(serie.nunique(dropna=True))
+
+    return {
+        "nulos": nulos,
+        "unicos": unicos,
+        "aproximado": aproximado,
+        "error": hll.error_relativo if aproximado else 0.0,
+        "minimo": minimo,
+        "maximo": maximo,
+        "memoria": int(serie.memory_usage(deep=True, index=False)),
+    }
+
+
+def perfilar(df: pd.DataFrame, umbral_aproximado: int = UMBRAL_APROXIMADO) -> pd.DataFrame:
+    """Per-column profile of `df`, cached per frame version."""
+    def calcular():
+        filas = []
+        for i, c in enumerate(df.columns):
+            p = perfilar_columna(df.iloc[:, i], umbral_aproximado)
+            filas.append({
+                "Encabezado": c,
+                "Tipo de datos": str(df.dtypes.iloc[i]),
+                "Nulos": p["nulos"],
+                "Valores únicos": p["unicos"],
+                "Exactitud": f"≈ ±{p['error'] * 100:.1f} %" if p["aproximado"] else "exacto",
+                "Mínimo": "" if p["minimo"] is None else str(p["minimo"]),
+                "Máximo": "" if p["maximo"] is None else str(p["maximo"]),
+                "Memoria (MB)": round(p["memoria"] / 1024 ** 2, 3),
+            })
+        return pd.DataFrame(filas)
+
+    return _cache_perfiles.obtener((version_df(df), umbral_aproximado), calcular)
@@ -0,0 +1,272 @@
+# funciones/pipeline.py
+import numpy as np
+import pandas as pd
+import streamlit as st
+from funciones.combinacion import combinar_columnas
+from funciones.duplicados import mascara_conservar
+from funciones.reemplazo import aplicar_mapeo
+
+# =========================================================
+# ⚙️ LAZY MODE CONFIGURATION
+# =========================================================
+FILAS_MUESTRA = 1000   # rows used to preview a pending plan
+
+
+# =========================================================
+# 🧩 PLAN STEPS
+# =========================================================
+class Paso:
+    """
+    One recorded transformation.
+    - `lee(columnas)`: columns whose values the step depends on
+    - `escribe`: columns the step creates or overwrites
+    - filters return a boolean mask instead of a new frame
+    - `depende_de_filas`: the filter's mask depends on which rows are present,
+      so it must see the frame already filtered by the previous steps
+    """
+    es_filtro = False
+    depende_de_filas = False
+    escribe = frozenset()
+
+    def lee(self, columnas) -> set:
+        return set()
+
+    def aplicar(self, df: pd.DataFrame) -> pd.DataFrame:
+        return df
+
+    def mascara(self, df: pd.DataFrame) -> np.ndarray:
+        raise NotImplementedError
+
+
+class EliminarColumnas(Paso):
+    def __init__(self, columnas):
+        self.columnas = list(columnas)
+        self.descripcion = f"🗑️ Eliminar columna(s): {', '.join(map(str, self.columnas))}"
+
+    def aplicar(self, df):
+        return df.drop(columns=[c for c in self.columnas if c in df.columns])
+
+
+class Reemplazar(Paso):
+    def __init__(self, columna, viejos, nuevos):
+        self.columna, self.viejos, self.nuevos = columna, list(viejos), list(nuevos)
+        self.escribe = frozenset([columna])
+        if len(self.viejos) == 1:
+            self.descripcion = f"♻️ Reemplazar '{self.viejos[0]}' → '{self.nuevos[0]}' en '{columna}'"
+        else:
+            self.descripcion = f"♻️ Reemplazar {len(self.viejos)} valores (tabla) en '{columna}'"
+
+    def lee(self, columnas):
+        return {self.columna}
+
+    def aplicar(self, df):
+        df = df.copy(deep=False)
+        df[self.columna] = aplicar_mapeo(df[self.columna], self.viejos, self.nuevos)[0]
+        return df
+
+
+class CombinarColumnas(Paso):
+    def __init__(self, columnas, nombre, separador, nulos="skip", marcador="", categorica="auto"):
+        self.columnas, self.nombre, self.separador = list(columnas), nombre, separador
+        self.nulos, self.marcador, self.categorica = nulos, marcador, categorica
+        self.escribe = frozenset([nombre])
+        self.descripcion = f"➕ Combinar {', '.join(map(str, self.columnas))} → '{nombre}'"
+
+    def lee(self, columnas):
+        return set(self.columnas)
+
+    def aplicar(self, df):
+        df = df.copy(deep=False)
+        df[self.nombre] = combinar_columnas(
+            df, self.columnas, self.separador, self.nulos, self.marcador, self.categorica
+        )
+        return df
+
+
+class EliminarNulos(Paso):
+    es_filtro = True
+    descripcion = "🧹 Eliminar filas con nulos"
+
+    def lee(self, columnas):
+        return set(columnas)
+
+    def mascara(self, df):
+        return df.notna().all(axis=1).to_numpy()
+
+
+class EliminarDuplicados(Paso):
+    es_filtro = True
+    depende_de_filas = True   # which row is "first" changes once other rows are gone
+
+    def __init__(self, columnas=None, conservar="first"):
+        self.columnas, self.conservar = list(columnas or []), conservar
+        sobre = f" por {', '.join(map(str, self.columnas))}" if self.columnas else ""
+        self.descripcion = f"🧹 Eliminar filas duplicadas{sobre}"
+
+    def lee(self, columnas):
+        return set(self.columnas or columnas)
+
+    def mascara(self, df):
+        return mascara_conservar(df, self.columnas or None, self.conservar)
+
+
+# =========================================================
+# 🧠 PLAN + OPTIMIZER
+# =========================================================
+class PlanTransformacion:
+    """
+    Recorded list of transformations executed later in a single optimized pass:
+    1. Writes whose column is dropped before anyone reads it are skipped
+    2. Column drops move as early as the steps before them allow
+    3. Consecutive row filters are merged into one mask (one row selection)
+    """
+
+    def __init__(self):
+        self.pasos = []
+
+    def agregar(self, paso: Paso):
+        self.pasos.append(paso)
+
+    def quitar_ultimo(self):
+        if self.pasos:
+            self.pasos.pop()
+
+    def vaciar(self):
+        self.pasos.clear()
+
+    # -----------------------------
+    # Optimization
+    # -----------------------------
+    def optimizar(self, columnas) -> list:
+        """Optimized step list for a frame with `columnas`."""
+        pasos = self._quitar_trabajo_muerto(list(self.pasos), columnas)
+        return self._adelantar_eliminaciones(pasos, columnas)
+
+    @staticmethod
+    def _columnas_antes(pasos, columnas) -> list:
+        """Columns present before each step."""
+        actuales = list(columnas)
+        resultado = []
+        for paso in pasos:
+            resultado.append(list(actuales))
+            if isinstance(paso, EliminarColumnas):
+                actuales = [c for c in actuales if c not in paso.columnas]
+            for c in paso.escribe:
+                if c not in actuales:
+                    actuales.append(c)
+        return resultado
+
+    def _quitar_trabajo_muerto(self, pasos, columnas) -> list:
+        antes = self._columnas_antes(pasos, columnas)
+        vivos = []
+        eliminadas_despues = set()   # dropped later without being read in between
+        for paso, cols in zip(reversed(pasos), reversed(antes)):
+            if paso.escribe and paso.escribe <= eliminadas_despues:
+                continue
+            if isinstance(paso, EliminarColumnas):
+                eliminadas_despues |= set(paso.columnas)
+            eliminadas_despues -= paso.lee(cols)
+            vivos.append(paso)
+        return list(reversed(vivos))
+
+    def _adelantar_eliminaciones(self, pasos, columnas) -> list:
+        resultado = []
+        for paso in pasos:
+            if not isinstance(paso, EliminarColumnas):
+                resultado.append(paso)
+                continue
+            # Move the drop before every previous step that neither reads nor writes the columns
+            pos = len(resultado)
+            antes = self._columnas_antes(resultado, columnas)
+            objetivo = set(paso.columnas)
+            while pos > 0:
+                previo = resultado[pos - 1]
+                if previo.lee(antes[pos - 1]) & objetivo or previo.escribe & objetivo:
+                    break
+                pos -= 1
+            resultado.insert(pos, paso)
+        return resultado
+
+    # -----------------------------
+    # Execution
+    # -----------------------------
+    def ejecutar(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Run the optimized plan over `df`."""
+        pasos = self.optimizar(df.columns)
+        i = 0
+        while i < len(pasos):
+            paso = pasos[i]
+            if paso.es_filtro:
+                # Consecutive filters are evaluated on the same frame and applied once;
+                # a row-dependent filter starts a new group on the already filtered frame
+                mascara = paso.mascara(df)
+                while i + 1 < len(pasos) and pasos[i + 1].es_filtro and not pasos[i + 1].depende_de_filas:
+                    i += 1
+                    mascara = mascara & pasos[i].mascara(df)
+                if not mascara.all():
+                    df = df[mascara]
+            elif isinstance(paso, EliminarColumnas):
+                # Consecutive drops become a single projection
+                eliminar = list(paso.columnas)
+                while i + 1 < len(pasos) and isinstance(pasos[i + 1], EliminarColumnas):
+                    i += 1
+                    eliminar += pasos[i].columnas
+                df = EliminarColumnas(eliminar).aplicar(df)
+            else:
+                df = paso.aplicar(df)
+            i += 1
+        return df
+
+    def previsualizar(self, df: pd.DataFrame, filas: int = FILAS_MUESTRA) -> pd.DataFrame:
+        """Plan applied to the first `filas` rows only."""
+        return self.ejecutar(df.head(filas))
+
+
+# =========================================================
+# 🖥️ STREAMLIT HELPERS
+# =========================================================
+def obtener_plan() -> PlanTransformacion:
+    if "plan" not in st.session_state:
+        st.session_state.plan = PlanTransformacion()
+    return st.session_state.plan
+
+
+def modo_diferido() -> bool:
+    return bool(st.session_state.get("modo_diferido", False))
+
+
+def materializar_plan(df: pd.DataFrame) -> pd.DataFrame:
+    """Execute the pending plan (if any) over the full frame and clear it."""
+    plan = obtener_plan()
+    if df is None or not plan.pasos:
+        return df
+    with st.spinner(f"⚙️ Ejecutando plan de {len(plan.pasos)} paso(s)..."):
+        resultado = plan.ejecutar(df)
+    plan.vaciar()
+    return resultado
+
+
+def panel_plan(df: pd.DataFrame):
+    """Sidebar summary of the pending plan with its optimized order."""
+    plan = obtener_plan()
+    with st.sidebar.expander(f"🕒 Plan diferido ({len(plan.pasos)} pasos)", expanded=bool(plan.pasos)):
+        if not plan.pasos:
+            st.caption("Las transformaciones se añadirán aquí y se ejecutarán de una vez.")
+            return
+        st.markdown("**Registrado:**")
+        for n, paso in enumerate(plan.pasos, 1):
+            st.caption(f"{n}. {paso.descripcion}")
+        if df is not None:
+            optimizados = plan.optimizar(df.columns)
+            st.markdown("**Orden optimizado:**")
+            for n, paso in enumerate(optimizados, 1):
+                st.caption(f"{n}. {paso.descripcion}")
+        c1, c2 = st.columns(2)
+        with c1:
+            if st.button("↩️ Quitar último", key="plan_quitar"):
+                plan.quitar_ultimo()
+                st.rerun()
+        with c2:
+            if st.button("🗑️ Vaciar", key="plan_vaciar"):
+                plan.vaciar()
+                st.rerun()
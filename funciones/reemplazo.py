@@ -0,0 +1,153 @@
+# funciones/reemplazo.py
+import io
+import numpy as np
+import pandas as pd
+
+# =========================================================
+# ⚙️ MAPPING TABLE CONFIGURATION
+# =========================================================
+FORMATOS_MAPEO = ["csv", "txt", "tsv", "xlsx"]
+
+
+# =========================================================
+# 📥 MAPPING TABLES
+# =========================================================
+def leer_tabla_mapeo(origen) -> pd.DataFrame:
+    """
+    Read a mapping table (old value → new value) from pasted text or an uploaded file.
+    The first two columns are used; the separator (comma, semicolon, tab...) is detected.
+    Everything is read as text: values are coerced to the column type when applied.
+    """
+    if isinstance(origen, str):
+        tabla = pd.read_csv(io.StringIO(origen), sep=None, engine="python", header=None,
+                            dtype=str, keep_default_na=False, skip_blank_lines=True)
+    elif origen.name.lower().endswith(".xlsx"):
+        tabla = pd.read_excel(origen, header=None, dtype=str, keep_default_na=False)
+    else:
+        tabla = pd.read_csv(origen, sep=None, engine="python", header=None,
+                            dtype=str, keep_default_na=False, skip_blank_lines=True)
+
+    if tabla.shape[1] < 2:
+        raise ValueError("La tabla de correspondencias necesita dos columnas: valor actual y valor nuevo.")
+    tabla = tabla.iloc[:, :2]
+    tabla.columns = ["viejo", "nuevo"]
+    tabla = tabla.apply(lambda c: c.str.strip())
+    # Repeated old values: the last pair wins, as with dict semantics
+    return tabla.drop_duplicates("viejo", keep="last").reset_index(drop=True)
+
+
+# =========================================================
+# 🔁 TYPE COERCION
+# =========================================================
+def convertir_al_tipo(valores: pd.Series, tipo) -> tuple:
+    """
+    Coerce text values to the dtype `tipo`.
+    Returns (converted values, boolean mask of values that could not be converted).
+    For non-text types, empty strings are treated as nulls.
+    """
+    valores = pd.Series(valores, dtype=object).reset_index(drop=True)
+    vacios = valores.isna() | (valores.astype(str) == "")
+    if isinstance(tipo, pd.CategoricalDtype):
+        tipo = tipo.categories.dtype
+
+    if pd.api.types.is_bool_dtype(tipo):
+        texto = valores.astype(str).str.lower()
+        convertidos = texto.map({"true": True, "false": False, "1": True, "0": False,
+                                 "verdadero": True, "falso": False})
+    elif pd.api.types.is_numeric_dtype(tipo):
+        convertidos = pd.to_numeric(valores.where(~vacios), errors="coerce")
+        if pd.api.types.is_integer_dtype(tipo):
+            enteros = convertidos.notna() & (convertidos % 1 != 0)
+            convertidos = convertidos.where(~enteros)
+    elif pd.api.types.is_datetime64_any_dtype(tipo):
+        convertidos = pd.to_datetime(valores.where(~vacios), errors="coerce", format="mixed")
+    else:
+        # Text columns: values are used as typed ("" included)
+        return valores, np.zeros(len(valores), dtype=bool)
+
+    fallidos = (convertidos.isna() & ~vacios).to_numpy()
+    return convertidos, fallidos
+
+
+def tipo_entero_suficiente(tipo, valores: pd.Series):
+    """
+    Integer dtype able to hold `tipo` and every value of `valores`, or None when
+    `tipo` already does (astype would silently wrap out-of-range values).
+    Nullable dtypes stay nullable; values beyond 64 bits fall back to float64.
+    """
+    base = np.dtype(getattr(tipo, "numpy_dtype", tipo))
+    limites = np.iinfo(base)
+    if valores.empty or (limites.min <= valores.min() and valores.max() <= limites.max):
+        return None
+    nuevo = np.result_type(base, np.min_scalar_type(int(valores.min())), np.min_scalar_type(int(valores.max())))
+    if nuevo.kind not in "iu":
+        nuevo = np.dtype(np.float64)
+    if isinstance(tipo, pd.api.extensions.ExtensionDtype):
+        return pd.array(np.empty(0, dtype=nuevo)).dtype
+    return nuevo
+
+
+# =========================================================
+# ⚡ VECTORIZED REPLACEMENT
+# =========================================================
+def _remapear_categorias(serie: pd.Series, viejos: pd.Series, nuevos: pd.Series) -> pd.Series:
+    """Apply the mapping to the categories only, then remap the codes in one take."""
+    categorias = serie.cat.categories
+    posiciones = pd.Index(viejos).get_indexer(categorias)
+    mapeadas = pd.Series(categorias, dtype=object)
+    encontradas = posiciones >= 0
+    mapeadas[encontradas] = nuevos.to_numpy(dtype=object)[posiciones[encontradas]]
+
+    # Several categories may now share a value (or map to null): merge them
+    no_nulas = mapeadas.notna().to_numpy()
+    nuevas_categorias = pd.Index(pd.unique(mapeadas[no_nulas]))
+    traduccion = np.full(len(categorias) + 1, -1, dtype=np.int64)   # last slot: null code
+    traduccion[:-1][no_nulas] = nuevas_categorias.get_indexer(mapeadas[no_nulas])
+    codigos = traduccion[serie.cat.codes.to_numpy()]
+    resultado = pd.Categorical.from_codes(codigos, categories=nuevas_categorias, ordered=serie.cat.ordered)
+    return pd.Series(resultado, index=serie.index, name=serie.name)
+
+
+def aplicar_mapeo(serie: pd.Series, viejos, nuevos) -> tuple:
+    """
+    Replace every value of `serie` found in `viejos` by the matching `nuevos`
+    in one vectorized pass: category remapping for categorical columns, a hash
+    lookup (Index.get_indexer) otherwise. Text inputs are coerced to the column type;
+    new values that do not fit it are kept as text, and integer columns are widened
+    when the new values are out of their range.
+    Returns (new series, list of warnings).
+    """
+    avisos = []
+    tipo = serie.dtype
+    viejos_tipados, viejos_fallidos = convertir_al_tipo(viejos, tipo)
+    nuevos_tipados, nuevos_fallidos = convertir_al_tipo(nuevos, tipo)
+
+    if viejos_fallidos.any():
+        avisos.append(f"{int(viejos_fallidos.sum())} valor(es) a reemplazar no son del tipo {tipo} y se ignoran.")
+    if nuevos_fallidos.any():
+        avisos.append(f"{int(nuevos_fallidos.sum())} valor(es) nuevos no son del tipo {tipo} y se guardan como texto.")
+        nuevos_tipados = nuevos_tipados.astype(object).where(~nuevos_fallidos, pd.Series(nuevos, dtype=object).to_numpy())
+    elif pd.api.types.is_integer_dtype(tipo) and nuevos_tipados.notna().all():
+        ampliado = tipo_entero_suficiente(tipo, nuevos_tipados[~viejos_fallidos & viejos_tipados.notna().to_numpy()])
+        if ampliado is not None:
+            avisos.append(f"Valores nuevos fuera del rango de {tipo}: la columna pasa a {ampliado}.")
+            serie, tipo = serie.astype(ampliado), ampliado
+        nuevos_tipados = nuevos_tipados.astype(tipo)
+
+    validos = ~viejos_fallidos & viejos_tipados.notna().to_numpy()
+    viejos_tipados, nuevos_tipados = viejos_tipados[validos], nuevos_tipados[validos]
+    # Different texts may coerce to the same value ("1" and "1.0"): the last pair wins
+    unicos = ~viejos_tipados.duplicated(keep="last").to_numpy()
+    viejos_tipados, nuevos_tipados = viejos_tipados[unicos], nuevos_tipados[unicos]
+
+    if isinstance(tipo, pd.CategoricalDtype):
+        return _remapear_categorias(serie, viejos_tipados, nuevos_tipados), avisos
+
+    posiciones = pd.Index(viejos_tipados).get_indexer(serie)
+    encontradas = posiciones >= 0
+    if not encontradas.any():
+        return serie, avisos
+    # New value of every row (garbage where not found, masked out below)
+    candidatos = nuevos_tipados.iloc[np.maximum(posiciones, 0)]
+    candidatos.index = serie.index
+    return serie.mask(encontradas, candidatos), avisos
@@ -0,0 +1,387 @@
+# funciones/remoto.py
+import numpy as np
+import pandas as pd
+import sqlalchemy as sa
+import streamlit as st
+from funciones.agrupacion import AGREGACIONES
+from funciones.analisis import CUSTOM_CSS_COMMON, TAMANOS_PAGINA, mostrar_grid_paginado
+from funciones.busqueda import MODOS_BUSQUEDA
+from funciones.optimizacion import columnas_categoricas
+from funciones.reemplazo import convertir_al_tipo
+from funciones.versionado import CacheVersiones
+
+# =========================================================
+# ⚙️ REMOTE DATASET CONFIGURATION
+# =========================================================
+FILAS_MUESTRA_REMOTA = 10_000   # rows pulled locally for pages that are not pushed down
+LIMITE_RESULTADO = 100_000      # maximum rows fetched for one remote result
+OPERADORES = ["=", "≠", ">", "≥", "<", "≤", "contiene", "es nulo", "no es nulo"]
+# Aggregations that translate to portable SQL
+AGREGACIONES_REMOTAS = {a: AGREGACIONES[a] for a in ["count", "sum", "mean", "min", "max", "std", "var", "nunique"]}
+# Native sample std / var by dialect; other dialects use two passes, sum((x - group mean)²)
+FUNCIONES_DISPERSION = {
+    "postgresql": {"std": "stddev_samp", "var": "var_samp"},
+    "mysql": {"std": "stddev_samp", "var": "var_samp"},
+    "mariadb": {"std": "stddev_samp", "var": "var_samp"},
+    "oracle": {"std": "stddev_samp", "var": "var_samp"},
+    "mssql": {"std": "stdev", "var": "var"},
+}
+
+
+# =========================================================
+# 🧱 SQL SOURCES
+# =========================================================
+def fuente_sql(motor, tabla: str, consulta: bool = False):
+    """
+    Selectable for a table name (reflected, "schema.table" allowed) or a SELECT query
+    (wrapped as a subquery; its column names come from a zero-row probe).
+    """
+    tabla = tabla.strip()
+    if consulta:
+        texto = sa.text(tabla)
+        with motor.connect() as conexion:
+            sonda = sa.select(sa.text("*")).select_from(texto.columns().subquery("sonda")).where(sa.false())
+            columnas = list(conexion.execute(sonda).keys())
+        return texto.columns(*[sa.column(c) for c in columnas]).subquery("base")
+    esquema, _, nombre = tabla.rpartition(".")
+    return sa.Table(nombre, sa.MetaData(), schema=esquema or None, autoload_with=motor)
+
+
+# =========================================================
+# 🌐 REMOTE DATASET
+# =========================================================
+class DatasetRemoto:
+    """
+    A table or query that stays in the source database. Filters, grouping,
+    search and sorting are compiled to SQL with SQLAlchemy Core (WHERE,
+    GROUP BY, ORDER BY ... LIMIT) and only the result is fetched.
+    Results are cached per compiled statement while the dataset is connected.
+    """
+
+    def __init__(self, motor, url: str, tabla: str, consulta: bool = False):
+        self.motor = motor
+        self.url = url
+        self.tabla = tabla.strip()
+        self.filtros = []   # (column, operator, value)
+        self._cache = CacheVersiones(max_entradas=32, por_version=False)   # keyed by compiled SQL
+        self.base = fuente_sql(motor, self.tabla, consulta)
+        self.columnas = list(self.base.c.keys())
+        self.muestra = self._leer(sa.select(self.base).limit(FILAS_MUESTRA_REMOTA))
+
+    @property
+    def descripcion(self) -> str:
+        url = sa.engine.make_url(self.url).render_as_string(hide_password=True)
+        return f"{url} — {self.tabla}"
+
+    # -----------------------------
+    # Execution
+    # -----------------------------
+    def _leer(self, sentencia) -> pd.DataFrame:
+        compilada = sentencia.compile(self.motor)
+        clave = (str(compilada), tuple(sorted((k, repr(v)) for k, v in compilada.params.items())))
+
+        def calcular():
+            with self.motor.connect() as conexion:
+                return pd.read_sql_query(sentencia, conexion)
+
+        return self._cache.obtener(clave, calcular)
+
+    def sql(self, sentencia) -> str:
+        """SQL text of a statement, for display."""
+        return str(sentencia.compile(self.motor, compile_kwargs={"literal_binds": True}))
+
+    # -----------------------------
+    # Filters (WHERE)
+    # -----------------------------
+    def _valor(self, columna, valor):
+        """Coerce a text input to the column type seen in the sample."""
+        convertidos, fallidos = convertir_al_tipo(pd.Series([valor]), self.muestra[columna].dtype)
+        v = convertidos.iloc[0]
+        if fallidos[0] or pd.isna(v):
+            raise ValueError(f"'{valor}' no es un valor válido para la columna '{columna}'.")
+        return v.item() if isinstance(v, np.generic) else (v.to_pydatetime() if isinstance(v, pd.Timestamp) else v)
+
+    def condicion(self, columna, operador: str, valor=None):
+        c = self.base.c[columna]
+        if operador == "es nulo":
+            return c.is_(None)
+        if operador == "no es nulo":
+            return c.is_not(None)
+        if operador == "contiene":
+            return sa.cast(c, sa.String).contains(str(valor), autoescape=True)
+        v = self._valor(columna, valor)
+        return {"=": c == v, "≠": c != v, ">": c > v, "≥": c >= v, "<": c < v, "≤": c <= v}[operador]
+
+    def agregar_filtro(self, columna, operador: str, valor=None):
+        self.condicion(columna, operador, valor)   # validates the value
+        self.filtros.append((columna, operador, valor))
+
+    def donde(self, *extra):
+        condiciones = [self.condicion(*f) for f in self.filtros] + list(extra)
+        return sa.and_(sa.true(), *condiciones)
+
+    # -----------------------------
+    # Pushed-down operations
+    # -----------------------------
+    def contar(self, *extra) -> int:
+        sentencia = sa.select(sa.func.count()).select_from(self.base).where(self.donde(*extra))
+        return int(self._leer(sentencia).iloc[0, 0])
+
+    def consulta_agrupada(self, claves: list, valores: list, aggs: list):
+        columnas = [self.base.c[k] for k in claves]
+        expresiones = [sa.func.count().label("filas")]
+        origen = self.base
+        nativas = FUNCIONES_DISPERSION.get(self.motor.dialect.name)
+        dos_pasadas = [v for v in valores if {"std", "var"} & set(aggs)] if nativas is None else []
+        if dos_pasadas:
+            # First pass: group means, joined back to every row (NULL keys form a group too)
+            medias = (
+                sa.select(*columnas, *[sa.func.avg(sa.cast(self.base.c[v], sa.Float)).label(f"__{v}_media")
+                                       for v in dos_pasadas])
+                .where(self.donde())
+                .group_by(*columnas)
+                .subquery("medias")
+            )
+            union = sa.and_(sa.true(), *[self.base.c[k].is_not_distinct_from(medias.c[k]) for k in claves])
+            origen = self.base.join(medias, union)
+        for v in valores:
+            c = self.base.c[v]
+            real = sa.cast(c, sa.Float)
+            for a in aggs:
+                if a == "count":
+                    expresiones.append(sa.func.count(c).label(f"{v}_count"))
+                elif a == "sum":
+                    expresiones.append(sa.func.sum(c).label(f"{v}_sum"))
+                elif a == "mean":
+                    expresiones.append(sa.func.avg(real).label(f"{v}_mean"))
+                elif a in ("std", "var") and nativas is not None:
+                    expresiones.append(getattr(sa.func, nativas[a])(real).label(f"{v}_{a}"))
+                elif a in ("std", "var"):
+                    # Sum of squared deviations, divided by n - 1 once fetched
+                    desvio = real - medias.c[f"__{v}_media"]
+                    expresiones.append(sa.func.sum(desvio * desvio).label(f"{v}_{a}"))
+                elif a == "min":
+                    expresiones.append(sa.func.min(c).label(f"{v}_min"))
+                elif a == "max":
+                    expresiones.append(sa.func.max(c).label(f"{v}_max"))
+                elif a == "nunique":
+                    expresiones.append(sa.func.count(sa.distinct(c)).label(f"{v}_nunique"))
+            if v in dos_pasadas:
+                expresiones.append(sa.func.count(c).label(f"__{v}_n"))
+        return (
+            sa.select(*columnas, *expresiones)
+            .select_from(origen)
+            .where(self.donde())
+            .group_by(*columnas)
+            .order_by(*columnas)
+            .limit(LIMITE_RESULTADO)
+        )
+
+    def agrupar(self, claves: list, valores: list, aggs: list) -> pd.DataFrame:
+        """
+        GROUP BY in the database. Without native sample std / var, they are finished
+        here from the sum of squared deviations and the count of each group.
+        """
+        df = self._leer(self.consulta_agrupada(claves, valores, aggs)).copy()
+        for v in valores:
+            if f"__{v}_n" not in df.columns:
+                continue
+            n = df.pop(f"__{v}_n").astype(float)
+            suma = df[f"{v}_{'std' if 'std' in aggs else 'var'}"].astype(float)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                varianza = suma / (n - 1)
+            varianza[n < 2] = np.nan
+            if "var" in aggs:
+                df[f"{v}_var"] = varianza
+            if "std" in aggs:
+                df[f"{v}_std"] = np.sqrt(varianza)
+        # Single value / single aggregation keeps the plain column name, like the local engine
+        if len(valores) == 1 and len(aggs) == 1:
+            df = df.rename(columns={f"{valores[0]}_{aggs[0]}": valores[0]})
+        return df
+
+    def condicion_busqueda(self, columna, texto: str, modo: str = "literal"):
+        c = sa.cast(self.base.c[columna], sa.String)
+        if modo == "regex":
+            return c.regexp_match(texto)
+        if modo == "sin_mayusculas":
+            return sa.func.lower(c).contains(texto.lower(), autoescape=True)
+        if self.motor.dialect.name == "sqlite":
+            # LIKE is case-insensitive in SQLite: instr() keeps the literal match exact
+            return sa.func.instr(c, texto) > 0
+        return c.contains(texto, autoescape=True)
+
+    def filas(self, orden: list = None, extra: list = (), limite: int = 100, desplazamiento: int = 0) -> pd.DataFrame:
+        """One page of rows: WHERE + ORDER BY + LIMIT / OFFSET in the database."""
+        sentencia = sa.select(self.base).where(self.donde(*extra))
+        if orden:
+            sentencia = sentencia.order_by(*[
+                self.base.c[c].asc() if asc else self.base.c[c].desc() for c, asc in orden
+            ])
+        return self._leer(sentencia.limit(limite).offset(desplazamiento))
+
+
+# =========================================================
+# 🖥️ STREAMLIT HELPERS
+# =========================================================
+def obtener_remoto() -> DatasetRemoto:
+    return st.session_state.get("remoto")
+
+
+def panel_remoto(ds: DatasetRemoto):
+    """Sidebar panel: connection, shared WHERE filters and disconnect button."""
+    with st.sidebar.expander("🌐 Datos remotos", expanded=True):
+        st.caption(ds.descripcion)
+        filas = f"{len(ds.muestra):,}".replace(",", ".")
+        st.caption(
+            f"Agrupar, estadísticas por grupo, búsqueda y ordenación se ejecutan en la base de datos. "
+            f"El resto de páginas usa una muestra de {filas} filas."
+        )
+        columna = st.selectbox("Columna", ds.columnas, key="remoto_filtro_col")
+        operador = st.selectbox("Operador", OPERADORES, key="remoto_filtro_op")
+        valor = st.text_input("Valor", key="remoto_filtro_valor", disabled=operador in ("es nulo", "no es nulo"))
+        if st.button("➕ Añadir filtro", key="remoto_filtro_btn"):
+            try:
+                ds.agregar_filtro(columna, operador, valor)
+            except ValueError as e:
+                st.error(f"❌ {e}")
+        for c, op, v in ds.filtros:
+            st.caption(f"• {c} {op} {'' if op in ('es nulo', 'no es nulo') else repr(v)}")
+        c1, c2 = st.columns(2)
+        with c1:
+            if ds.filtros and st.button("🧹 Quitar filtros", key="remoto_quitar"):
+                ds.filtros.clear()
+                st.rerun()
+        with c2:
+            if st.button("🔌 Desconectar", key="remoto_desconectar"):
+                st.session_state.pop("remoto", None)
+                st.rerun()
+
+
+def _mostrar_resultado(df: pd.DataFrame, ds: DatasetRemoto, sentencia, key_prefix: str):
+    with st.expander("🧾 SQL ejecutado", expanded=False):
+        st.code(ds.sql(sentencia), language="sql")
+    if len(df) >= LIMITE_RESULTADO:
+        st.warning(f"⚠️ El resultado se limitó a {LIMITE_RESULTADO:,} filas.".replace(",", "."))
+    mostrar_grid_paginado(df, key_prefix=key_prefix, custom_css=CUSTOM_CSS_COMMON)
+
+
+def _columnas_por_tipo(ds: DatasetRemoto):
+    cat_cols = columnas_categoricas(ds.muestra)
+    num_cols = [c for c in ds.columnas if pd.api.types.is_numeric_dtype(ds.muestra[c])]
+    return cat_cols, num_cols
+
+
+def agrupar_remoto(ds: DatasetRemoto):
+    """GROUP BY with several keys, values and aggregations, run in the database."""
+    st.subheader("📊 Agrupar datos por columna (remoto)")
+    cat_cols, num_cols = _columnas_por_tipo(ds)
+    if not cat_cols or not num_cols:
+        st.info("⚠️ Necesitas al menos una columna categórica y una numérica.")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        claves = st.multiselect("Selecciona columnas para agrupar", cat_cols, default=cat_cols[:1], key="remoto_group_col")
+    with col2:
+        valores = st.multiselect("Selecciona columnas numéricas", num_cols, default=num_cols[:1], key="remoto_num_col")
+    aggs = st.multiselect(
+        "Agregaciones", list(AGREGACIONES_REMOTAS), default=["count", "mean", "sum"],
+        format_func=AGREGACIONES_REMOTAS.get, key="remoto_group_aggs",
+    )
+
+    if st.button("🔹 Calcular en la base de datos", key="remoto_group_btn"):
+        st.session_state.remoto_agrupado = (claves, valores, aggs)
+
+    seleccion = st.session_state.get("remoto_agrupado")
+    if seleccion and all(seleccion):
+        try:
+            with st.spinner("🌐 Ejecutando GROUP BY en la base de datos..."):
+                resultado = ds.agrupar(*seleccion)
+            _mostrar_resultado(resultado, ds, ds.consulta_agrupada(*seleccion), "remoto_agrupar")
+        except Exception as e:
+            st.error(f"❌ Error en la consulta remota: {e}")
+
+
+def estadisticas_remotas(ds: DatasetRemoto):
+    """Per-group count / mean / std / min / max computed by the database."""
+    st.subheader("📊 Estadísticas por grupo (remoto)")
+    cat_cols, num_cols = _columnas_por_tipo(ds)
+    if not cat_cols or not num_cols:
+        st.info("⚠️ Necesitas al menos una columna categórica y una numérica.")
+        return
+
+    claves = st.multiselect(
+        "Columnas de agrupación (categóricas)", cat_cols, default=cat_cols[:1], key="remoto_stats_col"
+    )
+    valor = st.selectbox("Columna numérica (estadística)", num_cols, key="remoto_stats_num")
+    st.caption("Los percentiles no tienen una traducción SQL portable y no se calculan en modo remoto.")
+
+    if st.button("🔹 Calcular estadísticas por grupo", key="remoto_stats_btn") and claves:
+        st.session_state.remoto_estadisticas = (claves, valor)
+
+    seleccion = st.session_state.get("remoto_estadisticas")
+    if seleccion:
+        claves, valor = seleccion
+        aggs = ["count", "mean", "std", "min", "max"]
+        try:
+            with st.spinner("🌐 Ejecutando GROUP BY en la base de datos..."):
+                resultado = ds.agrupar(claves, [valor], aggs)
+            resultado = resultado.rename(columns={f"{valor}_{a}": a for a in aggs})
+            _mostrar_resultado(resultado, ds, ds.consulta_agrupada(claves, [valor], aggs), "remoto_estadisticas")
+        except Exception as e:
+            st.error(f"❌ Error en la consulta remota: {e}")
+
+
+def buscar_remoto(ds: DatasetRemoto):
+    """Substring / regex search translated to LIKE, instr() or REGEXP."""
+    st.subheader("🔍 Buscar texto parcial en columna (remoto)")
+    columna = st.selectbox("Selecciona columna para buscar texto parcial", ds.columnas, key="remoto_search_col")
+    texto = st.text_input("Texto a buscar", key="remoto_search_text")
+    modo = st.radio("Modo de búsqueda", list(MODOS_BUSQUEDA), format_func=MODOS_BUSQUEDA.get,
+                    horizontal=True, key="remoto_search_modo")
+
+    if st.button("Buscar", key="remoto_search_btn") and texto:
+        st.session_state.remoto_busqueda = (columna, texto, modo)
+
+    seleccion = st.session_state.get("remoto_busqueda")
+    if seleccion:
+        try:
+            condicion = ds.condicion_busqueda(*seleccion)
+            total = ds.contar(condicion)
+            coincidencias = f"{total:,}".replace(",", ".")
+            st.success(f"✅ Coincidencias de '{seleccion[1]}' en '{seleccion[0]}': {coincidencias}")
+            sentencia = sa.select(ds.base).where(ds.donde(condicion)).limit(LIMITE_RESULTADO)
+            _mostrar_resultado(ds.filas(extra=[condicion], limite=LIMITE_RESULTADO), ds, sentencia, "remoto_buscar")
+        except Exception as e:
+            st.error(f"❌ Error en la consulta remota: {e}")
+
+
+def ordenar_remoto(ds: DatasetRemoto):
+    """ORDER BY several keys in the database; only the visible page is fetched."""
+    st.subheader("↕️ Ordenar datos (remoto)")
+    columnas = st.multiselect("Ordenar por", ds.columnas, key="remoto_cols_orden")
+    orden = []
+    if columnas:
+        cols_dir = st.columns(min(len(columnas), 4))
+        for i, c in enumerate(columnas):
+            with cols_dir[i % len(cols_dir)]:
+                sentido = st.selectbox(f"{c}", ["⬆️ Asc", "⬇️ Desc"], key=f"remoto_dir_{c}")
+            orden.append((c, sentido.endswith("Asc")))
+
+    try:
+        total = ds.contar()
+        c1, c2 = st.columns(2)
+        with c1:
+            tamano = st.selectbox("Filas por página", TAMANOS_PAGINA, index=1, key="remoto_tam_pag")
+        paginas = max(1, -(-total // tamano))
+        with c2:
+            pagina = st.number_input(f"Página (de {paginas})", min_value=1, max_value=paginas, value=1,
+                                     key="remoto_pagina")
+        inicio = (int(pagina) - 1) * tamano
+        datos = ds.filas(orden, limite=tamano, desplazamiento=inicio)
+        mostrar_grid_paginado(datos, key_prefix="remoto_ordenar", permitir_orden=False,
+                              permitir_filtro=False, tamano_pagina=tamano, custom_css=CUSTOM_CSS_COMMON)
+        st.caption(f"Filas {inicio + 1 if total else 0}–{min(inicio + tamano, total)} de {total}")
+    except Exception as e:
+        st.error(f"❌ Error en la consulta remota: {e}")
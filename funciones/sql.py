@@ -1,11 +1,254 @@
+import datetime
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import numpy as np
 import streamlit as st
 import pandas as pd
+import sqlalchemy as sa
 from sqlalchemy import create_engine
+from funciones.cache import clave_texto, guardar_cache, leer_cache
+from funciones.carga import LIMITE_MEMORIA_MB, optimizar_cargado, registrar_informe_memoria
+from funciones.optimizacion import plan_tipos_texto, reducir_tipos, unir_bloques
+from funciones.remoto import DatasetRemoto, fuente_sql
+
+# =========================================================
+# ⚙️ CONNECTION POOL AND STREAMING PARAMETERS
+# =========================================================
+TAMANO_POOL = 5             # persistent connections per engine
+MAX_DESBORDE = 5            # extra connections allowed under load
+MAX_MOTORES = 4             # engines (distinct URLs) kept alive at once
+TAMANO_BLOQUE_SQL = 50_000  # rows fetched per chunk in streaming mode
+PARTICIONES_SQL = 8         # ranges read concurrently in parallel mode
+MAX_HILOS = TAMANO_POOL + MAX_DESBORDE   # never more workers than pooled connections
+
+_motores = OrderedDict()
+_bloqueo_motores = threading.Lock()
+
+
+# =========================================================
+# 🔌 POOLED ENGINES
+# =========================================================
+def obtener_motor(url: str):
+    """
+    Engine for `url`, reused across button presses and reruns.
+    Each engine keeps a bounded pool; the least recently used engine is dropped
+    from the cache when more than MAX_MOTORES are open. It is not disposed, since a
+    running read may still use it: its pool is closed when it is garbage-collected.
+    """
+    with _bloqueo_motores:
+        if url in _motores:
+            _motores.move_to_end(url)
+            return _motores[url]
+        try:
+            motor = create_engine(url, pool_size=TAMANO_POOL, max_overflow=MAX_DESBORDE,
+                                  pool_pre_ping=True, pool_recycle=1800)
+        except TypeError:
+            # Dialects whose default pool takes no size arguments (e.g. in-memory SQLite)
+            motor = create_engine(url, pool_pre_ping=True)
+        _motores[url] = motor
+        while len(_motores) > MAX_MOTORES:
+            _motores.popitem(last=False)
+        return motor
+
+
+def cerrar_motores():
+    """Dispose every cached engine."""
+    with _bloqueo_motores:
+        while _motores:
+            _motores.popitem()[1].dispose()
+
+
+# =========================================================
+# 🌊 CHUNKED STREAMING READ
+# =========================================================
+def es_consulta(tabla: str) -> bool:
+    return tabla.strip().lower().startswith(("select", "with"))
+
+
+def leer_sql_por_bloques(motor, tabla: str, tamano_bloque: int = TAMANO_BLOQUE_SQL, max_filas: int = None,
+                         limite_memoria_mb: float = LIMITE_MEMORIA_MB, progreso=None):
+    """
+    Read a table or query in chunks through a server-side cursor (stream_results),
+    downcasting dtypes block by block.
+    - Text column types (dates / categories) are decided on the first chunk
+    - Stops after `max_filas` rows or once the frame exceeds `limite_memoria_mb`
+    - `progreso(filas, memoria_mb)` is called after every chunk, if given
+    Returns (df, completo) where `completo` is False when a cap cut the load.
+    """
+    limite_bytes = limite_memoria_mb * 1024 ** 2
+    bloques, plan_texto = [], None
+    filas = memoria = 0
+    completo = True
+
+    with motor.connect() as conexion:
+        conexion = conexion.execution_options(stream_results=True)
+        if es_consulta(tabla):
+            lector = pd.read_sql_query(tabla, conexion, chunksize=tamano_bloque)
+        else:
+            lector = pd.read_sql_table(tabla.strip(), conexion, chunksize=tamano_bloque)
+
+        for bloque in lector:
+            if max_filas and filas + len(bloque) > max_filas:
+                bloque = bloque.iloc[:max_filas - filas]
+                completo = False
+            if plan_texto is None:
+                plan_texto = plan_tipos_texto(bloque)
+            bloque = reducir_tipos(bloque, plan_texto)
+
+            bloques.append(bloque)
+            filas += len(bloque)
+            memoria += bloque.memory_usage(deep=True).sum()
+
+            if progreso is not None:
+                progreso(filas, memoria / 1024 ** 2)
+            if not completo:
+                break
+            if (max_filas and filas >= max_filas) or memoria >= limite_bytes:
+                # Cap reached on a chunk boundary: the load was cut only if more rows follow
+                completo = next(lector, None) is None
+                break
+
+    return unir_bloques(bloques), completo
+
+
+# =========================================================
+# ⚡ PARTITIONED PARALLEL READ
+# =========================================================
+def columna_particion(fuente):
+    """
+    Partition column of a reflected table: its single-column primary key when it is
+    numeric or a date, otherwise the first integer / date column, then the first float.
+    Queries carry no type information, so None is returned for them.
+    """
+    if not isinstance(fuente, sa.Table):
+        return None
+    clave = list(fuente.primary_key.columns)
+    candidatas = (clave if len(clave) == 1 else []) + list(fuente.columns)
+    for tipos in ((int, datetime.date), (float,)):
+        for c in candidatas:
+            try:
+                tipo = c.type.python_type
+            except NotImplementedError:
+                continue
+            if issubclass(tipo, tipos) and not issubclass(tipo, bool):
+                return c.name
+    return None
+
+
+def limites_particion(minimo, maximo, particiones: int) -> list:
+    """
+    Increasing interior split points dividing [minimo, maximo] into `particiones` ranges.
+    Works for integers, floats, dates / datetimes and dates stored as ISO text.
+    """
+    if isinstance(minimo, (str, datetime.date)):
+        try:
+            inicio, fin = pd.Timestamp(minimo), pd.Timestamp(maximo)
+        except ValueError:
+            raise ValueError("La columna de partición debe ser numérica o de fecha.") from None
+        puntos = pd.to_datetime(np.linspace(inicio.value, fin.value, particiones + 1)[1:-1].astype(np.int64))
+        if isinstance(minimo, str):
+            limites = [str(p) for p in puntos]   # ISO text keeps the column's text ordering
+        elif isinstance(minimo, datetime.datetime):
+            limites = [p.to_pydatetime() for p in puntos]
+        else:
+            limites = [p.date() for p in puntos]
+    else:
+        puntos = np.linspace(minimo, maximo, particiones + 1)[1:-1]
+        limites = np.ceil(puntos).astype(np.int64).tolist() if isinstance(minimo, int) else puntos.tolist()
+    return [v for v in sorted(set(limites)) if minimo < v <= maximo]
+
+
+def condiciones_particion(columna, limites: list) -> list:
+    """
+    WHERE conditions covering every row exactly once: the outer ranges are open-ended
+    (robust to the bounds) and a last partition takes the NULL values.
+    """
+    bordes = [None] + list(limites) + [None]
+    condiciones = []
+    for inferior, superior in zip(bordes[:-1], bordes[1:]):
+        partes = []
+        if inferior is not None:
+            partes.append(columna >= inferior)
+        if superior is not None:
+            partes.append(columna < superior)
+        condiciones.append(sa.and_(*partes) if partes else columna.is_not(None))
+    condiciones.append(columna.is_(None))
+    return condiciones
+
+
+def unir_particiones(bloques: list) -> pd.DataFrame:
+    """
+    Assemble partitions into one frame with a single schema: columns that are
+    all-null in a partition (read as object) take the type seen elsewhere, then
+    every partition is downcast with the same text plan (decided on the largest
+    partition) and concatenated.
+    """
+    no_vacios = [b for b in bloques if len(b)] or bloques[:1]
+    for c in no_vacios[0].columns:
+        referencia = next((b[c].dtype for b in no_vacios if b[c].notna().any()), None)
+        if referencia is None or pd.api.types.is_bool_dtype(referencia):
+            continue
+        if pd.api.types.is_integer_dtype(referencia):
+            referencia = np.float64   # a single read with nulls yields floats too
+        for b in no_vacios:
+            if b[c].dtype != referencia and b[c].isna().all():
+                b[c] = b[c].astype(referencia)
+
+    plan_texto = plan_tipos_texto(max(no_vacios, key=len))
+    return unir_bloques([reducir_tipos(b, plan_texto) for b in no_vacios])
+
+
+def leer_sql_paralelo(motor, tabla: str, columna: str = None, particiones: int = PARTICIONES_SQL,
+                      hilos: int = MAX_HILOS, progreso=None) -> pd.DataFrame:
+    """
+    Read a table or query as `particiones` ranges of `columna` (the primary key when
+    not given) fetched concurrently over pooled connections.
+    Rows come out grouped by partition, i.e. roughly ordered by `columna`.
+    `progreso(hechas, total, filas)` is called as partitions complete, if given.
+    """
+    fuente = fuente_sql(motor, tabla, es_consulta(tabla))
+    columna = columna or columna_particion(fuente)
+    if columna is None:
+        raise ValueError("No se encontró una clave numérica o de fecha: indica la columna de partición.")
+    if columna not in fuente.c:
+        raise ValueError(f"La columna de partición '{columna}' no existe en el origen.")
+
+    col = fuente.c[columna]
+    with motor.connect() as conexion:
+        minimo, maximo = conexion.execute(sa.select(sa.func.min(col), sa.func.max(col))).one()
+    limites = [] if minimo is None else limites_particion(minimo, maximo, particiones)
+    condiciones = condiciones_particion(col, limites)
+
+    def leer(condicion):
+        with motor.connect() as conexion:
+            return pd.read_sql_query(sa.select(fuente).where(condicion), conexion)
+
+    bloques = [None] * len(condiciones)
+    filas = 0
+    with ThreadPoolExecutor(max_workers=max(1, min(hilos, MAX_HILOS, len(condiciones)))) as ejecutor:
+        futuros = {ejecutor.submit(leer, c): i for i, c in enumerate(condiciones)}
+        for hechas, futuro in enumerate(as_completed(futuros), 1):
+            bloques[futuros[futuro]] = futuro.result()
+            filas += len(bloques[futuros[futuro]])
+            if progreso is not None:
+                progreso(hechas, len(condiciones), filas)
+
+    return unir_particiones(bloques)
+
+
+# =========================================================
+# 🖥️ SQL LOAD PAGE
+# =========================================================
+def _avisar_carga_parcial(filas: int):
+    st.warning(f"⚠️ Se alcanzó el límite de filas o de memoria. Se cargaron solo {filas} filas.")
+
 
 def cargar_desde_sql():
     """
     Streamlit interface to load data from a SQL database using pandas + SQLAlchemy.
     Compatible with Streamlit Cloud (no PySpark required).
+    Returns a DataFrame, a DatasetRemoto in remote mode, or None.
     """
     st.subheader("⚙️ Conexión a base de datos SQL")
 
@@ -25,6 +268,52 @@ def cargar_desde_sql():
 
     url = st.text_input("🔗 URL de conexión SQLAlchemy", value=ejemplos_url[tipo_db])
     tabla = st.text_input("📋 Nombre de la tabla o consulta SQL", placeholder="mi_tabla o SELECT * FROM tabla")
+    usar_cache = st.checkbox(
+        "♻️ Reutilizar resultado en caché", value=True, key="sql_cache",
+        help="Si ya se ejecutó la misma consulta sobre la misma URL, se carga la copia local."
+    )
+
+    remoto = st.checkbox(
+        "🌐 Modo remoto (consultas en la base de datos)", value=False, key="sql_remoto",
+        help="No descarga la tabla: agrupar, estadísticas, búsqueda y ordenación se traducen a SQL "
+             "y solo se trae el resultado. El resto de páginas trabaja sobre una muestra."
+    )
+
+    paralelo = st.checkbox(
+        "⚡ Extracción paralela por particiones", value=False, key="sql_paralelo",
+        help="Divide el rango de una columna numérica o de fecha en particiones y las lee a la vez "
+             "con varias conexiones del pool."
+    )
+    with st.expander("⚙️ Opciones de extracción paralela", expanded=False):
+        columna_part = st.text_input(
+            "Columna de partición (vacío = clave primaria)", key="sql_particion", disabled=not paralelo
+        )
+        particiones = st.number_input(
+            "Particiones", min_value=1, max_value=256, value=PARTICIONES_SQL, step=1,
+            key="sql_particiones", disabled=not paralelo
+        )
+        hilos = st.number_input(
+            "Lecturas simultáneas", min_value=1, max_value=MAX_HILOS, value=MAX_HILOS, step=1,
+            key="sql_hilos", disabled=not paralelo
+        )
+
+    streaming = st.checkbox(
+        "🌊 Lectura por bloques (streaming)", value=False, key="sql_streaming", disabled=paralelo,
+        help="Lee el resultado por bloques con un cursor del servidor, mostrando el progreso."
+    ) and not paralelo
+    with st.expander("⚙️ Opciones de lectura por bloques", expanded=False):
+        tamano_bloque = st.number_input(
+            "Filas por bloque", min_value=1_000, max_value=1_000_000, value=TAMANO_BLOQUE_SQL,
+            step=10_000, key="sql_bloque", disabled=not streaming
+        )
+        max_filas = st.number_input(
+            "Máximo de filas (0 = sin límite)", min_value=0, value=0, step=100_000,
+            key="sql_max_filas", disabled=not streaming
+        )
+        limite_memoria_mb = st.number_input(
+            "Límite de memoria (MB)", min_value=64, max_value=65_536, value=LIMITE_MEMORIA_MB,
+            step=256, key="sql_limite_mb", disabled=not streaming
+        )
 
     if st.button("🚀 Cargar datos desde SQL"):
         if not url or not tabla:
@@ -32,12 +321,63 @@ def cargar_desde_sql():
             return None
 
         try:
-            engine = create_engine(url)
+            if remoto:
+                ds = DatasetRemoto(obtener_motor(url.strip()), url.strip(), tabla, consulta=es_consulta(tabla))
+                st.success(f"🌐 Conectado en modo remoto. Columnas: {len(ds.columnas)} — "
+                           f"muestra local de {len(ds.muestra)} filas")
+                st.dataframe(ds.muestra.head())
+                return ds
 
-            if tabla.strip().lower().startswith("select"):
+            opciones = (tamano_bloque, max_filas, limite_memoria_mb) if streaming else ()
+            if paralelo:
+                opciones = ("paralelo", columna_part.strip(), int(particiones))
+            clave = clave_texto(url.strip(), tabla.strip(), *opciones)
+            if usar_cache:
+                df, metadatos = leer_cache(clave, con_metadatos=True)
+                if df is not None:
+                    if not metadatos.get("completo", True):
+                        _avisar_carga_parcial(len(df))
+                    informe = st.session_state.get("informes_memoria", {}).get(clave)
+                    if informe is not None:
+                        registrar_informe_memoria(df, informe)
+                    st.success(f"♻️ Datos recuperados de la caché local. Filas: {len(df)} — Columnas: {len(df.columns)}")
+                    st.dataframe(df.head())
+                    return df
+
+            engine = obtener_motor(url.strip())
+            completo = True
+
+            if paralelo:
+                barra = st.progress(0.0)
+
+                def progreso(hechas, total, filas):
+                    texto = f"{filas:,}".replace(",", ".")
+                    barra.progress(hechas / total, text=f"⚡ Particiones {hechas}/{total} — {texto} filas")
+
+                df = leer_sql_paralelo(engine, tabla, columna_part.strip() or None,
+                                       int(particiones), int(hilos), progreso)
+                barra.empty()
+            elif streaming:
+                contador = st.empty()
+
+                def progreso(filas, memoria_mb):
+                    texto = f"{filas:,}".replace(",", ".")
+                    contador.caption(f"📥 {texto} filas leídas — {memoria_mb:,.1f} MB")
+
+                df, completo = leer_sql_por_bloques(
+                    engine, tabla, int(tamano_bloque), int(max_filas) or None, limite_memoria_mb, progreso
+                )
+                contador.empty()
+                if not completo:
+                    _avisar_carga_parcial(len(df))
+            elif es_consulta(tabla):
                 df = pd.read_sql_query(tabla, engine)
             else:
-                df = pd.read_sql_table(tabla, engine)
+                df = pd.read_sql_table(tabla.strip(), engine)
+
+            df = optimizar_cargado(df, clave)
+            # The flag travels with the entry, so a cache hit still warns about a truncated load
+            guardar_cache(clave, df, {"completo": completo})
 
             st.success(f"✅ Datos cargados correctamente. Filas: {len(df)} — Columnas: {len(df.columns)}")
             st.dataframe(df.head())
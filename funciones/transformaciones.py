@@ -1,8 +1,80 @@
 # funciones/transformaciones.py
+import re
 import streamlit as st
 import pandas as pd
-from st_aggrid import AgGrid, GridOptionsBuilder
-from funciones.analisis import prepare_display_df, base_grid_from_df, CUSTOM_CSS_COMMON, calc_height_for_rows
+from funciones.analisis import mostrar_grid_paginado, CUSTOM_CSS_COMMON
+from funciones.busqueda import MODOS_BUSQUEDA, buscar_en_columna
+from funciones.combinacion import MODOS_NULOS, combinar_columnas
+from funciones.exportacion import boton_descarga
+from funciones.duplicados import CONSERVAR, MAX_GRUPOS_INFORME, informe_duplicados, mascara_conservar
+from funciones.reemplazo import FORMATOS_MAPEO, aplicar_mapeo, leer_tabla_mapeo
+from funciones.historial import (
+    HistorialCambios, ColumnasEliminadas, FilasEliminadas, ValoresReemplazados, ColumnaAgregada
+)
+from funciones.pipeline import (
+    FILAS_MUESTRA, CombinarColumnas, EliminarColumnas, EliminarDuplicados, EliminarNulos, Reemplazar,
+    modo_diferido, obtener_plan
+)
+from funciones.versionado import marcar_modificado
+
+# =======================
+# ↩️ UNDO / REDO HISTORY
+# =======================
+def obtener_historial(df: pd.DataFrame) -> HistorialCambios:
+    """Session undo/redo history, dropped if it belongs to a different frame."""
+    if "historial" not in st.session_state:
+        st.session_state.historial = HistorialCambios()
+    historial = st.session_state.historial
+    historial.sincronizar(df)
+    return historial
+
+
+def controles_historial(df: pd.DataFrame, key_prefix: str) -> pd.DataFrame:
+    """Undo / redo buttons shared by every transformation page."""
+    historial = obtener_historial(df)
+    c1, c2, c3 = st.columns([1, 1, 2])
+
+    with c1:
+        if st.button(f"↩️ Deshacer ({len(historial.deshacer_pila)})", key=f"{key_prefix}_undo",
+                     disabled=not historial.puede_deshacer()):
+            descripcion = historial.deshacer_pila[-1].descripcion
+            df = historial.deshacer(df)
+            st.success(f"↩️ Deshecho: {descripcion}.")
+    with c2:
+        if st.button(f"↪️ Rehacer ({len(historial.rehacer_pila)})", key=f"{key_prefix}_redo",
+                     disabled=not historial.puede_rehacer()):
+            descripcion = historial.rehacer_pila[-1].descripcion
+            df = historial.rehacer(df)
+            st.success(f"↪️ Rehecho: {descripcion}.")
+    with c3:
+        st.caption(f"🧠 Historial: {historial.memoria_bytes / 1024 ** 2:.1f} MB")
+
+    return df
+
+
+# =======================
+# 🕒 DEFERRED (LAZY) MODE
+# =======================
+def base_diferida(df: pd.DataFrame) -> pd.DataFrame:
+    """Frame the page works on: the sample preview of the plan in deferred mode, else `df`."""
+    return obtener_plan().previsualizar(df) if modo_diferido() else df
+
+
+def diferir(paso):
+    """Append `paso` to the pending plan instead of running it."""
+    obtener_plan().agregar(paso)
+    st.success(f"🕒 Añadido al plan: {paso.descripcion}")
+
+
+def mostrar_previsualizacion(df: pd.DataFrame, key_prefix: str):
+    """Preview of the pending plan over a sample of `df`."""
+    st.info(
+        f"🕒 **Modo diferido:** vista previa sobre las primeras {FILAS_MUESTRA} filas. "
+        "El plan completo se ejecuta de una vez al consultar estadísticas, gráficos o exportar."
+    )
+    mostrar_grid_paginado(
+        obtener_plan().previsualizar(df), key_prefix=f"{key_prefix}_previa", custom_css=CUSTOM_CSS_COMMON
+    )
 
 # =======================
 # 🗑️ DELETE COLUMN
@@ -10,7 +82,7 @@ from funciones.analisis import prepare_display_df, base_grid_from_df, CUSTOM_CSS
 def eliminar_columna(df: pd.DataFrame) -> pd.DataFrame:
     """
     Streamlit UI to delete a column from the DataFrame.
-    Supports undo last deletion and shows updated DataFrame.
+    Supports multi-step undo/redo and shows updated DataFrame.
     """
     st.subheader("🗑️ Eliminar columna")
 
@@ -18,19 +90,24 @@ def eliminar_columna(df: pd.DataFrame) -> pd.DataFrame:
         st.warning("⚠️ No hay datos cargados.")
         return df
 
-    if "df_backup" not in st.session_state or st.session_state.df_backup.shape[1] != df.shape[1]:
-        st.session_state.df_backup = df.copy()
-
-    col_to_drop = st.selectbox("Selecciona la columna a eliminar", df.columns, key="drop_col")
+    historial = obtener_historial(df)
+    base = base_diferida(df)
+    col_to_drop = st.selectbox("Selecciona la columna a eliminar", base.columns, key="drop_col")
 
     if st.button(f"Eliminar columna '{col_to_drop}'", key="btn_drop_col"):
-        df = df.drop(columns=[col_to_drop])
-        st.success(f"✅ Columna '{col_to_drop}' eliminada.")
+        if modo_diferido():
+            diferir(EliminarColumnas([col_to_drop]))
+        else:
+            cambio = ColumnasEliminadas(df, [col_to_drop])
+            df = df.drop(columns=[col_to_drop])
+            historial.registrar(cambio, df)
+            st.success(f"✅ Columna '{col_to_drop}' eliminada.")
+
+    if modo_diferido():
+        mostrar_previsualizacion(df, key_prefix="eliminar_columna")
+        return df
 
-    if st.button("↩️ Deshacer última eliminación", key="btn_undo_col"):
-        if "df_backup" in st.session_state:
-            df = st.session_state.df_backup.copy()
-            st.success("↩️ Se ha restaurado la columna eliminada.")
+    df = controles_historial(df, key_prefix="eliminar_columna")
 
     mostrar_df_actualizado(df, key_prefix="eliminar_columna")
     return df
@@ -40,8 +117,8 @@ def eliminar_columna(df: pd.DataFrame) -> pd.DataFrame:
 # =======================
 def reemplazar_valor(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Replace specific values in a selected column.
-    Supports undo and displays updated DataFrame.
+    Replace specific values in a selected column, one at a time or in bulk
+    from a mapping table. Supports multi-step undo/redo and displays updated DataFrame.
     """
     st.subheader("♻️ Reemplazar valores en columna")
 
@@ -49,22 +126,53 @@ def reemplazar_valor(df: pd.DataFrame) -> pd.DataFrame:
         st.warning("⚠️ No hay datos cargados.")
         return df
 
-    if "df_backup" not in st.session_state:
-        st.session_state.df_backup = df.copy()
-
-    col_name = st.selectbox("Selecciona columna para reemplazar valores", df.columns, key="replace_col")
+    historial = obtener_historial(df)
+    base = base_diferida(df)
+    col_name = st.selectbox("Selecciona columna para reemplazar valores", base.columns, key="replace_col")
     if col_name:
-        valor_viejo = st.text_input("Valor a reemplazar", key="old_val")
-        valor_nuevo = st.text_input("Nuevo valor", key="new_val")
-
-        if st.button("Reemplazar valor", key="btn_replace_val"):
-            df[col_name] = df[col_name].replace(valor_viejo, valor_nuevo)
-            st.success(f"✅ Valores '{valor_viejo}' reemplazados por '{valor_nuevo}' en columna '{col_name}'.")
+        modo = st.radio(
+            "Modo de reemplazo", ["Un valor", "Tabla de correspondencias"], horizontal=True, key="replace_modo"
+        )
+        viejos = nuevos = None
+        if modo == "Un valor":
+            valor_viejo = st.text_input("Valor a reemplazar", key="old_val")
+            valor_nuevo = st.text_input("Nuevo valor", key="new_val")
+            viejos, nuevos = [valor_viejo], [valor_nuevo]
+        else:
+            st.caption("Dos columnas por fila: valor actual y valor nuevo (separadas por coma, punto y coma o tabulador).")
+            archivo_mapeo = st.file_uploader("📂 Tabla de correspondencias", type=FORMATOS_MAPEO, key="replace_tabla")
+            texto_mapeo = st.text_area("… o pégala aquí", key="replace_texto", height=150)
+            origen = archivo_mapeo if archivo_mapeo is not None else texto_mapeo.strip() or None
+            if origen is not None:
+                try:
+                    tabla = leer_tabla_mapeo(origen)
+                    viejos, nuevos = tabla["viejo"].tolist(), tabla["nuevo"].tolist()
+                    pares = f"{len(tabla):,}".replace(",", ".")
+                    st.caption(f"🔁 {pares} pares leídos.")
+                except Exception as e:
+                    st.error(f"❌ No se pudo leer la tabla de correspondencias: {e}")
+
+        if st.button("Reemplazar valor", key="btn_replace_val", disabled=viejos is None):
+            if modo_diferido():
+                diferir(Reemplazar(col_name, viejos, nuevos))
+            else:
+                anterior = df[col_name]
+                nueva, avisos = aplicar_mapeo(anterior, viejos, nuevos)
+                for aviso in avisos:
+                    st.warning(f"⚠️ {aviso}")
+                cambio = ValoresReemplazados(col_name, anterior, nueva)
+                if cambio.celdas:
+                    df[col_name] = nueva
+                    marcar_modificado(df)
+                    historial.registrar(cambio, df)
+                celdas = f"{cambio.celdas:,}".replace(",", ".")
+                st.success(f"✅ Celdas modificadas en '{col_name}': {celdas}")
+
+    if modo_diferido():
+        mostrar_previsualizacion(df, key_prefix="reemplazar_valor")
+        return df
 
-    if st.button("↩️ Deshacer cambios", key="btn_undo_replace"):
-        if "df_backup" in st.session_state:
-            df = st.session_state.df_backup.copy()
-            st.success("↩️ Cambios deshechos.")
+    df = controles_historial(df, key_prefix="reemplazar_valor")
 
     mostrar_df_actualizado(df, key_prefix="reemplazar_valor")
     return df
@@ -74,8 +182,9 @@ def reemplazar_valor(df: pd.DataFrame) -> pd.DataFrame:
 # =======================
 def eliminar_duplicados(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Remove duplicate rows from the DataFrame.
-    Supports undo and shows updated table.
+    Remove duplicate rows (full rows or a subset of key columns), keeping the
+    first, the last or no copy, with a report of duplicate groups beforehand.
+    Supports multi-step undo/redo and shows updated table.
     """
     st.subheader("🧹 Eliminar filas duplicadas")
 
@@ -83,19 +192,46 @@ def eliminar_duplicados(df: pd.DataFrame) -> pd.DataFrame:
         st.warning("⚠️ No hay datos cargados.")
         return df
 
-    if "df_backup" not in st.session_state:
-        st.session_state.df_backup = df.copy()
+    historial = obtener_historial(df)
+    base = base_diferida(df)
+    columnas = st.multiselect(
+        "Columnas clave (vacío = fila completa)", base.columns, key="dup_cols",
+        help="Dos filas son duplicadas si coinciden en estas columnas.",
+    )
+    conservar = st.radio(
+        "Fila a conservar de cada grupo", list(CONSERVAR), format_func=CONSERVAR.get,
+        horizontal=True, key="dup_conservar",
+    )
+
+    # Report before deleting (row hashes are cached per frame version and key columns)
+    if not modo_diferido() and st.checkbox("🔎 Analizar duplicados antes de eliminar", value=True, key="dup_analizar"):
+        with st.spinner("🔎 Analizando duplicados..."):
+            informe = informe_duplicados(df, columnas)
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Grupos duplicados", f"{informe['grupos']:,}".replace(",", "."))
+        c2.metric("Filas repetidas", f"{informe['filas_duplicadas']:,}".replace(",", "."))
+        c3.metric("Filas en grupos", f"{informe['filas_en_grupos']:,}".replace(",", "."))
+        if informe["grupos"]:
+            with st.expander(f"📋 Grupos más grandes (hasta {MAX_GRUPOS_INFORME})", expanded=False):
+                st.dataframe(informe["mayores"])
 
     if st.button("Eliminar duplicados", key="btn_drop_duplicates"):
-        count_antes = df.shape[0]
-        df = df.drop_duplicates()
-        count_despues = df.shape[0]
-        st.success(f"✅ Filas duplicadas eliminadas: {count_antes - count_despues}")
+        if modo_diferido():
+            diferir(EliminarDuplicados(columnas, conservar))
+        else:
+            count_antes = df.shape[0]
+            conservadas = mascara_conservar(df, columnas, conservar)
+            cambio = FilasEliminadas(df, conservadas, descripcion="eliminar duplicados")
+            df = df[conservadas]
+            historial.registrar(cambio, df)
+            count_despues = df.shape[0]
+            st.success(f"✅ Filas duplicadas eliminadas: {count_antes - count_despues}")
+
+    if modo_diferido():
+        mostrar_previsualizacion(df, key_prefix="eliminar_duplicados")
+        return df
 
-    if st.button("↩️ Deshacer eliminación duplicados", key="btn_undo_duplicates"):
-        if "df_backup" in st.session_state:
-            df = st.session_state.df_backup.copy()
-            st.success("↩️ Cambios deshechos.")
+    df = controles_historial(df, key_prefix="eliminar_duplicados")
 
     mostrar_df_actualizado(df, key_prefix="eliminar_duplicados")
     return df
@@ -116,9 +252,27 @@ def buscar_texto(df: pd.DataFrame) -> pd.DataFrame:
     col_name = st.selectbox("Selecciona columna para buscar texto parcial", df.columns, key="search_col")
     if col_name:
         texto = st.text_input("Texto a buscar", key="search_text")
+        c1, c2 = st.columns(2)
+        with c1:
+            modo = st.radio(
+                "Modo de búsqueda", list(MODOS_BUSQUEDA), format_func=MODOS_BUSQUEDA.get,
+                horizontal=True, key="search_modo",
+            )
+        with c2:
+            usar_indice = st.checkbox(
+                "⚡ Usar índice de trigramas", value=True, key="search_indice",
+                help="Se construye en la primera búsqueda sobre la columna y se reutiliza mientras los datos no cambien.",
+            )
         if st.button("Buscar", key="btn_search_text"):
-            df_filtrado = df[df[col_name].astype(str).str.contains(texto, na=False)]
-            st.success(f"✅ Resultados filtrados por '{texto}' en columna '{col_name}'")
+            try:
+                with st.spinner("🔍 Buscando..."):
+                    mascara = buscar_en_columna(df, col_name, texto, modo=modo, usar_indice=usar_indice)
+            except re.error as e:
+                st.error(f"❌ Expresión regular no válida: {e}")
+                mostrar_df_actualizado(df, key_prefix="buscar_texto")
+                return df
+            df_filtrado = df[mascara]
+            st.success(f"✅ Resultados filtrados por '{texto}' en columna '{col_name}': {len(df_filtrado):,} filas")
             mostrar_df_actualizado(df_filtrado, key_prefix="buscar_texto")
             return df_filtrado
 
@@ -131,7 +285,7 @@ def buscar_texto(df: pd.DataFrame) -> pd.DataFrame:
 def crear_columna_combinada(df: pd.DataFrame) -> pd.DataFrame:
     """
     Combine multiple columns into a new one.
-    Supports undo and displays updated DataFrame.
+    Supports multi-step undo/redo and displays updated DataFrame.
     """
     st.subheader("➕ Crear columna combinada")
 
@@ -139,22 +293,40 @@ def crear_columna_combinada(df: pd.DataFrame) -> pd.DataFrame:
         st.warning("⚠️ No hay datos cargados.")
         return df
 
-    if "df_backup" not in st.session_state:
-        st.session_state.df_backup = df.copy()
-
-    cols = st.multiselect("Selecciona columnas a combinar", df.columns)
+    historial = obtener_historial(df)
+    base = base_diferida(df)
+    cols = st.multiselect("Selecciona columnas a combinar", base.columns)
     nuevo_nombre = st.text_input("Nombre de la nueva columna", key="new_col_name")
     separador = st.text_input("Separador (ej: espacio, coma, guion)", " ", key="sep_col")
+    c1, c2 = st.columns(2)
+    with c1:
+        nulos = st.radio(
+            "Valores nulos", list(MODOS_NULOS), format_func=MODOS_NULOS.get, key="nulos_col",
+            help="Cómo tratar las celdas vacías al combinar.",
+        )
+        marcador = st.text_input("Marcador para nulos", "", key="marcador_col", disabled=nulos != "replace")
+    with c2:
+        tipo = st.radio(
+            "Tipo del resultado", ["Automático", "Texto", "Categoría"], key="tipo_col",
+            help="Automático usa categoría cuando la combinación tiene pocos valores distintos.",
+        )
+    categorica = {"Automático": "auto", "Texto": False, "Categoría": True}[tipo]
 
     if st.button("Crear columna combinada", key="btn_create_col"):
-        if cols and nuevo_nombre:
-            df[nuevo_nombre] = df[cols].astype(str).agg(separador.join, axis=1)
+        if cols and nuevo_nombre and modo_diferido():
+            diferir(CombinarColumnas(cols, nuevo_nombre, separador, nulos, marcador, categorica))
+        elif cols and nuevo_nombre:
+            cambio = ColumnaAgregada(df, nuevo_nombre)
+            df[nuevo_nombre] = combinar_columnas(df, cols, separador, nulos, marcador, categorica)
+            marcar_modificado(df)
+            historial.registrar(cambio, df)
             st.success(f"✅ Columna combinada '{nuevo_nombre}' creada.")
 
-    if st.button("↩️ Deshacer última creación", key="btn_undo_create"):
-        if "df_backup" in st.session_state:
-            df = st.session_state.df_backup.copy()
-            st.success("↩️ Se ha deshecho la creación de la columna combinada.")
+    if modo_diferido():
+        mostrar_previsualizacion(df, key_prefix="crear_columna")
+        return df
+
+    df = controles_historial(df, key_prefix="crear_columna")
 
     mostrar_df_actualizado(df, key_prefix="crear_columna")
     return df
@@ -165,6 +337,7 @@ def crear_columna_combinada(df: pd.DataFrame) -> pd.DataFrame:
 def eliminar_nulos(df: pd.DataFrame) -> pd.DataFrame:
     """
     Remove rows with null values.
+    Supports multi-step undo/redo.
     """
     st.subheader("🧹 Eliminar filas con valores nulos")
 
@@ -172,11 +345,25 @@ def eliminar_nulos(df: pd.DataFrame) -> pd.DataFrame:
         st.warning("⚠️ No hay datos cargados.")
         return df
 
+    historial = obtener_historial(df)
+
     if st.button("Eliminar filas con valores nulos", key="btn_drop_na"):
-        count_antes = df.shape[0]
-        df = df.dropna()
-        count_despues = df.shape[0]
-        st.success(f"✅ Filas eliminadas: {count_antes - count_despues} | Filas restantes: {count_despues}")
+        if modo_diferido():
+            diferir(EliminarNulos())
+        else:
+            count_antes = df.shape[0]
+            conservadas = df.notna().all(axis=1).to_numpy()
+            cambio = FilasEliminadas(df, conservadas, descripcion="eliminar filas con nulos")
+            df = df[conservadas]
+            historial.registrar(cambio, df)
+            count_despues = df.shape[0]
+            st.success(f"✅ Filas eliminadas: {count_antes - count_despues} | Filas restantes: {count_despues}")
+
+    if modo_diferido():
+        mostrar_previsualizacion(df, key_prefix="eliminar_nulos")
+        return df
+
+    df = controles_historial(df, key_prefix="eliminar_nulos")
 
     mostrar_df_actualizado(df, key_prefix="eliminar_nulos")
     return df
@@ -187,39 +374,23 @@ def eliminar_nulos(df: pd.DataFrame) -> pd.DataFrame:
 def mostrar_df_actualizado(df: pd.DataFrame, key_prefix="df_display"):
     """
     Display DataFrame with AgGrid safely:
-    - Uses session_state to avoid re-render issues.
+    - The frame is shown as is (no copy): the grid only reads it, and results
+      cached for its version stay valid.
+    - Server-side pagination, sorting and filtering; only the visible page is sent.
     - Blue headers, truncated text, CSV export.
     """
-    if "df_to_show" not in st.session_state:
-        st.session_state.df_to_show = df.copy()
-
-    st.session_state.df_to_show = df.copy()  # update DataFrame in session_state
-
-    df_disp = prepare_display_df(st.session_state.df_to_show, max_len=200)
-    gb = base_grid_from_df(df_disp)
-    for c in df_disp.columns:
-        gb.configure_column(c, headerTooltip=f"Columna: {c}")
-
-    height_grid = calc_height_for_rows(len(df_disp), row_height=34, header_extra=80, max_height=600)
-    
     # Render AgGrid outside of buttons
-    AgGrid(
-        df_disp,
-        gridOptions=gb.build(),
-        theme="streamlit",
-        fit_columns_on_grid_load=False,
-        allow_unsafe_jscode=False,
+    mostrar_grid_paginado(
+        df,
+        key_prefix=key_prefix,
+        max_len=200,
         custom_css=CUSTOM_CSS_COMMON,
-        height=height_grid,
-        key=f"{key_prefix}_aggrid",
     )
 
     # CSV export button
-    csv = st.session_state.df_to_show.to_csv(index=False).encode("utf-8")
-    st.download_button(
-        label="💾 Exportar CSV actualizado",
-        data=csv,
-        file_name="datos_actualizados.csv",
-        mime="text/csv",
+    boton_descarga(
+        df,
+        etiqueta="💾 Exportar CSV actualizado",
+        nombre_archivo="datos_actualizados.csv",
         key=f"{key_prefix}_download",
     )
@@ -0,0 +1,328 @@
+# funciones/versionado.py
+import hashlib
+import itertools
+import os
+import threading
+import time
+import weakref
+from collections import Counter, OrderedDict
+import numpy as np
+import pandas as pd
+
+# =========================================================
+# 🔢 FRAME VERSIONS
+# =========================================================
+# Every DataFrame object gets a process-wide, monotonically increasing version
+# the first time it is seen. Functions that mutate a frame in place must call
+# `marcar_modificado` so results cached for the old version are not reused.
+_contador = itertools.count(1)
+_versiones = {}  # id(df) -> (weakref to df, version)
+_vivas = Counter()  # version -> live frames carrying it
+_cerrojo = threading.RLock()
+
+
+def _olvidar(clave: int, ref):
+    with _cerrojo:
+        entrada = _versiones.get(clave)
+        if entrada is not None and entrada[0] is ref:
+            del _versiones[clave]
+            _soltar(entrada[1])
+
+
+def _soltar(version: int):
+    _vivas[version] -= 1
+    if _vivas[version] <= 0:
+        del _vivas[version]
+
+
+def _registrar(df: pd.DataFrame, version: int):
+    clave = id(df)
+    anterior = _versiones.get(clave)
+    if anterior is not None:
+        _soltar(anterior[1])
+    ref = weakref.ref(df, lambda r, clave=clave: _olvidar(clave, r))
+    _versiones[clave] = (ref, version)
+    _vivas[version] += 1
+
+
+def version_df(df: pd.DataFrame) -> int:
+    """Current version number of `df` (assigned on first use)."""
+    with _cerrojo:
+        entrada = _versiones.get(id(df))
+        if entrada is not None and entrada[0]() is df:
+            return entrada[1]
+        return _asignar(df)
+
+
+def marcar_modificado(df: pd.DataFrame) -> int:
+    """Give `df` a new version after an in-place change; returns the new version."""
+    with _cerrojo:
+        return _asignar(df)
+
+
+def transferir_version(origen: pd.DataFrame, destino: pd.DataFrame) -> int:
+    """
+    Give `destino` the version of `origen`. Only for frames with identical content
+    (e.g. a copy reloaded from disk), so results cached for `origen` stay valid.
+    """
+    with _cerrojo:
+        version = version_df(origen)
+        _registrar(destino, version)
+        return version
+
+
+def version_viva(version: int) -> bool:
+    """True while some frame still carries `version` (results keyed on it can be reused)."""
+    with _cerrojo:
+        return version in _vivas
+
+
+def _asignar(df: pd.DataFrame) -> int:
+    version = next(_contador)
+    _registrar(df, version)
+    return version
+
+
+# =========================================================
+# 🧬 CONTENT FINGERPRINT
+# =========================================================
+FILAS_HUELLA = 1024   # evenly spaced rows hashed by the fingerprint
+
+
+def huella_df(df: pd.DataFrame, filas: int = FILAS_HUELLA) -> str:
+    """
+    Cheap content fingerprint: shape, column names, dtypes and a hash of up to
+    `filas` evenly spaced rows (first and last included). Equal frames always
+    share it; edits outside the sampled rows may go unnoticed, so it complements
+    the version rather than replacing it.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((df.shape, list(df.columns), [str(t) for t in df.dtypes])).encode("utf-8"))
+    if len(df):
+        posiciones = np.linspace(0, len(df) - 1, min(filas, len(df))).astype(np.int64)
+        muestra = df.iloc[posiciones]
+        try:
+            h.update(pd.util.hash_pandas_object(muestra, index=False).to_numpy().tobytes())
+        except TypeError:
+            # Unhashable cells (lists, dicts...): fall back to their text form
+            h.update(repr(muestra.to_numpy().tolist()).encode("utf-8"))
+    return h.hexdigest()
+
+
+# =========================================================
+# 📦 SESSION DATASET HANDLE
+# =========================================================
+class Dataset:
+    """
+    Handle of the session's working frame.
+    - `version`: the frame's process-wide version; it changes whenever a
+      transformation returns a new frame or reports an in-place edit
+    - `huella`: content fingerprint, checked on every rerun so an in-place edit
+      that was not reported still gets a new version
+    Results cached by version (profiles, groupings, charts, exports...) can
+    therefore be reused safely across pages.
+    """
+
+    def __init__(self, df: pd.DataFrame = None):
+        self.df = None
+        self.version = None
+        self.huella = None
+        self.actualizar(df)
+
+    def actualizar(self, df: pd.DataFrame) -> bool:
+        """Point the handle to `df`. Returns True when the data changed."""
+        if df is None:
+            cambio = self.df is not None
+            self.df = self.version = self.huella = None
+            return cambio
+
+        version = version_df(df)
+        huella = None
+        if df is self.df and version == self.version:
+            huella = huella_df(df)
+            if huella == self.huella:
+                return False
+            # Edited in place without marcar_modificado: results cached for the old version are stale
+            version = marcar_modificado(df)
+
+        self.df, self.version = df, version
+        self.huella = huella or huella_df(df)
+        return True
+
+    def comprobar(self) -> bool:
+        """Re-check the current frame (once per rerun); True if it changed in place."""
+        return self.actualizar(self.df)
+
+    @property
+    def clave(self) -> tuple:
+        """(version, fingerprint) of the current frame, for keying cached results."""
+        return (self.version, self.huella)
+
+
+# =========================================================
+# 🗃️ RESULT CACHE BY VERSION
+# =========================================================
+# Byte budget of each cache (entries are also capped in number)
+LIMITE_CACHE_MB = float(os.environ.get("AEMG_MEMORIA_CACHE_MB", 512))
+
+_caches = weakref.WeakSet()   # every CacheVersiones, for descartar_de_caches / memoria_caches
+
+
+def memoria_objeto(valor) -> int:
+    """Approximate bytes held by a cached value (frames, arrays, containers, objects with `memoria_bytes`)."""
+    if isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(deep=True, index=True).sum())
+    if isinstance(valor, (pd.Series, pd.Index)):
+        return int(valor.memory_usage(deep=True))
+    if isinstance(valor, np.ndarray):
+        return int(valor.nbytes)
+    if isinstance(valor, (tuple, list)):
+        return sum(memoria_objeto(v) for v in valor)
+    if isinstance(valor, dict):
+        return sum(memoria_objeto(v) for v in valor.values())
+    return int(getattr(valor, "memoria_bytes", 0))
+
+
+class CacheVersiones:
+    """
+    Small thread-safe LRU cache for results derived from a frame.
+    Keys should start with the frame version, e.g. (version_df(df), columns...):
+    entries whose version no longer belongs to any live frame are purged.
+    Bounded both in entries and in bytes (`max_mb`, measured with memoria_objeto).
+    `al_descartar(valor)`, if given, is called for every evicted or discarded value
+    (e.g. to delete a file the value points to). `por_version=False` is for caches
+    whose keys are not frame versions (nothing is purged by version then).
+    """
+
+    def __init__(self, max_entradas: int = 32, al_descartar=None, max_mb: float = None,
+                 por_version: bool = True):
+        self.max_entradas = max_entradas
+        self.max_bytes = (LIMITE_CACHE_MB if max_mb is None else max_mb) * 1024 ** 2
+        self.al_descartar = al_descartar
+        self.por_version = por_version
+        self._datos = OrderedDict()
+        self._tamanos = {}   # clave -> bytes
+        self._usos = {}      # clave -> last access (time.monotonic)
+        self._cerrojo = threading.Lock()
+        _caches.add(self)
+
+    def obtener(self, clave, calcular):
+        """Return the cached value for `clave`, computing it with `calcular()` on a miss."""
+        self.purgar()
+        with self._cerrojo:
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                self._usos[clave] = time.monotonic()
+                return self._datos[clave]
+
+        valor = calcular()
+        tamano = memoria_objeto(valor)
+
+        descartados = []
+        with self._cerrojo:
+            if clave in self._datos and self._datos[clave] is not valor:
+                descartados.append(self._datos[clave])   # computed concurrently by another thread
+            self._datos[clave] = valor
+            self._tamanos[clave] = tamano
+            self._usos[clave] = time.monotonic()
+            self._datos.move_to_end(clave)
+            # The newest entry always stays, even if it alone exceeds the byte budget
+            while len(self._datos) > 1 and (
+                len(self._datos) > self.max_entradas or sum(self._tamanos.values()) > self.max_bytes
+            ):
+                descartados.append(self._quitar(next(iter(self._datos))))
+        self._descartados(descartados)
+        return valor
+
+    def _quitar(self, clave):
+        """Remove one entry (caller holds the lock) and return its value."""
+        self._tamanos.pop(clave, None)
+        self._usos.pop(clave, None)
+        return self._datos.pop(clave)
+
+    @property
+    def memoria_bytes(self) -> int:
+        with self._cerrojo:
+            return sum(self._tamanos.values())
+
+    def memoria_versiones(self, versiones) -> int:
+        """Bytes of the entries keyed on any of `versiones`."""
+        with self._cerrojo:
+            return sum(t for c, t in self._tamanos.items() if self._version(c) in versiones)
+
+    def _version(self, clave):
+        if self.por_version and isinstance(clave, tuple) and clave and isinstance(clave[0], int):
+            return clave[0]
+        return None
+
+    def purgar(self):
+        """Drop the entries of versions no live frame carries any more."""
+        if not self.por_version:
+            return
+        with self._cerrojo:
+            muertas = [c for c in self._datos if self._version(c) is not None and not version_viva(self._version(c))]
+            descartados = [self._quitar(c) for c in muertas]
+        self._descartados(descartados)
+
+    def descartar(self, clave):
+        """Drop one entry, if present."""
+        with self._cerrojo:
+            descartados = [self._quitar(clave)] if clave in self._datos else []
+        self._descartados(descartados)
+
+    def descartar_valor(self, valor):
+        """Drop every entry holding this very object."""
+        with self._cerrojo:
+            claves = [c for c, v in self._datos.items() if v is valor]
+            descartados = [self._quitar(c) for c in claves]
+        self._descartados(descartados)
+
+    def vaciar(self):
+        with self._cerrojo:
+            descartados = list(self._datos.values())
+            self._datos.clear()
+            self._tamanos.clear()
+            self._usos.clear()
+        self._descartados(descartados)
+
+    def _descartados(self, valores: list):
+        if self.al_descartar is not None:
+            for valor in valores:
+                self.al_descartar(valor)
+
+
+def descartar_de_caches(valor):
+    """Drop `valor` from every version cache, so its memory is released once no one else holds it."""
+    for cache in list(_caches):
+        cache.descartar_valor(valor)
+
+
+def memoria_caches(versiones=None) -> int:
+    """
+    Bytes held by every version cache (dead versions purged first), or only by
+    the entries keyed on `versiones` when given.
+    """
+    total = 0
+    for cache in list(_caches):
+        cache.purgar()
+        total += cache.memoria_bytes if versiones is None else cache.memoria_versiones(versiones)
+    return total
+
+
+def recortar_caches(bytes_a_liberar: int, versiones=None) -> int:
+    """
+    Evict the least recently used entries across all caches (only those keyed on
+    `versiones`, when given) until `bytes_a_liberar` are freed. Returns the bytes freed.
+    """
+    entradas = []
+    for cache in list(_caches):
+        with cache._cerrojo:
+            entradas += [(cache._usos[c], id(cache), cache, c, cache._tamanos[c]) for c in cache._datos
+                         if versiones is None or cache._version(c) in versiones]
+    liberados = 0
+    for _, _, cache, clave, tamano in sorted(entradas, key=lambda e: e[:2]):
+        if liberados >= bytes_a_liberar:
+            break
+        cache.descartar(clave)
+        liberados += tamano
+    return liberados
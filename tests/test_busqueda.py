@@ -0,0 +1,67 @@
+# tests/test_busqueda.py
+import re
+import numpy as np
+import pandas as pd
+import pytest
+from funciones.busqueda import IndiceTrigramas, buscar_en_columna, literales_obligatorios
+
+VALORES = pd.Series([
+    "abc", "]abc", "x]abcy", "ABC def", "hola mundo", "Hola  Mundo", "a b c", "aXc",
+    "2,3", "ab2,3c", "abbbc", "abbc", "ac", "xüŗǡy", "üŗǡ", "data 2024-01-05", "[abc]", None,
+    "mundial", "foo.bar", "foo bar", "(x)", "lo que sea",
+])
+
+PATRONES = [
+    "[]abc]", "[^]a]bc", "x[]]abc", "(?i)abc", "(?x)a b c", "(?i:ABC)", "a(?:bc)", "ab{1,3}c",
+    "ab{2,3}c", "b{0}c", "ab+c", "ab*c", "ab?c", "hola\\s+mundo", "(?i)HOLA", "d{4}-\\d",
+    "\\d{4}-\\d{2}", "foo.bar", "foo\\.bar", "üŗǡ", "abc|mundo", "[(]x", "\\(x\\)", "mund(o|ial)",
+]
+
+
+@pytest.fixture(scope="module")
+def indice():
+    return IndiceTrigramas(VALORES)
+
+
+def _fuerza_bruta(patron):
+    return np.array([isinstance(v, str) and re.search(patron, v) is not None for v in VALORES])
+
+
+@pytest.mark.parametrize("patron", PATRONES)
+def test_regex_con_prefiltro_igual_que_re_search(indice, patron):
+    assert (indice.buscar(patron, "regex") == _fuerza_bruta(patron)).all()
+
+
+@pytest.mark.parametrize("patron", PATRONES)
+def test_fragmentos_obligatorios_aparecen_en_cada_coincidencia(patron):
+    fragmentos = literales_obligatorios(patron) or []
+    for valor in VALORES.dropna():
+        if re.search(patron, valor):
+            assert all(f.lower() in valor.lower() for f in fragmentos), (patron, valor, fragmentos)
+
+
+def test_flags_en_linea_desactivan_el_prefiltro():
+    assert literales_obligatorios("(?i)abc") is None
+    assert literales_obligatorios("(?x)a b c") is None
+    assert literales_obligatorios("(?:abc)def") == ["def"]
+
+
+@pytest.mark.parametrize("modo", ["literal", "sin_mayusculas"])
+@pytest.mark.parametrize("texto", ["abc", "ABC", "mundo", "üŗǡ", "o b", "2,3", "zzz"])
+def test_busqueda_literal_igual_que_str_contains(indice, modo, texto):
+    esperado = VALORES.str.contains(texto, case=modo == "literal", regex=False, na=False).to_numpy()
+    assert (indice.buscar(texto, modo) == esperado).all()
+
+
+@pytest.mark.parametrize("modo,texto", [
+    ("literal", "ab"), ("literal", "abca"), ("sin_mayusculas", "BCA"), ("sin_mayusculas", "ñu"),
+    ("regex", "a.c"), ("regex", "^b+a"), ("regex", "cab{2}"), ("regex", "(?i)ÑU$"),
+])
+def test_indice_igual_que_recorrer_la_columna(modo, texto):
+    rng = np.random.default_rng(7)
+    letras = np.array(list("abcAñÑu"))
+    valores = ["".join(rng.choice(letras, rng.integers(0, 12))) for _ in range(3_000)]
+    df = pd.DataFrame({"t": pd.Series(valores, dtype=object).where(rng.random(3_000) > 0.05)})
+    con_indice = buscar_en_columna(df, "t", texto, modo)
+    sin_indice = buscar_en_columna(df, "t", texto, modo, usar_indice=False)
+    assert (con_indice == sin_indice).all() and con_indice.any()
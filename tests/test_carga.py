@@ -0,0 +1,35 @@
+# tests/test_carga.py
+import pandas as pd
+import pytest
+import funciones.cache as cache
+import funciones.carga as carga
+
+
+@pytest.fixture
+def directorio_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "DIRECTORIO_CACHE", tmp_path / "cache")
+    return tmp_path
+
+
+def test_metadatos_de_la_cache(directorio_cache):
+    df = pd.DataFrame({"a": [1, 2, 3]})
+    assert cache.guardar_cache("parcial", df, {"completo": False})
+    leido, metadatos = cache.leer_cache("parcial", con_metadatos=True)
+    pd.testing.assert_frame_equal(leido, df)
+    assert metadatos == {"completo": False}
+    assert cache.leer_cache("ausente", con_metadatos=True) == (None, {})
+
+
+def test_carga_parcial_avisa_tambien_desde_la_cache(directorio_cache, monkeypatch):
+    ruta = directorio_cache / "datos.csv"
+    pd.DataFrame({"a": range(5000), "b": ["x" * 20] * 5000}).to_csv(ruta, index=False)
+    avisos = []
+    monkeypatch.setattr(carga.st, "warning", lambda texto: avisos.append(texto))
+
+    opciones = dict(streaming=True, tamano_bloque=500, limite_memoria_mb=0.01)
+    primera = carga.cargar_archivo(str(ruta), **opciones)
+    segunda = carga.cargar_archivo(str(ruta), **opciones)
+
+    assert len(primera) < 5000
+    assert len(segunda) == len(primera)
+    assert len(avisos) == 2 and avisos[0] == avisos[1]
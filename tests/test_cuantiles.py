@@ -0,0 +1,39 @@
+# tests/test_cuantiles.py
+import numpy as np
+import pandas as pd
+import pytest
+from funciones.cuantiles import ERROR_RELATIVO, construir_sketch
+
+
+def test_media_y_desviacion_con_desplazamiento_grande():
+    rng = np.random.default_rng(0)
+    grupos = rng.integers(0, 3, 300_000)
+    valores = pd.Series(1e9 + rng.standard_normal(300_000))
+    sketch = construir_sketch(valores, grupos, 4, tamano_bloque=70_000)
+    esperado = valores.groupby(grupos).agg(["mean", "std"])
+    assert np.allclose(sketch.media()[:3], esperado["mean"], rtol=1e-13)
+    assert np.allclose(sketch.desviacion()[:3], esperado["std"], rtol=1e-6)
+    assert np.isnan(sketch.media()[3]) and np.isnan(sketch.desviacion()[3])
+
+
+@pytest.mark.parametrize("q", [0.0, 0.01, 0.25, 0.5, 0.9, 0.99, 1.0])
+def test_cuantiles_con_error_relativo_garantizado(q):
+    rng = np.random.default_rng(1)
+    grupos = rng.integers(0, 4, 200_000)
+    valores = pd.Series(np.concatenate([-rng.lognormal(2, 3, 100_000), rng.lognormal(0, 2, 100_000)]))
+    sketch = construir_sketch(valores, grupos, 4, tamano_bloque=30_000)
+    # The sketch returns the value of rank floor(q * (n - 1)), i.e. the "lower" quantile
+    esperado = valores.groupby(grupos).quantile(q, interpolation="lower").to_numpy()
+    assert np.all(np.abs(sketch.cuantil(q) - esperado) <= ERROR_RELATIVO * np.abs(esperado) + 1e-12)
+
+
+def test_sketches_fusionados_igual_que_uno_solo():
+    rng = np.random.default_rng(2)
+    grupos = rng.integers(0, 3, 10_000)
+    valores = pd.Series(rng.exponential(5, 10_000))
+    entero = construir_sketch(valores, grupos, 3)
+    a = construir_sketch(valores.iloc[:4_000], grupos[:4_000], 3)
+    a.fusionar(construir_sketch(valores.iloc[4_000:], grupos[4_000:], 3))
+    for q in (0.1, 0.5, 0.95):
+        assert np.array_equal(a.cuantil(q), entero.cuantil(q))
+    assert np.allclose(a.desviacion(), entero.desviacion())
@@ -0,0 +1,36 @@
+# tests/test_duplicados.py
+import numpy as np
+import pandas as pd
+import pytest
+from funciones.duplicados import informe_duplicados, mascara_conservar
+
+
+@pytest.fixture
+def datos():
+    rng = np.random.default_rng(1)
+    return pd.DataFrame({
+        "x": rng.integers(0, 50, 5000),
+        "y": rng.choice(["p", "q", None], 5000),
+        "z": rng.choice([1.0, np.nan], 5000),
+    })
+
+
+@pytest.mark.parametrize("conservar", ["first", "last", "none"])
+@pytest.mark.parametrize("columnas", [None, ["x"], ["y", "z"]])
+def test_mascara_igual_que_drop_duplicates(datos, columnas, conservar):
+    esperado = ~datos.duplicated(columnas, keep=False if conservar == "none" else conservar).to_numpy()
+    assert (mascara_conservar(datos, columnas, conservar) == esperado).all()
+
+
+def test_valores_mixtos_con_el_mismo_hash_no_se_eliminan():
+    df = pd.DataFrame({"a": pd.Series([1, "1", 2.0, "2.0"], dtype=object)})
+    assert mascara_conservar(df).tolist() == [True, True, True, True]
+    assert informe_duplicados(df)["grupos"] == 0
+
+
+def test_informe_igual_que_pandas(datos):
+    informe = informe_duplicados(datos)
+    tamanos = datos.groupby(list(datos.columns), dropna=False).size()
+    assert informe["grupos"] == int((tamanos > 1).sum())
+    assert informe["filas_duplicadas"] == int(datos.duplicated().sum())
+    assert informe["mayores"]["Repeticiones"].iloc[0] == tamanos.max()
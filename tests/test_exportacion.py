@@ -0,0 +1,60 @@
+# tests/test_exportacion.py
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+import funciones.exportacion as exportacion
+
+
+@pytest.fixture(autouse=True)
+def directorio(tmp_path, monkeypatch):
+    monkeypatch.setattr(exportacion, "DIRECTORIO_EXPORTACION", tmp_path)
+
+
+@pytest.fixture
+def datos():
+    rng = np.random.default_rng(6)
+    return pd.DataFrame({
+        "entero": np.arange(2_345),
+        "real": np.round(rng.random(2_345), 6),
+        "texto": rng.choice(["a", "b,c", 'comillas "x"', "ñandú"], 2_345),
+        "con_nulos": np.where(rng.random(2_345) < 0.2, np.nan, 1.5),
+    })
+
+
+def _leer(ruta, formato):
+    if formato == "parquet":
+        return pd.read_parquet(ruta)
+    if formato == "xlsx":
+        return pd.read_excel(ruta)
+    compresion = {"csv.gz": "gzip", "csv.zst": "zstd"}.get(formato)
+    # Decompressed with Arrow, like the writer compresses (pandas would need zstandard)
+    with pa.CompressedInputStream(str(ruta), compresion) if compresion else pa.OSFile(str(ruta)) as entrada:
+        return pd.read_csv(entrada)
+
+
+@pytest.mark.parametrize("formato", list(exportacion.FORMATOS_EXPORTACION))
+def test_exportacion_por_bloques_se_lee_igual(datos, formato):
+    avances = []
+    ruta = exportacion.escribir_exportacion(datos, formato, filas_por_bloque=500,
+                                            progreso=lambda escritas, total: avances.append((escritas, total)))
+    pd.testing.assert_frame_equal(_leer(ruta, formato), datos, check_dtype=False)
+    assert avances == [(min(f, 2_345), 2_345) for f in range(500, 2_845, 500)]
+
+
+@pytest.mark.parametrize("formato", ["csv", "parquet"])
+def test_columnas_y_filas_seleccionadas(datos, formato):
+    ruta = exportacion.escribir_exportacion(datos, formato, columnas=["texto", "entero"], max_filas=700,
+                                            filas_por_bloque=300)
+    pd.testing.assert_frame_equal(_leer(ruta, formato), datos[["texto", "entero"]].head(700), check_dtype=False)
+
+
+@pytest.mark.parametrize("formato", ["csv", "parquet", "xlsx"])
+def test_frame_vacio_conserva_las_columnas(datos, formato):
+    ruta = exportacion.escribir_exportacion(datos.iloc[:0], formato)
+    assert list(_leer(ruta, formato).columns) == list(datos.columns)
+
+
+def test_formato_desconocido():
+    with pytest.raises(ValueError):
+        exportacion.escribir_exportacion(pd.DataFrame({"a": [1]}), "json")
@@ -0,0 +1,23 @@
+# tests/test_histogramas.py
+import numpy as np
+import pandas as pd
+import pytest
+from funciones.histogramas import PUNTOS_KDE, histograma
+
+
+@pytest.mark.parametrize("desplazamiento", [0.0, 1e9])
+def test_kde_integra_uno_con_desplazamiento(desplazamiento):
+    valores = np.random.default_rng(0).standard_normal(100_000) + desplazamiento
+    bins = 30
+    resultado = histograma(pd.DataFrame({"v": valores}), "v", bins, tamano_bloque=30_000)
+    masa = resultado["kde_y"].sum() / resultado["n"] * bins / PUNTOS_KDE
+    assert masa == pytest.approx(1.0, abs=0.01)
+
+
+def test_conteos_iguales_que_numpy():
+    valores = np.random.default_rng(1).normal(5, 2, 50_000)
+    valores[::100] = np.nan
+    resultado = histograma(pd.DataFrame({"v": valores}), "v", 20, tamano_bloque=7_000)
+    esperado, bordes = np.histogram(valores[~np.isnan(valores)], 20)
+    assert np.allclose(resultado["bordes"], bordes)
+    assert (resultado["conteos"] == esperado).all()
@@ -0,0 +1,84 @@
+# tests/test_historial.py
+import numpy as np
+import pandas as pd
+import pytest
+from funciones.historial import (
+    ColumnaAgregada, ColumnasEliminadas, FilasEliminadas, HistorialCambios, ValoresReemplazados, celdas_distintas,
+)
+
+
+@pytest.mark.parametrize("tipo", ["string[pyarrow]", "string", "Int64", "boolean", "object", "float64"])
+def test_celdas_distintas_con_nulos(tipo):
+    valores = {"Int64": [1, None, 3, None], "boolean": [True, None, False, None],
+               "float64": [1.0, np.nan, 3.0, np.nan]}.get(tipo, ["a", None, "c", None])
+    anterior = pd.Series(valores, dtype=tipo)
+    nueva = anterior.copy()
+    nueva.iloc[0] = nueva.iloc[2]
+    nueva.iloc[3] = nueva.iloc[2]
+    assert celdas_distintas(anterior, nueva).tolist() == [True, False, False, True]
+
+
+def test_reemplazo_en_texto_arrow_con_nulos():
+    df = pd.DataFrame({"t": pd.Series(["a", None, "b", "a"], dtype="string[pyarrow]")})
+    nueva = df["t"].replace("a", "z")
+    cambio = ValoresReemplazados("t", df["t"], nueva)
+    assert cambio.celdas == 2
+
+
+def _frame():
+    rng = np.random.default_rng(4)
+    return pd.DataFrame({
+        "a": rng.integers(0, 10, 200),
+        "b": pd.Series(rng.choice(["x", "y", None], 200), dtype="string[pyarrow]"),
+        "c": rng.random(200),
+    }, index=np.arange(200) * 3)
+
+
+def _cambios(df):
+    """(change, resulting frame) for every kind of step the history records."""
+    conservadas = (df["a"] > 3).to_numpy()
+    nueva = df["a"].where(df["a"] != 5, 50)
+    con_columna = df.assign(d=df["c"] * 2)
+    con_tipo = df.assign(a=df["a"].astype(float) / 2)
+    return [
+        (ColumnasEliminadas(df, ["a", "c"]), df.drop(columns=["a", "c"])),
+        (FilasEliminadas(df, conservadas), df[conservadas]),
+        (ValoresReemplazados("a", df["a"], nueva), df.assign(a=nueva)),
+        (ValoresReemplazados("a", df["a"], con_tipo["a"]), con_tipo),
+        (ColumnaAgregada(df, "d"), con_columna),
+        (ColumnaAgregada(df, "c"), df.assign(c=-df["c"])),
+    ]
+
+
+@pytest.mark.parametrize("posicion", range(6))
+def test_deshacer_y_rehacer_restauran_el_frame(posicion):
+    df = _frame()
+    cambio, resultado = _cambios(df)[posicion]
+    historial = HistorialCambios()
+    historial.registrar(cambio, resultado)
+
+    deshecho = historial.deshacer(resultado)
+    pd.testing.assert_frame_equal(deshecho, df)
+    assert historial.sincronizar(deshecho) and historial.puede_rehacer()
+    rehecho = historial.rehacer(deshecho)
+    pd.testing.assert_frame_equal(rehecho, resultado)
+    pd.testing.assert_frame_equal(historial.deshacer(rehecho), df)
+
+
+def test_varios_pasos_seguidos():
+    df = _frame()
+    historial, frames = HistorialCambios(), [df]
+    for crear in (lambda d: ColumnasEliminadas(d, ["c"]), lambda d: FilasEliminadas(d, (d["a"] % 2 == 0).to_numpy())):
+        anterior = frames[-1]
+        cambio = crear(anterior)
+        frames.append(cambio.rehacer(anterior))
+        historial.registrar(cambio, frames[-1])
+
+    actual = frames[-1]
+    for esperado in reversed(frames[:-1]):
+        actual = historial.deshacer(actual)
+        pd.testing.assert_frame_equal(actual, esperado)
+    for esperado in frames[1:]:
+        actual = historial.rehacer(actual)
+        pd.testing.assert_frame_equal(actual, esperado)
+    assert not historial.puede_rehacer()
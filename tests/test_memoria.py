@@ -0,0 +1,61 @@
+# tests/test_memoria.py
+import numpy as np
+import pandas as pd
+import pytest
+import streamlit as st
+import funciones.memoria as memoria
+from funciones.versionado import CacheVersiones, Dataset, version_df
+
+
+@pytest.fixture
+def volcados(tmp_path, monkeypatch):
+    monkeypatch.setattr(memoria, "DIRECTORIO_VOLCADOS", tmp_path)
+    monkeypatch.setattr(memoria, "_sesiones", {})
+    yield tmp_path
+    st.session_state.clear()
+
+
+def _frame(filas=50_000):
+    rng = np.random.default_rng(5)
+    df = pd.DataFrame({
+        "entero": np.arange(filas),
+        "real": rng.random(filas),
+        "con_nulos": np.where(rng.random(filas) < 0.1, np.nan, 1.0),
+        "texto": pd.Series(rng.choice(["a", "bb", None], filas), dtype="string[pyarrow]"),
+        "categoria": pd.Categorical(rng.choice(["x", "y"], filas)),
+    })
+    df.index = df.index * 2
+    return df
+
+
+def test_volcado_conserva_datos_y_version(volcados):
+    df = _frame()
+    mapeado, ruta, residentes = memoria.volcar(df)
+    assert ruta.exists() and ruta.parent == volcados
+    pd.testing.assert_frame_equal(mapeado, df)
+    assert version_df(mapeado) == version_df(df)
+    # Columns without nulls are read from the mapping, not copied into process memory
+    assert residentes < memoria.memoria_frame(df)
+
+
+def test_resultados_en_cache_sobreviven_al_volcado(volcados):
+    df = _frame(1_000)
+    cache = CacheVersiones()
+    assert cache.obtener((version_df(df), "suma"), lambda: df["entero"].sum()) == df["entero"].sum()
+    mapeado, _, _ = memoria.volcar(df)
+    del df
+    assert cache.obtener((version_df(mapeado), "suma"), lambda: -1) != -1
+
+
+def test_sesion_por_encima_del_presupuesto_se_vuelca(volcados, monkeypatch):
+    df = _frame()
+    st.session_state.dataset = Dataset(df)
+    monkeypatch.setattr(memoria, "LIMITE_SESION_MB", memoria.memoria_frame(df) / 2 / 1024 ** 2)
+
+    assert memoria.gestionar_memoria() == ["dataset"]
+    remapeado = st.session_state.dataset.df
+    assert remapeado is not df
+    pd.testing.assert_frame_equal(remapeado, df)
+    assert st.session_state.dataset.version == version_df(df)
+    assert memoria.uso_memoria()["volcados"] == ["dataset"]
+    assert memoria.gestionar_memoria() == []   # already spilled: nothing more to do
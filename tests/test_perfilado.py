@@ -0,0 +1,36 @@
+# tests/test_perfilado.py
+import numpy as np
+import pandas as pd
+import pytest
+from funciones.perfilado import HyperLogLog, hash_valores, perfilar_columna
+
+
+@pytest.mark.parametrize("distintos", [10, 1_000, 50_000, 400_000])
+def test_hll_dentro_del_error_esperado(distintos):
+    rng = np.random.default_rng(distintos)
+    serie = pd.Series(rng.permutation(np.repeat(np.arange(distintos), 3)))
+    hll = HyperLogLog()
+    hll.agregar_hashes(hash_valores(serie))
+    # 4 standard errors: a false failure is practically impossible
+    assert abs(hll.estimar() - distintos) <= 4 * hll.error_relativo * distintos + 1
+
+
+def test_hll_fusionado_igual_que_uno_solo():
+    valores = pd.Series(np.arange(100_000).astype(str))
+    entero, a, b = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    entero.agregar_hashes(hash_valores(valores))
+    a.agregar_hashes(hash_valores(valores.iloc[:60_000]))
+    b.agregar_hashes(hash_valores(valores.iloc[40_000:]))
+    a.fusionar(b)
+    assert a.estimar() == entero.estimar()
+
+
+def test_perfil_aproximado_frente_a_pandas():
+    rng = np.random.default_rng(3)
+    serie = pd.Series(rng.integers(0, 20_000, 200_000).astype(float))
+    serie[rng.random(len(serie)) < 0.1] = np.nan
+    perfil = perfilar_columna(serie, umbral_aproximado=1_000, tamano_bloque=30_000)
+    assert perfil["aproximado"]
+    assert perfil["nulos"] == serie.isna().sum()
+    assert perfil["minimo"] == serie.min() and perfil["maximo"] == serie.max()
+    assert abs(perfil["unicos"] - serie.nunique()) <= 4 * perfil["error"] * serie.nunique()
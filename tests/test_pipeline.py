@@ -0,0 +1,29 @@
+# tests/test_pipeline.py
+import numpy as np
+import pandas as pd
+from funciones.pipeline import EliminarDuplicados, EliminarNulos, PlanTransformacion
+
+
+def _plan(*pasos) -> PlanTransformacion:
+    plan = PlanTransformacion()
+    for paso in pasos:
+        plan.agregar(paso)
+    return plan
+
+
+def test_fusion_de_dos_filtros_de_nulos():
+    df = pd.DataFrame({"k": [1, 2, 2, 3], "v": [1.0, np.nan, 2.0, 3.0]})
+    resultado = _plan(EliminarNulos(), EliminarNulos()).ejecutar(df)
+    assert resultado["k"].tolist() == [1, 2, 3]
+
+
+def test_fusion_de_nulos_y_duplicados():
+    df = pd.DataFrame({"k": [1, 1, 2], "v": [1.0, 1.0, np.nan]})
+    resultado = _plan(EliminarNulos(), EliminarDuplicados(["k"])).ejecutar(df)
+    assert resultado["k"].tolist() == [1]
+
+
+def test_duplicados_se_calculan_tras_los_filtros_previos():
+    df = pd.DataFrame({"k": [1, 1], "v": [np.nan, 5.0]})
+    resultado = _plan(EliminarNulos(), EliminarDuplicados(["k"])).ejecutar(df)
+    assert resultado["v"].tolist() == [5.0]